@@ -5,106 +5,168 @@ Autonomous agents that can create complete games using Gemini AI
 
 import os
 import json
+import asyncio
 import time
 import random
 import textwrap
-from typing import Dict, List, Any, Optional
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Any, Optional
 from datetime import datetime
 import logging
 from assets.asset_manager import get_sprite_manifest
 
 from generators.gemini_generator import GeminiGameGenerator
+from generators.async_gemini_generator import AsyncGeminiGameGenerator
+from generators.template_registry import get_template_registry
+from generators.structured_output import loads_lenient
+from agents.stage_graph import run_stage_graph
+from services.game_catalog import get_game_catalog
+from services.game_dedup import content_hash, minhash_signature
+from config import config
 from engine.game_engine import GameEngine
 
 logger = logging.getLogger(__name__)
 
+@contextmanager
+def _report_stage(progress_callback: Optional[Callable[[str, str], None]], stage: str):
+    """Reports the start and end of a pipeline stage to an optional progress callback"""
+    if progress_callback:
+        progress_callback(stage, "started")
+    try:
+        yield
+    finally:
+        if progress_callback:
+            progress_callback(stage, "finished")
+
+def _index_game(game_id: str, metadata: Dict[str, Any], kind: str, code: Optional[str] = None):
+    """Add a saved game to the catalog, flagging near-duplicates; the files on disk stay the source of truth"""
+    try:
+        catalog = get_game_catalog()
+        signature = minhash_signature(code) if code else None
+        near_duplicate = None
+        if signature:
+            threshold = float(config.get("catalog.near_duplicate_threshold", 0.9))
+            near_duplicate = catalog.find_near_duplicate(signature, threshold)
+            if near_duplicate:
+                logger.info(f"Game {game_id} is a near-duplicate of {near_duplicate['game_id']} "
+                            f"(similarity {near_duplicate['similarity']})")
+        catalog.add_game(game_id, metadata, kind, signature=signature,
+                         near_duplicate_of=near_duplicate['game_id'] if near_duplicate else None)
+    except Exception as e:
+        logger.warning(f"Could not index game {game_id} in the catalog: {e}")
+
+
+def _find_identical_game(digest: str) -> Optional[str]:
+    """Path of an already saved game with the same content hash, if its script still exists"""
+    try:
+        existing = get_game_catalog().find_by_hash(digest)
+    except Exception as e:
+        logger.warning(f"Could not look up duplicate games: {e}")
+        return None
+    if existing and existing["kind"] == "game":
+        filepath = os.path.join("games", existing["game_id"])
+        if os.path.exists(filepath):
+            return filepath
+    return None
+
+
 class GameCreationAgent:
     """Main agent for autonomous game creation"""
     
     def __init__(self, api_key: Optional[str] = None):
         self.generator = GeminiGameGenerator(api_key)
+        self._async_generator = None
         self.created_games = []
         self.current_game = None
+        # Upper bound on LLM stages running at once for a single game
+        self.max_parallel_stages = 3
 
     @staticmethod
     def _read_template_file(template_id: str) -> str:
-        """Reads the content of a specific template file."""
-        # Maps template ID to the actual file name
-        template_map = {
-            "A_CORE_SETUP": "template_A_core_setup.py",
-            "B_MOVEMENT_TOPDOWN": "template_B_movement_topdown.py",
-            "C_MOVEMENT_PLATFORMER": "template_C_movement_platformer.py",
-            "D_HEALTH_DAMAGE": "template_D_health_damage.py",
-            "E_BASIC_COLLISION": "template_E_basic_collision.py",
-            "F_GAME_STATES": "template_F_game_states.py",
-            "G_ASSET_PATH_HANDLER": "template_G_asset_path_handler.py",
-        }
-        
-        filename = template_map.get(template_id)
-        if not filename:
-            return f"# ERROR: Template ID '{template_id}' not found.\n"
-
-        # CRITICAL: Construct the path relative to the current file's directory
-        # Assumes 'templates' folder is a sibling of 'agents' or relative to the script root.
-        base_dir = os.path.dirname(os.path.abspath(__file__))
-        template_path = os.path.join(base_dir, "..", "templates", filename)
-        
-        # Fallback path if templates folder is in the root directory (where main.py is)
-        if not os.path.exists(template_path):
-            root_dir = os.path.abspath(os.path.join(base_dir, ".."))
-            template_path = os.path.join(root_dir, "templates", filename)
-
-        try:
-            with open(template_path, 'r', encoding='utf-8') as f:
-                return f.read()
-        except FileNotFoundError:
-            return f"# ERROR: Template file not found at {template_path}\n"
-        except Exception as e:
-            return f"# ERROR reading template {filename}: {str(e)}\n"
+        """Returns the content of a specific template from the preloaded registry."""
+        return get_template_registry().get(template_id)
 
     @staticmethod
     def stitch_templates(template_ids: list) -> str:
         """Combines template code into a single string for the LLM."""
-        stitched_code = ["# --- START GENERATED GAME CODE TEMPLATE ---"]
-        
-        for template_id in template_ids:
-            # Add a clear marker before each template for debugging/review
-            stitched_code.append(f"\n# --- TEMPLATE: {template_id} ---")
-            stitched_code.append(GameCreationAgent._read_template_file(template_id))
-            
-        stitched_code.append("\n# --- END GENERATED GAME CODE TEMPLATE ---")
-        
-        return "\n".join(stitched_code)
+        return get_template_registry().stitch(template_ids)
         
-    def create_game_autonomously(self, theme: str, existing_concept: Optional[dict] = None) -> Dict[str, Any]:
-        """Orchestrates game creation using templates."""
+    def create_game_autonomously(self, theme: str, existing_concept: Optional[dict] = None,
+                                 progress_callback: Optional[Callable[[str, str], None]] = None) -> Dict[str, Any]:
+        """Orchestrates game creation using templates.
+
+        progress_callback, if given, is called with (stage, "started"/"finished")
+        around each pipeline stage.
+        """
         
         # 1. GENERATE GAME CONCEPT
         # This step remains the same:
-        game_concept = existing_concept or self.generator.generate_game_concept(theme)
-        
-        # 2. GENERATE TEMPLATE PLAN (New Step)
-        template_ids = self.generator.generate_template_plan(game_concept)
-        logger.info(f"Templates selected: {template_ids}")
-        
-        # 3. STITCH TEMPLATES (New Step)
-        stitched_template_code = GameCreationAgent.stitch_templates(template_ids)
-        
-        # 4. GENERATE LEVEL DESIGN (This remains the same)
-        level_design = self.generator.generate_level_design(game_concept)
-        
-        # 5. GENERATE FINAL CODE (CRITICAL CHANGE)
-        # We pass the stitched code to the LLM
-        final_code_blocks = self.generator.generate_game_code(
-            game_concept, 
-            level_design, 
-            stitched_template_code  # <-- NEW ARGUMENT
+        game_concept = existing_concept
+        if not game_concept:
+            with _report_stage(progress_callback, "concept"):
+                game_concept = self.generator.generate_game_concept(theme)
+        
+        # 2-5. PLAN, LEVEL, CODE AND ASSETS
+        # Template plan, level design and asset selection only need the concept, so they
+        # run concurrently; code generation starts as soon as its own inputs are ready.
+        def generate_code(template_plan: List[str], level_design: Dict[str, Any]) -> str:
+            logger.info(f"Templates selected: {template_plan}")
+            stitched_template_code = GameCreationAgent.stitch_templates(template_plan)
+            # We pass the stitched code to the LLM
+            return self.generator.generate_game_code(game_concept, level_design, stitched_template_code)
+
+        results = run_stage_graph({
+            "template_plan": (lambda: self.generator.generate_template_plan(game_concept), []),
+            "level_design": (lambda: self.generator.generate_level_design(game_concept), []),
+            "assets": (lambda: self.generator.generate_asset_descriptions(game_concept, get_sprite_manifest()), []),
+            "code": (generate_code, ["template_plan", "level_design"]),
+        }, max_workers=self.max_parallel_stages, progress_callback=progress_callback)
+        return self._assemble_game_package(
+            theme, game_concept, results["level_design"], results["code"], results["assets"]
+        )
+
+    async def create_game_autonomously_async(self, theme: str, existing_concept: Optional[dict] = None,
+                                             progress_callback: Optional[Callable[[str, str], None]] = None) -> Dict[str, Any]:
+        """Awaitable version of create_game_autonomously built on the async Gemini client."""
+        generator = self.async_generator
+
+        async def run_stage(stage: str, coroutine):
+            with _report_stage(progress_callback, stage):
+                return await coroutine
+
+        # 1. GENERATE GAME CONCEPT
+        game_concept = existing_concept
+        if not game_concept:
+            game_concept = await run_stage("concept", generator.generate_game_concept(theme))
+
+        # 2-5. PLAN, LEVEL, CODE AND ASSETS (same dependency graph as the sync pipeline)
+        plan_task = asyncio.ensure_future(run_stage("template_plan", generator.generate_template_plan(game_concept)))
+        level_task = asyncio.ensure_future(run_stage("level_design", generator.generate_level_design(game_concept)))
+        assets_task = asyncio.ensure_future(
+            run_stage("assets", generator.generate_asset_descriptions(game_concept, get_sprite_manifest()))
         )
 
-        sprite_manifest = get_sprite_manifest()
+        async def generate_code():
+            template_plan, level_design = await asyncio.gather(plan_task, level_task)
+            logger.info(f"Templates selected: {template_plan}")
+            stitched_template_code = GameCreationAgent.stitch_templates(template_plan)
+            return await run_stage("code", generator.generate_game_code(game_concept, level_design, stitched_template_code))
+
+        final_code, asset_descriptions = await asyncio.gather(generate_code(), assets_task)
+        return self._assemble_game_package(theme, game_concept, level_task.result(), final_code, asset_descriptions)
 
-    # 6. ASSEMBLE FINAL SCRIPT
-        final_script = final_code_blocks 
+    @property
+    def async_generator(self) -> AsyncGeminiGameGenerator:
+        """Async Gemini client, created on first use"""
+        if self._async_generator is None:
+            self._async_generator = AsyncGeminiGameGenerator(self.generator.api_key, backend=self.generator.backend)
+        return self._async_generator
+
+    def _assemble_game_package(self, theme: str, game_concept: Dict[str, Any], level_design: Dict[str, Any],
+                               final_code_blocks: str, asset_descriptions: Dict[str, Any]) -> Dict[str, Any]:
+        """Builds the final game package from the stage results."""
+        # 6. ASSEMBLE FINAL SCRIPT
+        final_script = final_code_blocks
         final_script = textwrap.dedent(final_script).strip()
         
         # --- CRITICAL NEW LOGGING STEP ---
@@ -112,11 +174,8 @@ class GameCreationAgent:
         logger.info(f"FINAL SCRIPT CODE GENERATED:\n{final_script[:2100]}...\n(Code snippet truncated for log brevity)")
         logger.info("-" * 50)
         # -----------------------------------
-
-        # 7. GENERATE ASSETS & PACKAGE 
-        asset_descriptions = self.generator.generate_asset_descriptions(game_concept, sprite_manifest)
         
-        # 8. PACKAGE AND SAVE
+        # 7. PACKAGE AND SAVE
         game_package = {
             "concept": game_concept,
             "level_design": level_design,
@@ -128,8 +187,15 @@ class GameCreationAgent:
         return game_package
     
     def save_game(self, game_package: Dict[str, Any], filename: str = None) -> str:
-        """Save game to file"""
+        """Save game to file; an identical game that is already saved is reused instead of written again"""
+        digest = content_hash(game_package["code"], game_package["concept"])
         if not filename:
+            existing_path = _find_identical_game(digest)
+            if existing_path:
+                logger.info(f"Identical game already saved at {existing_path}, reusing it")
+                get_game_catalog().record_duplicate_save(os.path.basename(existing_path))
+                return existing_path
+
             title = game_package["concept"].get("title", "Unknown")
             safe_title = "".join(c for c in title if c.isalnum() or c in (' ', '-', '_')).rstrip()
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -145,15 +211,18 @@ class GameCreationAgent:
             f.write(game_package["code"])
         
         # Save metadata
+        metadata = {
+            "concept": game_package["concept"],
+            "level_design": game_package["level_design"],
+            "assets": game_package["assets"],
+            "created_at": game_package["created_at"],
+            "theme": game_package["theme"],
+            "content_hash": digest
+        }
         metadata_path = filepath.replace('.py', '_metadata.json')
         with open(metadata_path, 'w') as f:
-            json.dump({
-                "concept": game_package["concept"],
-                "level_design": game_package["level_design"],
-                "assets": game_package["assets"],
-                "created_at": game_package["created_at"],
-                "theme": game_package["theme"]
-            }, f, indent=2)
+            json.dump(metadata, f, indent=2)
+        _index_game(filename, metadata, "game", game_package["code"])
         
         logger.info(f"Game saved to {filepath}")
         return filepath
@@ -193,6 +262,7 @@ class GameCreationAgent:
         except Exception as e:
             logger.error(f"Error running with engine: {e}")
 
+
 class GameDesignAgent:
     """Specialized agent for game design decisions"""
     
@@ -229,14 +299,7 @@ class GameDesignAgent:
         
         try:
             response = self.gemini.model.generate_content(prompt)
-            content = response.text.strip()
-            
-            if content.startswith('```json'):
-                content = content[7:-3]
-            elif content.startswith('```'):
-                content = content[3:-3]
-            
-            analysis = json.loads(content)
+            analysis = loads_lenient(response.text)
             return analysis
             
         except Exception as e:
@@ -334,14 +397,7 @@ class AssetGenerationAgent:
         
         try:
             response = self.gemini.model.generate_content(prompt)
-            content = response.text.strip()
-            
-            if content.startswith('```json'):
-                content = content[7:-3]
-            elif content.startswith('```'):
-                content = content[3:-3]
-            
-            style_guide = json.loads(content)
+            style_guide = loads_lenient(response.text)
             return style_guide
             
         except Exception as e:
@@ -472,6 +528,7 @@ class AutonomousGameDirector:
         metadata_path = os.path.join(game_dir, "metadata.json")
         with open(metadata_path, 'w') as f:
             json.dump(complete_game, f, indent=2)
+        _index_game(os.path.basename(game_dir), complete_game, "complete", first_level_code)
         
         logger.info(f"Complete game saved to {game_dir}")
         return game_dir
@@ -0,0 +1,61 @@
+"""
+Stage Graph Executor
+Runs pipeline stages concurrently as soon as the stages they depend on have finished
+"""
+
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+# A stage is a function plus the names of the stages whose results it needs.
+# The function is called with those results as keyword arguments.
+Stage = Tuple[Callable[..., Any], List[str]]
+
+
+def run_stage_graph(stages: Dict[str, Stage], max_workers: int = 4,
+                    progress_callback: Optional[Callable[[str, str], None]] = None) -> Dict[str, Any]:
+    """Execute a dependency graph of stages on a thread pool and return every stage's result"""
+    for name, (_, dependencies) in stages.items():
+        missing = [dep for dep in dependencies if dep not in stages]
+        if missing:
+            raise ValueError(f"Stage '{name}' depends on unknown stages: {missing}")
+
+    results: Dict[str, Any] = {}
+    remaining = dict(stages)
+    running = {}
+
+    def run_stage(name: str, func: Callable[..., Any], kwargs: Dict[str, Any]) -> Any:
+        if progress_callback:
+            progress_callback(name, "started")
+        try:
+            return func(**kwargs)
+        finally:
+            if progress_callback:
+                progress_callback(name, "finished")
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="stage") as executor:
+        while remaining or running:
+            # Start every stage whose dependencies are all satisfied
+            ready = [name for name, (_, deps) in remaining.items() if all(dep in results for dep in deps)]
+            for name in ready:
+                func, dependencies = remaining.pop(name)
+                kwargs = {dep: results[dep] for dep in dependencies}
+                running[executor.submit(run_stage, name, func, kwargs)] = name
+
+            if not running:
+                raise ValueError(f"Stage graph has a dependency cycle: {list(remaining)}")
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                error = future.exception()
+                if error:
+                    for pending in running:
+                        pending.cancel()
+                    logger.error(f"Stage '{name}' failed: {error}")
+                    raise error
+                results[name] = future.result()
+
+    return results
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+End-to-end Benchmark for the Game Generation Pipeline
+Drives the agent pipeline or the HTTP generation flow at a configurable concurrency
+against the offline replay backend and reports per-stage latency percentiles
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import argparse
+import logging
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config import config
+
+# Stage names in pipeline order, as reported by the progress callbacks
+STAGES = ["concept", "template_plan", "level_design", "code", "assets", "save", "package"]
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile of a list of samples"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100.0 * len(ordered)))
+    return round(ordered[rank - 1], 4)
+
+
+def summarize(samples: List[float]) -> Dict[str, Any]:
+    return {
+        "count": len(samples),
+        "p50": percentile(samples, 50),
+        "p95": percentile(samples, 95),
+        "p99": percentile(samples, 99),
+        "max": round(max(samples), 4) if samples else None,
+    }
+
+
+class StageRecorder:
+    """Progress callback that records stage durations for one game"""
+
+    def __init__(self):
+        self.timings: Dict[str, float] = {}
+        self._starts: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, stage: str, phase: str):
+        now = time.perf_counter()
+        with self._lock:
+            if phase == "started":
+                self._starts[stage] = now
+            else:
+                self.timings[stage] = now - self._starts.pop(stage, now)
+
+
+def run_agent_job(theme: str, packager=None) -> Dict[str, Any]:
+    """Generate and save one game through GameCreationAgent, packaging it too when a packager is given"""
+    from agents.game_agents import GameCreationAgent
+    from services.packaging import sprite_asset_files
+
+    recorder = StageRecorder()
+    started = time.perf_counter()
+    agent = GameCreationAgent(os.getenv('GEMINI_API_KEY'))
+    game_package = agent.create_game_autonomously(theme, progress_callback=recorder)
+    recorder("save", "started")
+    filepath = agent.save_game(game_package)
+    recorder("save", "finished")
+    if packager:
+        recorder("package", "started")
+        packager.package(
+            os.path.abspath(filepath), os.path.splitext(os.path.basename(filepath))[0], os.path.abspath("games"),
+            asset_files=sprite_asset_files(game_package.get('assets', {}))
+        )
+        recorder("package", "finished")
+    return {"total": time.perf_counter() - started, "stages": recorder.timings}
+
+
+def run_server_job(base_url: str, theme: str, poll_interval: float, timeout: float) -> Dict[str, Any]:
+    """Start a generation over HTTP, wait for it to finish and download the result"""
+    import requests
+
+    payload = {
+        "worldDescription": theme,
+        "uploadedImage": None,
+        "imageDescription": "",
+        "imageCategory": "Main Character",
+        "gameMode": "single",
+        "settings": {"horrorLevel": 3, "puzzleComplexity": 5, "ageGroup": 7, "speedChaos": 4},
+        # Numbered job themes are near-duplicates; reusing a game would measure a cache hit, not a generation
+        "reuseExisting": False
+    }
+    started = time.perf_counter()
+    response = requests.post(f"{base_url}/api/generate/start", json=payload, timeout=30)
+    while response.status_code == 429:
+        time.sleep(float(response.headers.get("Retry-After", 1)))
+        response = requests.post(f"{base_url}/api/generate/start", json=payload, timeout=30)
+    response.raise_for_status()
+    task_id = response.json()["task_id"]
+
+    deadline = started + timeout
+    task = {}
+    while time.perf_counter() < deadline:
+        task = requests.get(f"{base_url}/api/generate/status/{task_id}", timeout=30).json()
+        if task.get("status") in ("SUCCESS", "FAILURE", "CANCELLED"):
+            break
+        time.sleep(poll_interval)
+
+    if task.get("status") != "SUCCESS":
+        raise RuntimeError(f"Task {task_id} ended with {task.get('status', 'TIMEOUT')}: {task.get('result')}")
+
+    stages = dict(task.get("stage_timings", {}))
+    download_started = time.perf_counter()
+    executable = task["result"]["executable_file"]
+    download = requests.get(f"{base_url}/api/game/download/{executable}", timeout=300)
+    download.raise_for_status()
+    stages["download"] = time.perf_counter() - download_started
+    return {"total": time.perf_counter() - started, "stages": stages}
+
+
+def run_benchmark(mode: str, games: int, concurrency: int, theme: str, base_url: str,
+                  poll_interval: float, timeout: float, package: bool = False) -> Dict[str, Any]:
+    """Run the jobs and aggregate per-stage latency percentiles and throughput"""
+    packager = None
+
+    def job(index: int) -> Dict[str, Any]:
+        job_theme = f"{theme} #{index}"
+        if mode == "server":
+            return run_server_job(base_url, job_theme, poll_interval, timeout)
+        return run_agent_job(job_theme, packager)
+
+    if mode == "agent":
+        # Import once up front; concurrent first imports from worker threads can race
+        import agents.game_agents  # noqa: F401
+        if package:
+            from services.packaging import GamePackager
+            # One packager for all jobs, as in the server, so builds share the runtime and worker pool
+            packager = GamePackager()
+
+    results, errors = [], []
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = [executor.submit(job, i) for i in range(games)]
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                errors.append(str(e))
+    wall_time = time.perf_counter() - started
+    if packager:
+        packager.shutdown()
+
+    stage_names = STAGES + sorted({s for r in results for s in r["stages"]} - set(STAGES))
+    stage_samples = {name: [r["stages"][name] for r in results if name in r["stages"]] for name in stage_names}
+    return {
+        "mode": mode,
+        "backend": config.get("gemini.backend"),
+        "replay_latency": config.get("gemini.replay_latency"),
+        "games": games,
+        "concurrency": concurrency,
+        "packaged": mode == "server" or package,
+        "completed": len(results),
+        "failed": len(errors),
+        "errors": errors[:10],
+        "wall_time_seconds": round(wall_time, 3),
+        "throughput_games_per_minute": round(len(results) / wall_time * 60, 3) if wall_time else 0.0,
+        "total": summarize([r["total"] for r in results]),
+        "stages": {name: summarize(samples) for name, samples in stage_samples.items() if samples},
+        "created_at": datetime.now().isoformat(),
+    }
+
+
+def print_report(report: Dict[str, Any]):
+    print(f"\n📊 Benchmark ({report['mode']}, backend={report['backend']}, concurrency={report['concurrency']})")
+    print("-" * 64)
+    print(f"{'stage':<16}{'count':>8}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}")
+    for name, stats in list(report["stages"].items()) + [("total", report["total"])]:
+        row = [stats[k] if stats[k] is not None else float('nan') for k in ("p50", "p95", "p99", "max")]
+        print(f"{name:<16}{stats['count']:>8}" + "".join(f"{v:>10.3f}" for v in row))
+    print("-" * 64)
+    print(f"✅ Completed: {report['completed']}  ❌ Failed: {report['failed']}")
+    print(f"⚡ Throughput: {report['throughput_games_per_minute']} games/min over {report['wall_time_seconds']}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the game generation pipeline")
+    parser.add_argument("--mode", choices=["agent", "server"], default="agent",
+                        help="agent: call GameCreationAgent directly; server: drive the HTTP API")
+    parser.add_argument("--games", type=int, default=10, help="Number of games to generate")
+    parser.add_argument("--concurrency", type=int, default=4, help="Games generated in parallel")
+    parser.add_argument("--theme", default="turtles getting back to the ocean", help="Base theme for each game")
+    parser.add_argument("--backend", choices=["live", "record", "replay"], default="replay", help="Model backend")
+    parser.add_argument("--latency", type=float, default=0.5, help="Injected latency per replayed model call")
+    parser.add_argument("--package", action="store_true",
+                        help="Also package each game in --mode agent, as the server does")
+    parser.add_argument("--url", default="http://localhost:8000", help="Server URL for --mode server")
+    parser.add_argument("--poll-interval", type=float, default=0.5, help="Status poll interval for --mode server")
+    parser.add_argument("--timeout", type=float, default=600, help="Per-game timeout for --mode server")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    parser.add_argument("--verbose", action="store_true", help="Show pipeline logging")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if not args.verbose:
+        logging.getLogger().setLevel(logging.WARNING)
+
+    config.set("gemini.backend", args.backend)
+    config.set("gemini.replay_latency", args.latency)
+    # Cached responses would hide the model latency being measured
+    config.set("cache.enabled", False)
+
+    output_path = os.path.abspath(args.output) if args.output else None
+    if args.mode == "agent":
+        # Keep benchmark games, and the catalog and request cache that index them, out of the real data
+        scratch_dir = tempfile.mkdtemp(prefix="gamegen_bench_")
+        os.chdir(scratch_dir)
+        config.set("catalog.path", os.path.join(scratch_dir, "data", "games.db"))
+        config.set("request_cache.path", os.path.join(scratch_dir, "data", "request_cache.db"))
+
+    report = run_benchmark(args.mode, args.games, args.concurrency, args.theme, args.url,
+                           args.poll_interval, args.timeout, package=args.package)
+    print_report(report)
+
+    if output_path:
+        with open(output_path, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"📁 Report saved to {output_path}")
+
+    return 0 if report["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -11,7 +11,22 @@ DEFAULT_CONFIG = {
         "model": "gemini-pro",
         "temperature": 0.7,
         "max_tokens": 2048,
-        "timeout": 30
+        "timeout": 30,
+        "max_retries": 3,
+        "retry_base_delay": 1.0,
+        "retry_max_delay": 20.0,
+        "bad_output_retries": 1,
+        "circuit_failure_threshold": 5,
+        "circuit_reset_seconds": 30,
+        "max_concurrency": 8,
+        "backend": "live",
+        "recordings_dir": "data/recordings",
+        "replay_latency": 0.0,
+        "replay_jitter": 0.0,
+        "code_prompt_token_budget": 6000,
+        "json_mode": True,
+        "stream_code": True,
+        "code_stream_retries": 1
     },
     "game": {
         "default_width": 800,
@@ -27,6 +42,50 @@ DEFAULT_CONFIG = {
         "obstacle_size": (40, 40),
         "ui_size": (200, 50)
     },
+    "tasks": {
+        "backend": "sqlite",
+        "sqlite_path": "data/tasks.db",
+        "redis_url": None,
+        "ttl_seconds": 86400
+    },
+    "rate_limit": {
+        "enabled": True,
+        "requests_per_minute": 60,
+        "tokens_per_minute": 1000000,
+        "coding_reserve": 0.2,
+        "max_wait_seconds": 120
+    },
+    "scheduler": {
+        "llm_concurrency": 2,
+        "packaging_concurrency": 2,
+        "max_queue": 16,
+        "retry_after_seconds": 30
+    },
+    "cache": {
+        "enabled": True,
+        "path": "data/response_cache.db",
+        "max_entries": 5000,
+        "max_megabytes": 200,
+        "ttl_seconds": 604800
+    },
+    "templates": {
+        "hot_reload": False
+    },
+    "request_cache": {
+        "enabled": True,
+        "path": "data/request_cache.db",
+        "similarity_threshold": 0.9
+    },
+    "catalog": {
+        "path": "data/games.db",
+        "near_duplicate_threshold": 0.9
+    },
+    "packaging": {
+        "use_runtime": True,
+        "runtime_dir": "data/runtime",
+        "work_dir": "data/packaging",
+        "build_timeout_seconds": 600
+    },
     "directories": {
         "games": "games",
         "assets": "assets",
@@ -118,7 +177,30 @@ ENV_MAPPINGS = {
     "GAME_WIDTH": "game.default_width",
     "GAME_HEIGHT": "game.default_height",
     "GAME_FPS": "game.default_fps",
-    "LOG_LEVEL": "logging.level"
+    "LOG_LEVEL": "logging.level",
+    "TASK_STORE_BACKEND": "tasks.backend",
+    "TASK_STORE_PATH": "tasks.sqlite_path",
+    "REDIS_URL": "tasks.redis_url",
+    "TASK_TTL_SECONDS": "tasks.ttl_seconds",
+    "RESPONSE_CACHE_ENABLED": "cache.enabled",
+    "GEMINI_BACKEND": "gemini.backend",
+    "GEMINI_RECORDINGS_DIR": "gemini.recordings_dir",
+    "GEMINI_REPLAY_LATENCY": "gemini.replay_latency",
+    "GEMINI_TIMEOUT": "gemini.timeout",
+    "GEMINI_MAX_RETRIES": "gemini.max_retries",
+    "GEMINI_JSON_MODE": "gemini.json_mode",
+    "GEMINI_RATE_LIMIT_ENABLED": "rate_limit.enabled",
+    "GEMINI_REQUESTS_PER_MINUTE": "rate_limit.requests_per_minute",
+    "GEMINI_TOKENS_PER_MINUTE": "rate_limit.tokens_per_minute",
+    "GEMINI_STREAM_CODE": "gemini.stream_code",
+    "TEMPLATES_HOT_RELOAD": "templates.hot_reload",
+    "GAME_CATALOG_PATH": "catalog.path",
+    "REQUEST_CACHE_ENABLED": "request_cache.enabled",
+    "REQUEST_CACHE_THRESHOLD": "request_cache.similarity_threshold",
+    "PACKAGING_USE_RUNTIME": "packaging.use_runtime",
+    "PACKAGING_RUNTIME_DIR": "packaging.runtime_dir",
+    "PACKAGING_WORKERS": "scheduler.packaging_concurrency",
+    "PACKAGING_BUILD_TIMEOUT": "packaging.build_timeout_seconds"
 }
 
 def load_from_env():
@@ -127,12 +209,19 @@ def load_from_env():
         value = os.getenv(env_var)
         if value:
             # Convert string values to appropriate types
-            if config_key in ["game.default_width", "game.default_height", "game.default_fps"]:
+            if config_key in ["game.default_width", "game.default_height", "game.default_fps",
+                              "tasks.ttl_seconds", "scheduler.packaging_concurrency",
+                              "packaging.build_timeout_seconds", "gemini.max_retries",
+                              "rate_limit.requests_per_minute", "rate_limit.tokens_per_minute"]:
                 try:
                     value = int(value)
                 except ValueError:
                     continue
-            elif config_key == "gemini.temperature":
+            elif config_key in ["cache.enabled", "gemini.json_mode", "gemini.stream_code", "packaging.use_runtime",
+                                "rate_limit.enabled", "request_cache.enabled", "templates.hot_reload"]:
+                value = value.lower() not in ("0", "false", "no", "off")
+            elif config_key in ["gemini.temperature", "gemini.timeout", "gemini.replay_latency",
+                                "request_cache.similarity_threshold"]:
                 try:
                     value = float(value)
                 except ValueError:
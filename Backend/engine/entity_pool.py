@@ -0,0 +1,76 @@
+"""
+Entity Pool for the Game Engine
+Dense active list with O(1) swap-remove, plus a free list so released entities are reused instead of reallocated
+"""
+
+from typing import Callable, Dict, Iterator, List
+
+
+class EntityPool:
+    """
+    Live entities of one kind. Removal swaps the last entity into the freed slot, so the order of
+    active entities is not preserved; do not release entities while iterating over the pool itself.
+    Released entities are kept and brought back with their `reset(...)` method by `acquire`.
+    """
+
+    def __init__(self, factory: Callable[..., object]):
+        self.factory = factory
+        self.active: List[object] = []
+        self.free: List[object] = []
+        # Position of each active entity in `active`
+        self._slots: Dict[object, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.active)
+
+    def __iter__(self) -> Iterator[object]:
+        return iter(self.active)
+
+    def __getitem__(self, index: int) -> object:
+        return self.active[index]
+
+    def __contains__(self, entity) -> bool:
+        return entity in self._slots
+
+    def acquire(self, *args, **kwargs):
+        """A recycled entity reset with the given arguments, or a new one from the factory"""
+        if self.free:
+            entity = self.free.pop()
+            entity.reset(*args, **kwargs)
+        else:
+            entity = self.factory(*args, **kwargs)
+        self.add(entity)
+        return entity
+
+    def add(self, entity):
+        """Track an entity created elsewhere as active"""
+        if entity in self._slots:
+            return
+        self._slots[entity] = len(self.active)
+        self.active.append(entity)
+
+    append = add
+
+    def remove(self, entity):
+        """Drop an entity from the active list in O(1) without keeping it for reuse"""
+        index = self._slots.pop(entity, None)
+        if index is None:
+            raise ValueError("entity is not in the pool")
+        last = self.active.pop()
+        if last is not entity:
+            self.active[index] = last
+            self._slots[last] = index
+
+    def release(self, entity):
+        """Deactivate an entity and keep it for the next acquire"""
+        self.remove(entity)
+        entity.active = False
+        self.free.append(entity)
+
+    def clear(self):
+        """Release every active entity"""
+        for entity in self.active:
+            entity.active = False
+        self.free.extend(self.active)
+        self.active.clear()
+        self._slots.clear()
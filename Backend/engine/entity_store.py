@@ -0,0 +1,149 @@
+"""
+Entity Store for the Game Engine
+Structure-of-arrays enemy state so AI steering for every enemy is a handful of NumPy operations per frame
+"""
+
+import numpy as np
+from typing import List, Optional, Sequence
+
+# Behaviour codes; any other enemy type has no AI movement
+KIND_BASIC = 0
+KIND_AGGRESSIVE = 1
+KIND_FAST = 2
+KIND_OTHER = 3
+ENEMY_KINDS = {"basic": KIND_BASIC, "aggressive": KIND_AGGRESSIVE, "fast": KIND_FAST}
+
+# Distance at which a patrolling enemy counts as having reached its waypoint
+WAYPOINT_RADIUS = 10
+
+
+class EnemyStore:
+    """Positions, speeds, kinds, patrol targets and active flags of many enemies, one array per field"""
+
+    def __init__(self, capacity: int = 64):
+        self.count = 0
+        self.views: List[object] = []
+        self.types: List[str] = []
+        # Waypoints of each enemy, as given (list of [x, y])
+        self.paths: List[Sequence] = []
+        self._allocate(capacity)
+
+    def _allocate(self, capacity: int):
+        def grow(old: Optional[np.ndarray], shape, dtype, fill=0):
+            new = np.full(shape, fill, dtype=dtype)
+            if old is not None:
+                new[:len(old)] = old
+            return new
+
+        self.capacity = capacity
+        self.x = grow(getattr(self, 'x', None), capacity, np.float64)
+        self.y = grow(getattr(self, 'y', None), capacity, np.float64)
+        self.size = grow(getattr(self, 'size', None), (capacity, 2), np.int64)
+        self.speed = grow(getattr(self, 'speed', None), capacity, np.float64)
+        self.kind = grow(getattr(self, 'kind', None), capacity, np.int8, KIND_OTHER)
+        self.active = grow(getattr(self, 'active', None), capacity, np.bool_, False)
+        self.direction = grow(getattr(self, 'direction', None), capacity, np.float64, 1)
+        self.path_length = grow(getattr(self, 'path_length', None), capacity, np.int64)
+        self.current_target = grow(getattr(self, 'current_target', None), capacity, np.int64)
+        self.target_x = grow(getattr(self, 'target_x', None), capacity, np.float64)
+        self.target_y = grow(getattr(self, 'target_y', None), capacity, np.float64)
+        # Grid cells (x0, y0, x1, y1) each enemy occupied at the last rebucket
+        self.cells = grow(getattr(self, 'cells', None), (capacity, 4), np.int64, -1)
+
+    def add(self, view) -> int:
+        """Reserve a slot for an enemy view and return its index"""
+        if self.count == self.capacity:
+            self._allocate(self.capacity * 2)
+        index = self.count
+        self.count += 1
+        self.views.append(view)
+        self.types.append("basic")
+        self.paths.append([])
+        return index
+
+    def adopt(self, view):
+        """Move an enemy created elsewhere into this store"""
+        old, old_index = view._store, view._index
+        if old is self:
+            return
+        index = self.add(view)
+        for name in ("x", "y", "size", "speed", "kind", "active", "direction", "path_length", "current_target",
+                     "target_x", "target_y"):
+            getattr(self, name)[index] = getattr(old, name)[old_index]
+        self.types[index] = old.types[old_index]
+        self.paths[index] = old.paths[old_index]
+        old.active[old_index] = False
+        old.views[old_index] = None
+        view._store, view._index = self, index
+
+    def set_type(self, index: int, enemy_type: str):
+        self.types[index] = enemy_type
+        self.kind[index] = ENEMY_KINDS.get(enemy_type, KIND_OTHER)
+
+    def set_patrol_path(self, index: int, path: Sequence):
+        self.paths[index] = path
+        self.path_length[index] = len(path)
+        self.set_current_target(index, 0)
+
+    def set_current_target(self, index: int, target: int):
+        self.current_target[index] = target
+        path = self.paths[index]
+        if path:
+            self.target_x[index], self.target_y[index] = path[target][0], path[target][1]
+
+    def step(self, dt: float, player_x: float, player_y: float):
+        """Advance the AI of every active enemy by one frame"""
+        n = self.count
+        active = self.active[:n]
+        kind = self.kind[:n]
+        x, y, speed = self.x[:n], self.y[:n], self.speed[:n]
+
+        # Aggressive enemies chase the player
+        chasers = np.flatnonzero(active & (kind == KIND_AGGRESSIVE))
+        if len(chasers):
+            dx = player_x - x[chasers]
+            dy = player_y - y[chasers]
+            distance = np.sqrt(dx * dx + dy * dy)
+            moving = distance > 0
+            idx = chasers[moving]
+            x[idx] += (dx[moving] / distance[moving]) * speed[idx] * dt
+            y[idx] += (dy[moving] / distance[moving]) * speed[idx] * dt
+
+        patrollers = active & ((kind == KIND_BASIC) | (kind == KIND_FAST))
+        has_path = self.path_length[:n] > 0
+
+        # Without a path: wander horizontally, turning around now and then
+        wanderers = np.flatnonzero(patrollers & ~has_path)
+        if len(wanderers):
+            turning = wanderers[np.random.random(len(wanderers)) < 0.01]
+            self.direction[turning] = np.random.choice((-1.0, 1.0), size=len(turning))
+            x[wanderers] += self.direction[wanderers] * speed[wanderers] * dt
+
+        # With a path: head for the current waypoint, switching to the next one once it is reached
+        walkers = np.flatnonzero(patrollers & has_path)
+        if len(walkers):
+            dx = self.target_x[walkers] - x[walkers]
+            dy = self.target_y[walkers] - y[walkers]
+            distance = np.sqrt(dx * dx + dy * dy)
+            arrived = distance < WAYPOINT_RADIUS
+            moving = ~arrived
+            idx = walkers[moving]
+            x[idx] += (dx[moving] / distance[moving]) * speed[idx] * dt
+            y[idx] += (dy[moving] / distance[moving]) * speed[idx] * dt
+            for index in walkers[arrived].tolist():
+                self.set_current_target(index, (int(self.current_target[index]) + 1) % int(self.path_length[index]))
+
+    def rebucket(self, cell_size: int) -> np.ndarray:
+        """Indices of active enemies whose grid cells changed since the last call"""
+        n = self.count
+        left = self.x[:n].astype(np.int64)
+        top = self.y[:n].astype(np.int64)
+        cells = np.stack((
+            left // cell_size,
+            top // cell_size,
+            (left + np.maximum(self.size[:n, 0], 1) - 1) // cell_size,
+            (top + np.maximum(self.size[:n, 1], 1) - 1) // cell_size,
+        ), axis=1)
+        changed = np.flatnonzero(self.active[:n] & (cells != self.cells[:n]).any(axis=1))
+        self.cells[changed] = cells[changed]
+        return changed
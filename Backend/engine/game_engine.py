@@ -6,9 +6,15 @@ Provides the base classes and systems for pygame-based topdown games
 import pygame
 import math
 import random
-from typing import List, Dict, Any, Tuple, Optional
+from functools import partial
+from typing import List, Dict, Any, Tuple, Optional, Iterable
 from enum import Enum
 
+from engine.spatial_hash import SpatialHash
+from engine.entity_store import EnemyStore
+from engine.entity_pool import EntityPool
+from engine.text_cache import TextCache
+
 # Initialize pygame
 pygame.init()
 
@@ -21,21 +27,59 @@ class GameState(Enum):
     VICTORY = "victory"
 
 class Entity:
-    """Base class for all game entities"""
+    """Base class for all game entities; the rect is synced from x/y only when it is read after a move"""
+    
+    __slots__ = ("_x", "_y", "width", "height", "color", "_rect", "_rect_dirty", "active")
     
     def __init__(self, x: float, y: float, width: int, height: int, color: Tuple[int, int, int]):
+        self._rect = pygame.Rect(x, y, width, height)
         self.x = x
         self.y = y
         self.width = width
         self.height = height
         self.color = color
-        self.rect = pygame.Rect(x, y, width, height)
         self.active = True
     
+    @property
+    def x(self) -> float:
+        return self._x
+    
+    @x.setter
+    def x(self, value: float):
+        self._x = value
+        self._rect_dirty = True
+    
+    @property
+    def y(self) -> float:
+        return self._y
+    
+    @y.setter
+    def y(self, value: float):
+        self._y = value
+        self._rect_dirty = True
+    
+    @property
+    def rect(self) -> pygame.Rect:
+        if self._rect_dirty:
+            self._rect.x = int(self._x)
+            self._rect.y = int(self._y)
+            self._rect_dirty = False
+        return self._rect
+    
+    @rect.setter
+    def rect(self, value: pygame.Rect):
+        self._rect = pygame.Rect(value)
+        self.x = self._rect.x
+        self.y = self._rect.y
+    
     def update(self, dt: float):
         """Update entity logic"""
-        self.rect.x = int(self.x)
-        self.rect.y = int(self.y)
+    
+    def place(self, x: float, y: float):
+        """Move to a position and reactivate; used when a pooled entity is reused"""
+        self.x = x
+        self.y = y
+        self.active = True
     
     def draw(self, screen: pygame.Surface):
         """Draw the entity"""
@@ -49,6 +93,8 @@ class Entity:
 class Player(Entity):
     """Player character"""
     
+    __slots__ = ("speed", "health", "max_health", "score", "powerups")
+    
     def __init__(self, x: float, y: float):
         super().__init__(x, y, 30, 30, (0, 0, 255))  # Blue
         self.speed = 200  # pixels per second
@@ -93,21 +139,115 @@ class Player(Entity):
         self.score += points
 
 class Enemy(Entity):
-    """Enemy entity"""
-    
-    def __init__(self, x: float, y: float, enemy_type: str = "basic"):
-        colors = {
-            "basic": (255, 0, 0),      # Red
-            "aggressive": (139, 0, 0), # Dark red
-            "fast": (255, 165, 0)      # Orange
-        }
-        super().__init__(x, y, 25, 25, colors.get(enemy_type, (255, 0, 0)))
+    """Enemy entity; its state lives in an EnemyStore so the engine can update all enemies at once"""
+    
+    __slots__ = ("_store", "_index", "last_direction_change")
+    
+    COLORS = {
+        "basic": (255, 0, 0),      # Red
+        "aggressive": (139, 0, 0), # Dark red
+        "fast": (255, 165, 0)      # Orange
+    }
+    
+    def __init__(self, x: float, y: float, enemy_type: str = "basic", store: Optional[EnemyStore] = None):
+        # Enemies created outside an engine get a one-row store of their own, freed with them;
+        # GameEngine.add_entity moves them into the engine's store
+        self._store = store if store is not None else EnemyStore(capacity=1)
+        self._index = self._store.add(self)
+        super().__init__(x, y, 25, 25, self.COLORS.get(enemy_type, (255, 0, 0)))
+        self._store.size[self._index] = (self.width, self.height)
+        self.reset(x, y, enemy_type)
+    
+    def reset(self, x: float, y: float, enemy_type: str = "basic"):
+        """(Re)initialize the enemy, keeping its row in the store"""
+        self.place(x, y)
+        self.color = self.COLORS.get(enemy_type, (255, 0, 0))
         self.type = enemy_type
         self.speed = 50 if enemy_type == "basic" else 80 if enemy_type == "aggressive" else 120
         self.patrol_path = []
         self.current_target = 0
         self.direction = 1
         self.last_direction_change = 0
+        # Force a re-bucket on the next frame
+        self._store.cells[self._index] = -1
+
+    @property
+    def x(self) -> float:
+        return float(self._store.x[self._index])
+
+    @x.setter
+    def x(self, value: float):
+        self._store.x[self._index] = value
+
+    @property
+    def y(self) -> float:
+        return float(self._store.y[self._index])
+
+    @y.setter
+    def y(self, value: float):
+        self._store.y[self._index] = value
+
+    @property
+    def rect(self) -> pygame.Rect:
+        """Synced from the store on every read, since the engine moves enemies in bulk"""
+        rect = self._rect
+        rect.x = int(self._store.x[self._index])
+        rect.y = int(self._store.y[self._index])
+        return rect
+    
+    @rect.setter
+    def rect(self, value: pygame.Rect):
+        self._rect = pygame.Rect(value)
+        self.x = self._rect.x
+        self.y = self._rect.y
+    
+    @property
+    def active(self) -> bool:
+        return bool(self._store.active[self._index])
+
+    @active.setter
+    def active(self, value: bool):
+        self._store.active[self._index] = value
+
+    @property
+    def speed(self) -> float:
+        return float(self._store.speed[self._index])
+
+    @speed.setter
+    def speed(self, value: float):
+        self._store.speed[self._index] = value
+
+    @property
+    def type(self) -> str:
+        return self._store.types[self._index]
+
+    @type.setter
+    def type(self, value: str):
+        self._store.set_type(self._index, value)
+
+    @property
+    def patrol_path(self) -> list:
+        return self._store.paths[self._index]
+
+    @patrol_path.setter
+    def patrol_path(self, path: list):
+        self._store.set_patrol_path(self._index, path)
+
+    @property
+    def current_target(self) -> int:
+        return int(self._store.current_target[self._index])
+
+    @current_target.setter
+    def current_target(self, value: int):
+        self._store.set_current_target(self._index, value)
+
+    @property
+    def direction(self) -> int:
+        return int(self._store.direction[self._index])
+
+    @direction.setter
+    def direction(self, value: int):
+        self._store.direction[self._index] = value
         
     def update(self, dt: float, player: Player):
         """Update enemy AI"""
@@ -164,14 +304,23 @@ class Enemy(Entity):
 class Powerup(Entity):
     """Powerup item"""
     
+    __slots__ = ("type", "value")
+    
+    COLORS = {
+        "health": (0, 255, 0),     # Green
+        "speed": (255, 255, 0),    # Yellow
+        "score": (255, 0, 255),    # Magenta
+        "shield": (0, 255, 255)    # Cyan
+    }
+    
     def __init__(self, x: float, y: float, powerup_type: str = "health"):
-        colors = {
-            "health": (0, 255, 0),     # Green
-            "speed": (255, 255, 0),    # Yellow
-            "score": (255, 0, 255),    # Magenta
-            "shield": (0, 255, 255)    # Cyan
-        }
-        super().__init__(x, y, 20, 20, colors.get(powerup_type, (0, 255, 0)))
+        super().__init__(x, y, 20, 20, self.COLORS.get(powerup_type, (0, 255, 0)))
+        self.reset(x, y, powerup_type)
+    
+    def reset(self, x: float, y: float, powerup_type: str = "health"):
+        """(Re)initialize the powerup"""
+        self.place(x, y)
+        self.color = self.COLORS.get(powerup_type, (0, 255, 0))
         self.type = powerup_type
         self.value = 20 if powerup_type == "health" else 50 if powerup_type == "score" else 1
     
@@ -189,6 +338,8 @@ class Powerup(Entity):
 class Obstacle(Entity):
     """Static obstacle"""
     
+    __slots__ = ("type",)
+    
     def __init__(self, x: float, y: float, width: int, height: int, obstacle_type: str = "wall"):
         colors = {
             "wall": (128, 128, 128),   # Gray
@@ -202,19 +353,61 @@ class Obstacle(Entity):
 class Collectible(Entity):
     """Collectible item"""
     
+    __slots__ = ("type", "value")
+    
+    COLORS = {
+        "coin": (255, 215, 0),     # Gold
+        "gem": (128, 0, 128),      # Purple
+        "key": (255, 255, 255),    # White
+        "star": (255, 255, 0)      # Yellow
+    }
+    
     def __init__(self, x: float, y: float, collectible_type: str = "coin"):
-        colors = {
-            "coin": (255, 215, 0),     # Gold
-            "gem": (128, 0, 128),      # Purple
-            "key": (255, 255, 255),    # White
-            "star": (255, 255, 0)      # Yellow
-        }
-        super().__init__(x, y, 15, 15, colors.get(collectible_type, (255, 215, 0)))
+        super().__init__(x, y, 15, 15, self.COLORS.get(collectible_type, (255, 215, 0)))
+        self.reset(x, y, collectible_type)
+    
+    def reset(self, x: float, y: float, collectible_type: str = "coin"):
+        """(Re)initialize the collectible"""
+        self.place(x, y)
+        self.color = self.COLORS.get(collectible_type, (255, 215, 0))
         self.type = collectible_type
         self.value = 10 if collectible_type == "coin" else 50 if collectible_type == "gem" else 100
 
+class Projectile(Entity):
+    """Shot fired by the player or an enemy"""
+    
+    __slots__ = ("vx", "vy", "owner", "damage", "age")
+    
+    def __init__(self, x: float, y: float, vx: float, vy: float, owner: str = "player", damage: int = 10):
+        super().__init__(x, y, 6, 6, (255, 255, 255))
+        self.reset(x, y, vx, vy, owner, damage)
+    
+    def reset(self, x: float, y: float, vx: float, vy: float, owner: str = "player", damage: int = 10):
+        """(Re)initialize the projectile"""
+        self.place(x, y)
+        self.vx = vx
+        self.vy = vy
+        self.owner = owner
+        self.damage = damage
+        self.color = (255, 255, 255) if owner == "player" else (255, 80, 80)
+        self.age = 0.0
+    
+    def update(self, dt: float):
+        """Move in a straight line"""
+        self.x += self.vx * dt
+        self.y += self.vy * dt
+        self.age += dt
+        super().update(dt)
+
 class GameEngine:
     """Main game engine"""
+
+    # Entity kinds tracked by the spatial hash, in the order collisions are resolved
+    ENTITY_KINDS = ("obstacles", "powerups", "collectibles", "enemies")
+    # Grid cell size in pixels; roughly the size of the larger entities
+    CELL_SIZE = 64
+    # Seconds before an unobstructed projectile disappears
+    PROJECTILE_LIFETIME = 3.0
     
     def __init__(self, width: int = 800, height: int = 600, title: str = "Generated Game"):
         self.width = width
@@ -230,14 +423,25 @@ class GameEngine:
         
         # Game objects
         self.player = None
-        self.enemies: List[Enemy] = []
-        self.powerups: List[Powerup] = []
+        # Enemy state as arrays, updated for all enemies at once
+        self.enemy_store = EnemyStore()
+        # Pools recycle entities that come and go during play
+        self.enemies: EntityPool = EntityPool(partial(Enemy, store=self.enemy_store))
+        self.powerups: EntityPool = EntityPool(Powerup)
         self.obstacles: List[Obstacle] = []
-        self.collectibles: List[Collectible] = []
+        self.collectibles: EntityPool = EntityPool(Collectible)
+        self.projectiles: EntityPool = EntityPool(Projectile)
+        # Broad phase: one uniform grid per entity kind
+        self.spatial_hash: Dict[str, SpatialHash] = {kind: SpatialHash(self.CELL_SIZE) for kind in self.ENTITY_KINDS}
         
         # UI
         self.font = pygame.font.Font(None, 36)
         self.small_font = pygame.font.Font(None, 24)
+        self.text_cache = TextCache()
+        # Dimming layer for the pause, game over and victory screens, created once
+        self.overlay = pygame.Surface((width, height)).convert()
+        self.overlay.set_alpha(128)
+        self.overlay.fill((0, 0, 0))
         
         # Game settings
         self.level_number = 1
@@ -252,6 +456,9 @@ class GameEngine:
         self.powerups.clear()
         self.obstacles.clear()
         self.collectibles.clear()
+        self.projectiles.clear()
+        for grid in self.spatial_hash.values():
+            grid.clear()
         
         # Set level properties
         self.level_number = level_data.get("level_number", 1)
@@ -270,18 +477,16 @@ class GameEngine:
                 obs_data["width"], obs_data["height"],
                 obs_data["type"]
             )
-            self.obstacles.append(obstacle)
+            self.add_entity("obstacles", obstacle)
         
         # Create powerups
         for pow_data in level_data.get("powerups", []):
-            powerup = Powerup(pow_data["x"], pow_data["y"], pow_data["type"])
-            self.powerups.append(powerup)
+            self.spawn_entity("powerups", pow_data["x"], pow_data["y"], pow_data["type"])
         
         # Create enemies
         for enemy_data in level_data.get("enemies", []):
-            enemy = Enemy(enemy_data["x"], enemy_data["y"], enemy_data["type"])
+            enemy = self.spawn_entity("enemies", enemy_data["x"], enemy_data["y"], enemy_data["type"])
             enemy.patrol_path = enemy_data.get("patrol_path", [])
-            self.enemies.append(enemy)
         
         # Create collectibles (coins, gems, etc.)
         objectives = level_data.get("objectives", [])
@@ -291,11 +496,54 @@ class GameEngine:
                 for _ in range(count):
                     x = random.randint(50, self.width - 50)
                     y = random.randint(50, self.height - 50)
-                    collectible = Collectible(x, y, obj["target"])
-                    self.collectibles.append(collectible)
+                    self.spawn_entity("collectibles", x, y, obj["target"])
         
         self.state = GameState.PLAYING
         self.level_complete = False
+
+    def add_entity(self, kind: str, entity: Entity):
+        """
+        Add an entity created elsewhere to its collection ("obstacles", "powerups", "collectibles",
+        "enemies" or "projectiles") and the spatial hash
+        """
+        getattr(self, kind).append(entity)
+        if kind == "enemies":
+            self.enemy_store.adopt(entity)
+        grid = self.spatial_hash.get(kind)
+        if grid is not None:
+            grid.insert(entity)
+
+    def spawn_entity(self, kind: str, *args) -> Entity:
+        """Take an entity of a pooled kind from its pool, reusing a released one when possible"""
+        entity = getattr(self, kind).acquire(*args)
+        grid = self.spatial_hash.get(kind)
+        if grid is not None:
+            grid.insert(entity)
+        return entity
+
+    def remove_entity(self, kind: str, entity: Entity):
+        """Remove an entity; pooled kinds are swap-removed in O(1) and kept for reuse"""
+        entities = getattr(self, kind)
+        if isinstance(entities, EntityPool):
+            entities.release(entity)
+        else:
+            entities.remove(entity)
+        grid = self.spatial_hash.get(kind)
+        if grid is not None:
+            grid.remove(entity)
+
+    def spawn_projectile(self, x: float, y: float, vx: float, vy: float,
+                         owner: str = "player", damage: int = 10) -> Projectile:
+        """Fire a projectile; "player" shots hit enemies, any other owner's shots hit the player"""
+        return self.spawn_entity("projectiles", x, y, vx, vy, owner, damage)
+
+    def query_rect(self, rect: pygame.Rect, kinds: Iterable[str] = ENTITY_KINDS) -> List[Entity]:
+        """Entities of the given kinds whose rect overlaps `rect`"""
+        rect = pygame.Rect(rect)
+        hits: List[Entity] = []
+        for kind in kinds:
+            hits.extend(self.spatial_hash[kind].query(rect))
+        return hits
     
     def handle_events(self):
         """Handle pygame events"""
@@ -327,8 +575,10 @@ class GameEngine:
         self.player.update(dt, keys_pressed, self.width, self.height)
         
         # Update enemies
-        for enemy in self.enemies:
-            enemy.update(dt, self.player)
+        self._update_enemies(dt)
+        
+        # Update projectiles
+        self._update_projectiles(dt)
         
         # Check collisions
         self._check_collisions()
@@ -341,13 +591,52 @@ class GameEngine:
         if current_time - self.start_time > self.time_limit:
             self.state = GameState.GAME_OVER
     
+    def _update_enemies(self, dt: float):
+        """Steer every enemy with vectorized AI, then re-bucket the ones that changed cells"""
+        store = self.enemy_store
+        store.step(dt, self.player.x, self.player.y)
+
+        # Rects are read from the store lazily, so only re-bucketed enemies touch them here
+        views = store.views
+        enemy_grid = self.spatial_hash["enemies"]
+        for index in store.rebucket(self.CELL_SIZE).tolist():
+            enemy_grid.update(views[index])
+    
+    def _update_projectiles(self, dt: float):
+        """Move projectiles and release the ones that hit something, leave the screen or expire"""
+        projectiles = self.projectiles
+        screen_rect = self.screen.get_rect()
+        # Backwards, so a swap-remove only moves projectiles that were already handled
+        for i in range(len(projectiles) - 1, -1, -1):
+            projectile = projectiles[i]
+            projectile.update(dt)
+            spent = (projectile.age > self.PROJECTILE_LIFETIME
+                     or not screen_rect.colliderect(projectile.rect)
+                     or bool(self.spatial_hash["obstacles"].query(projectile.rect)))
+            if not spent and projectile.owner == "player":
+                for enemy in self.spatial_hash["enemies"].query(projectile.rect):
+                    if enemy.active:
+                        self.remove_entity("enemies", enemy)
+                        self.player.add_score(25)
+                        spent = True
+                        break
+            elif not spent and projectile.rect.colliderect(self.player.rect):
+                self.player.take_damage(projectile.damage)
+                if self.player.health <= 0:
+                    self.state = GameState.GAME_OVER
+                spent = True
+            if spent:
+                self.remove_entity("projectiles", projectile)
+    
     def _check_collisions(self):
         """Check all collision events"""
         if not self.player:
             return
         
+        player_rect = self.player.rect
+        
         # Player vs Obstacles
-        for obstacle in self.obstacles:
+        for obstacle in self.spatial_hash["obstacles"].query(player_rect):
             if self.player.collides_with(obstacle):
                 # Simple collision response - push player back
                 overlap_x = min(self.player.rect.right - obstacle.rect.left,
@@ -367,22 +656,22 @@ class GameEngine:
                         self.player.y = obstacle.y + obstacle.height
         
         # Player vs Powerups
-        for powerup in self.powerups[:]:
-            if powerup.active and self.player.collides_with(powerup):
+        for powerup in self.spatial_hash["powerups"].query(player_rect):
+            if powerup.active:
                 powerup.apply_effect(self.player)
                 powerup.active = False
-                self.powerups.remove(powerup)
+                self.remove_entity("powerups", powerup)
         
         # Player vs Collectibles
-        for collectible in self.collectibles[:]:
-            if collectible.active and self.player.collides_with(collectible):
+        for collectible in self.spatial_hash["collectibles"].query(player_rect):
+            if collectible.active:
                 self.player.add_score(collectible.value)
                 collectible.active = False
-                self.collectibles.remove(collectible)
+                self.remove_entity("collectibles", collectible)
         
         # Player vs Enemies
-        for enemy in self.enemies:
-            if enemy.active and self.player.collides_with(enemy):
+        for enemy in self.spatial_hash["enemies"].query(player_rect):
+            if enemy.active:
                 self.player.take_damage(10)
                 if self.player.health <= 0:
                     self.state = GameState.GAME_OVER
@@ -415,11 +704,11 @@ class GameEngine:
     
     def _draw_menu(self):
         """Draw main menu"""
-        title_text = self.font.render("Generated Game", True, (255, 255, 255))
+        title_text = self._text(self.font, "Generated Game", (255, 255, 255))
         title_rect = title_text.get_rect(center=(self.width//2, self.height//2 - 50))
         self.screen.blit(title_text, title_rect)
         
-        start_text = self.small_font.render("Press SPACE to start", True, (255, 255, 255))
+        start_text = self._text(self.small_font, "Press SPACE to start", (255, 255, 255))
         start_rect = start_text.get_rect(center=(self.width//2, self.height//2 + 50))
         self.screen.blit(start_text, start_rect)
     
@@ -444,16 +733,24 @@ class GameEngine:
         for enemy in self.enemies:
             enemy.draw(self.screen)
         
+        # Draw projectiles
+        for projectile in self.projectiles:
+            projectile.draw(self.screen)
+        
         # Draw player
         self.player.draw(self.screen)
         
         # Draw UI
         self._draw_ui()
     
+    def _text(self, font: pygame.font.Font, text: str, color: Tuple[int, int, int]) -> pygame.Surface:
+        """Rendered text, reused from the cache while it is unchanged"""
+        return self.text_cache.render(font, text, color)
+    
     def _draw_ui(self):
         """Draw user interface"""
         # Score
-        score_text = self.small_font.render(f"Score: {self.player.score}", True, (255, 255, 255))
+        score_text = self._text(self.small_font, f"Score: {self.player.score}", (255, 255, 255))
         self.screen.blit(score_text, (10, 10))
         
         # Health bar
@@ -471,63 +768,54 @@ class GameEngine:
         # Time remaining
         current_time = pygame.time.get_ticks() / 1000.0
         time_remaining = max(0, self.time_limit - (current_time - self.start_time))
-        time_text = self.small_font.render(f"Time: {int(time_remaining)}", True, (255, 255, 255))
+        time_text = self._text(self.small_font, f"Time: {int(time_remaining)}", (255, 255, 255))
         self.screen.blit(time_text, (10, 70))
         
         # Level
-        level_text = self.small_font.render(f"Level: {self.level_number}", True, (255, 255, 255))
+        level_text = self._text(self.small_font, f"Level: {self.level_number}", (255, 255, 255))
         self.screen.blit(level_text, (10, 100))
     
     def _draw_pause_overlay(self):
         """Draw pause overlay"""
-        overlay = pygame.Surface((self.width, self.height))
-        overlay.set_alpha(128)
-        overlay.fill((0, 0, 0))
-        self.screen.blit(overlay, (0, 0))
+        self.screen.blit(self.overlay, (0, 0))
         
-        pause_text = self.font.render("PAUSED", True, (255, 255, 255))
+        pause_text = self._text(self.font, "PAUSED", (255, 255, 255))
         pause_rect = pause_text.get_rect(center=(self.width//2, self.height//2))
         self.screen.blit(pause_text, pause_rect)
         
-        resume_text = self.small_font.render("Press ESC to resume", True, (255, 255, 255))
+        resume_text = self._text(self.small_font, "Press ESC to resume", (255, 255, 255))
         resume_rect = resume_text.get_rect(center=(self.width//2, self.height//2 + 40))
         self.screen.blit(resume_text, resume_rect)
     
     def _draw_game_over(self):
         """Draw game over screen"""
-        overlay = pygame.Surface((self.width, self.height))
-        overlay.set_alpha(128)
-        overlay.fill((0, 0, 0))
-        self.screen.blit(overlay, (0, 0))
+        self.screen.blit(self.overlay, (0, 0))
         
-        game_over_text = self.font.render("GAME OVER", True, (255, 0, 0))
+        game_over_text = self._text(self.font, "GAME OVER", (255, 0, 0))
         game_over_rect = game_over_text.get_rect(center=(self.width//2, self.height//2 - 20))
         self.screen.blit(game_over_text, game_over_rect)
         
-        score_text = self.small_font.render(f"Final Score: {self.player.score}", True, (255, 255, 255))
+        score_text = self._text(self.small_font, f"Final Score: {self.player.score}", (255, 255, 255))
         score_rect = score_text.get_rect(center=(self.width//2, self.height//2 + 20))
         self.screen.blit(score_text, score_rect)
         
-        restart_text = self.small_font.render("Press R to restart", True, (255, 255, 255))
+        restart_text = self._text(self.small_font, "Press R to restart", (255, 255, 255))
         restart_rect = restart_text.get_rect(center=(self.width//2, self.height//2 + 60))
         self.screen.blit(restart_text, restart_rect)
     
     def _draw_victory(self):
         """Draw victory screen"""
-        overlay = pygame.Surface((self.width, self.height))
-        overlay.set_alpha(128)
-        overlay.fill((0, 0, 0))
-        self.screen.blit(overlay, (0, 0))
+        self.screen.blit(self.overlay, (0, 0))
         
-        victory_text = self.font.render("LEVEL COMPLETE!", True, (0, 255, 0))
+        victory_text = self._text(self.font, "LEVEL COMPLETE!", (0, 255, 0))
         victory_rect = victory_text.get_rect(center=(self.width//2, self.height//2 - 20))
         self.screen.blit(victory_text, victory_rect)
         
-        score_text = self.small_font.render(f"Score: {self.player.score}", True, (255, 255, 255))
+        score_text = self._text(self.small_font, f"Score: {self.player.score}", (255, 255, 255))
         score_rect = score_text.get_rect(center=(self.width//2, self.height//2 + 20))
         self.screen.blit(score_text, score_rect)
         
-        next_text = self.small_font.render("Press R for next level", True, (255, 255, 255))
+        next_text = self._text(self.small_font, "Press R for next level", (255, 255, 255))
         next_rect = next_text.get_rect(center=(self.width//2, self.height//2 + 60))
         self.screen.blit(next_text, next_rect)
     
@@ -0,0 +1,102 @@
+"""
+Spatial Hash for the Game Engine
+Uniform-grid broad phase so collision queries only look at entities in nearby cells
+"""
+
+import pygame
+from typing import Dict, Iterable, List, Set, Tuple
+
+CellRange = Tuple[int, int, int, int]
+
+
+class SpatialHash:
+    """Buckets entities by the grid cells their rect overlaps"""
+
+    def __init__(self, cell_size: int = 64):
+        self.cell_size = cell_size
+        self._cells: Dict[Tuple[int, int], Set[object]] = {}
+        self._ranges: Dict[object, CellRange] = {}
+        # Insertion order, so query results come back in a stable order
+        self._order: Dict[object, int] = {}
+        self._counter = 0
+
+    def __len__(self) -> int:
+        return len(self._ranges)
+
+    def __contains__(self, entity) -> bool:
+        return entity in self._ranges
+
+    def _cell_range(self, rect: pygame.Rect) -> CellRange:
+        size = self.cell_size
+        # A zero-size rect still occupies the cell it sits in
+        return (rect.left // size, rect.top // size,
+                (rect.right - 1) // size if rect.width else rect.left // size,
+                (rect.bottom - 1) // size if rect.height else rect.top // size)
+
+    def _cells_in(self, cell_range: CellRange) -> Iterable[Tuple[int, int]]:
+        x0, y0, x1, y1 = cell_range
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                yield cx, cy
+
+    def insert(self, entity):
+        """Add an entity using its current rect"""
+        if entity in self._ranges:
+            self.update(entity)
+            return
+        cell_range = self._cell_range(entity.rect)
+        for cell in self._cells_in(cell_range):
+            self._cells.setdefault(cell, set()).add(entity)
+        self._ranges[entity] = cell_range
+        self._order[entity] = self._counter
+        self._counter += 1
+
+    def remove(self, entity):
+        cell_range = self._ranges.pop(entity, None)
+        if cell_range is None:
+            return
+        del self._order[entity]
+        for cell in self._cells_in(cell_range):
+            bucket = self._cells.get(cell)
+            if bucket is not None:
+                bucket.discard(entity)
+                if not bucket:
+                    del self._cells[cell]
+
+    def update(self, entity):
+        """Re-bucket a moved entity; nothing changes while it stays within the same cells"""
+        old_range = self._ranges.get(entity)
+        if old_range is None:
+            self.insert(entity)
+            return
+        new_range = self._cell_range(entity.rect)
+        if new_range == old_range:
+            return
+        for cell in self._cells_in(old_range):
+            bucket = self._cells[cell]
+            bucket.discard(entity)
+            if not bucket:
+                del self._cells[cell]
+        for cell in self._cells_in(new_range):
+            self._cells.setdefault(cell, set()).add(entity)
+        self._ranges[entity] = new_range
+
+    def clear(self):
+        self._cells.clear()
+        self._ranges.clear()
+        self._order.clear()
+
+    def candidates(self, rect: pygame.Rect) -> Set[object]:
+        """Entities in the cells the rect overlaps (they may not actually collide)"""
+        found: Set[object] = set()
+        for cell in self._cells_in(self._cell_range(rect)):
+            bucket = self._cells.get(cell)
+            if bucket:
+                found.update(bucket)
+        return found
+
+    def query(self, rect: pygame.Rect) -> List[object]:
+        """Entities whose rect overlaps the given rect, in insertion order"""
+        hits = [entity for entity in self.candidates(rect) if rect.colliderect(entity.rect)]
+        hits.sort(key=self._order.__getitem__)
+        return hits
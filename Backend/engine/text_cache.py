@@ -0,0 +1,39 @@
+"""
+Text Cache for the Game Engine
+LRU cache of rendered text surfaces, so HUD and menu text is only rendered again when it changes
+"""
+
+import pygame
+from collections import OrderedDict
+from typing import Tuple
+
+
+class TextCache:
+    """Rendered surfaces keyed by (font, text, color); the least recently used ones are evicted first"""
+
+    def __init__(self, max_size: int = 256):
+        self.max_size = max_size
+        self._surfaces: "OrderedDict[tuple, pygame.Surface]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._surfaces)
+
+    def render(self, font: pygame.font.Font, text: str, color: Tuple[int, int, int]) -> pygame.Surface:
+        """Antialiased text surface; callers must not draw onto it, since it is shared"""
+        key = (font, text, color)
+        surface = self._surfaces.get(key)
+        if surface is not None:
+            self._surfaces.move_to_end(key)
+            self.hits += 1
+            return surface
+        self.misses += 1
+        surface = font.render(text, True, color)
+        self._surfaces[key] = surface
+        if len(self._surfaces) > self.max_size:
+            self._surfaces.popitem(last=False)
+        return surface
+
+    def clear(self):
+        self._surfaces.clear()
@@ -0,0 +1,167 @@
+"""
+Async Gemini API Integration for Game Generation
+Awaitable variant of GeminiGameGenerator that does not hold a thread during LLM round trips
+"""
+
+import asyncio
+import weakref
+from typing import Awaitable, Callable, Dict, List, Any, Optional
+import logging
+
+from config import config
+from generators.gemini_generator import GeminiGameGenerator
+from generators.model_backends import ModelBackend
+from generators.structured_output import (
+    parse_asset_selection, parse_game_concept, parse_level_design, parse_template_plan
+)
+from generators.code_stream import BrokenCodeError, StreamingCodeAssembler, assemble_code, chunk_text
+from generators.call_policy import aiter_with_deadline
+from generators.prompt_builder import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# One semaphore per event loop, shared by every async generator on that loop
+_loop_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+
+def _get_loop_semaphore(max_concurrency: int) -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    semaphore = _loop_semaphores.get(loop)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(max_concurrency)
+        _loop_semaphores[loop] = semaphore
+    return semaphore
+
+
+class AsyncGeminiGameGenerator(GeminiGameGenerator):
+    """Async interface to Gemini; every generate_* method is a coroutine"""
+
+    def __init__(self, api_key: Optional[str] = None, max_concurrency: Optional[int] = None, use_cache: bool = True,
+                 backend: Optional[ModelBackend] = None):
+        super().__init__(api_key, use_cache, backend)
+        self.max_concurrency = max_concurrency or int(config.get("gemini.max_concurrency", 8))
+
+    async def _generate_text_async(self, model, prompt: str) -> str:
+        """Single entry point for async model calls, bounded by the shared concurrency semaphore"""
+        async with _get_loop_semaphore(self.max_concurrency):
+            response = await asyncio.wait_for(model.generate_content_async(prompt), self.call_policy.timeout)
+        text = response.text.strip()
+        self._record_usage(text)
+        return text
+
+    def _quota_async(self, model, prompt: str) -> Optional[Callable[[], Awaitable[None]]]:
+        """Async counterpart of _quota"""
+        if not self.rate_limiter:
+            return None
+        tokens, priority = estimate_tokens(prompt), self._priority(model)
+        return lambda: self.rate_limiter.acquire_async(tokens, priority)
+
+    async def _generate_async(self, model, prompt: str, parse: Optional[Callable[[str], Any]] = None,
+                              cacheable: bool = True) -> Any:
+        """Cached async model call; shares the response cache with the sync generator"""
+        key = self._cache_key(model, prompt, cacheable)
+        if key:
+            cached = self.response_cache.get(key)
+            if cached is not None:
+                try:
+                    return parse(cached) if parse else cached
+                except Exception as e:
+                    logger.warning(f"Ignoring unparsable cached response: {e}")
+
+        async def attempt():
+            text = await self._generate_text_async(model, prompt)
+            return text, parse(text) if parse else text
+
+        text, result = await self.call_policy.run_async(self._model_name(model), attempt,
+                                                        acquire=self._quota_async(model, prompt))
+        if key:
+            self.response_cache.put(key, self._model_name(model), text)
+        return result
+
+    async def _stream_code_async(self, model, prompt: str) -> str:
+        """Streams a code completion, aborting as soon as a finished block fails to parse"""
+        assembler = StreamingCodeAssembler()
+        timeout = self.call_policy.timeout
+        async with _get_loop_semaphore(self.max_concurrency):
+            try:
+                response = await asyncio.wait_for(model.generate_content_async(prompt, stream=True), timeout)
+                async for chunk in aiter_with_deadline(response, timeout):
+                    assembler.feed(chunk_text(chunk))
+            finally:
+                self._record_usage(assembler.text)
+        assembler.finish()
+        return assembler.text.strip()
+
+    async def _generate_code_async(self, model, prompt: str) -> str:
+        """Async counterpart of _generate_code"""
+        if not config.get("gemini.stream_code", True):
+            return await self._generate_async(model, prompt, self._strip_code_fences)
+
+        key = self._cache_key(model, prompt)
+        if key:
+            cached = self.response_cache.get(key)
+            if cached is not None:
+                try:
+                    return assemble_code(cached)
+                except BrokenCodeError as e:
+                    logger.warning(f"Ignoring cached code that does not parse: {e}")
+
+        text = await self.call_policy.run_async(
+            self._model_name(model), lambda: self._stream_code_async(model, prompt),
+            bad_output_retries=int(config.get("gemini.code_stream_retries", 1)),
+            acquire=self._quota_async(model, prompt)
+        )
+        if key:
+            self.response_cache.put(key, self._model_name(model), text)
+        return assemble_code(text)
+
+    async def generate_template_plan(self, game_concept: Dict[str, Any]) -> List[str]:
+        """Analyzes the game concept and selects the necessary templates."""
+        prompt = self._template_plan_prompt(game_concept)
+        try:
+            return await self._generate_async(self.planning_model, prompt, parse_template_plan)
+        except Exception as e:
+            logger.error(f"Error generating template plan: {e}")
+            return self.ALWAYS_SELECTED_TEMPLATES + ["B_MOVEMENT_TOPDOWN"]
+
+    async def generate_game_concept(self, theme: str = None) -> Dict[str, Any]:
+        """Generate a complete game concept using Gemini with a random seed."""
+        prompt = self._game_concept_prompt(theme)
+        try:
+            return await self._generate_async(self.planning_model, prompt, parse_game_concept, cacheable=False)
+        except Exception as e:
+            logger.error(f"Error generating game concept: {e}")
+            return self._get_fallback_concept(theme)
+
+    async def generate_level_design(self, game_concept: Dict[str, Any], level_number: int = 1) -> Dict[str, Any]:
+        """Generate specific level design based on game concept"""
+        prompt = self._level_design_prompt(game_concept, level_number)
+        try:
+            level_design = await self._generate_async(self.planning_model, prompt, parse_level_design)
+            logger.info(f"Generated level design for level {level_number}")
+            return level_design
+        except Exception as e:
+            logger.error(f"Error generating level design: {e}")
+            return self._get_fallback_level(level_number)
+
+    async def generate_game_code(self, game_concept: Dict[str, Any], level_design: Dict[str, Any], stitched_template: str) -> str:
+        """Generate pygame code by filling in the unique logic for the template."""
+        prompt = self._game_code_prompt(game_concept, level_design, stitched_template)
+        try:
+            code = await self._generate_code_async(self.coding_model, prompt)
+            logger.info("Generated game code")
+            return code
+        except Exception as e:
+            logger.error(f"Error generating game code: {e}")
+            return self._get_fallback_code()
+
+    async def generate_asset_descriptions(self, game_concept: Dict[str, Any], sprite_manifest: List[str]) -> Dict[str, str]:
+        """Generate descriptions AND select sprites for game assets."""
+        prompt = self._asset_descriptions_prompt(game_concept, sprite_manifest)
+        try:
+            assets = await self._generate_async(self.planning_model, prompt, parse_asset_selection)
+            logger.info("Generated asset selections")
+            return assets
+        except Exception as e:
+            logger.error(f"Error generating asset selections: {e}")
+            return self._get_fallback_assets()
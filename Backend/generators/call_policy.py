@@ -0,0 +1,301 @@
+"""
+Gemini Call Policy
+Classifies API errors and wraps model calls in per-call deadlines, jittered exponential backoff and a circuit breaker
+"""
+
+import time
+import random
+import asyncio
+import threading
+import concurrent.futures
+from typing import AsyncIterator, Awaitable, Callable, Dict, Iterator, Optional, TypeVar
+import logging
+
+from config import config
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Error classes
+RATE_LIMIT = "rate_limit"
+TIMEOUT = "timeout"
+SERVER_ERROR = "server_error"
+BAD_OUTPUT = "bad_output"
+FATAL = "fatal"
+
+# Failures that say the upstream is unhealthy; only these trip the circuit breaker
+UPSTREAM_FAILURES = {RATE_LIMIT, TIMEOUT, SERVER_ERROR}
+
+_RATE_LIMIT_NAMES = {"ResourceExhausted", "TooManyRequests"}
+_TIMEOUT_NAMES = {"DeadlineExceeded", "GatewayTimeout"}
+_SERVER_ERROR_NAMES = {"ServiceUnavailable", "InternalServerError", "BadGateway", "Aborted", "Unknown"}
+
+
+class CallTimeout(TimeoutError):
+    """A model call missed its deadline"""
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised without calling the API while the circuit breaker is open"""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"Gemini circuit for {name} is open, retry in {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+def classify_error(exc: BaseException) -> str:
+    """Map an exception from a model call to one of the error classes above"""
+    if isinstance(exc, CircuitOpenError):
+        return FATAL
+    if isinstance(exc, (TimeoutError, asyncio.TimeoutError, concurrent.futures.TimeoutError)):
+        return TIMEOUT
+    name = type(exc).__name__
+    # google.api_core exceptions carry the HTTP status in `code`
+    code = getattr(exc, 'code', None)
+    code = code if isinstance(code, int) else None
+    if code == 429 or name in _RATE_LIMIT_NAMES:
+        return RATE_LIMIT
+    if code == 504 or name in _TIMEOUT_NAMES:
+        return TIMEOUT
+    if (code is not None and code >= 500) or name in _SERVER_ERROR_NAMES or isinstance(exc, ConnectionError):
+        return SERVER_ERROR
+    # Unparsable JSON, schema mismatches, broken code and blocked responses all surface as ValueError
+    if isinstance(exc, ValueError):
+        return BAD_OUTPUT
+    return FATAL
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive upstream failures and rejects calls until
+    `reset_timeout` has passed; then a single probe call decides whether it closes again.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at >= self.reset_timeout:
+                return "half_open"
+            return "open"
+
+    def before_call(self) -> bool:
+        """Raise CircuitOpenError unless a call may go through; True when the call is the half-open probe"""
+        with self._lock:
+            if self._opened_at is None:
+                return False
+            remaining = self.reset_timeout - (time.monotonic() - self._opened_at)
+            if remaining > 0 or self._probing:
+                raise CircuitOpenError(self.name, max(remaining, 1.0))
+            self._probing = True
+            return True
+
+    def release_probe(self):
+        """Give up a probe whose call never completed (e.g. it was cancelled), so a later call can probe"""
+        with self._lock:
+            self._probing = False
+
+    def record(self, error_class: Optional[str]):
+        """Outcome of a call that went through: None on success, else its error class"""
+        with self._lock:
+            self._probing = False
+            if error_class not in UPSTREAM_FAILURES:
+                # The API answered (even if the output was unusable); it is healthy
+                if self._opened_at is not None:
+                    logger.info(f"Gemini circuit for {self.name} closed")
+                self._failures = 0
+                self._opened_at = None
+                return
+            self._failures += 1
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                if self._opened_at is None:
+                    logger.warning(f"Gemini circuit for {self.name} opened after {self._failures} failures")
+                self._opened_at = time.monotonic()
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(name: str) -> CircuitBreaker:
+    """Process-wide breaker per model, shared by every generator and job"""
+    with _breakers_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = CircuitBreaker(
+                name,
+                failure_threshold=int(config.get("gemini.circuit_failure_threshold", 5)),
+                reset_timeout=float(config.get("gemini.circuit_reset_seconds", 30)),
+            )
+            _breakers[name] = breaker
+        return breaker
+
+
+def call_with_deadline(fn: Callable[[], T], timeout: float) -> T:
+    """
+    Run a blocking call on its own daemon thread and stop waiting for it after `timeout` seconds.
+    The SDK has no request timeout, so an overdue call is abandoned to finish in the background.
+    A thread per call means the deadline never includes time queued behind other (possibly hung)
+    calls, and abandoned calls cannot use up a shared pool.
+    """
+    future: concurrent.futures.Future = concurrent.futures.Future()
+
+    def run():
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(fn())
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=run, name="gemini-call", daemon=True).start()
+    try:
+        return future.result(timeout)
+    except concurrent.futures.TimeoutError:
+        raise CallTimeout(f"Gemini call exceeded its {timeout:g}s deadline")
+
+
+def iter_with_deadline(iterator: Iterator[T], timeout: float) -> Iterator[T]:
+    """Items of a streamed response; each chunk must arrive within `timeout` seconds"""
+    iterator = iter(iterator)
+    done = object()
+    while True:
+        item = call_with_deadline(lambda: next(iterator, done), timeout)
+        if item is done:
+            return
+        yield item
+
+
+async def aiter_with_deadline(iterator: AsyncIterator[T], timeout: float) -> AsyncIterator[T]:
+    """Async counterpart of iter_with_deadline"""
+    iterator = iterator.__aiter__()
+    while True:
+        try:
+            item = await asyncio.wait_for(iterator.__anext__(), timeout)
+        except StopAsyncIteration:
+            return
+        except asyncio.TimeoutError:
+            raise CallTimeout(f"Gemini stream stalled for {timeout:g}s")
+        yield item
+
+
+class CallPolicy:
+    """Retries classified failures with jittered exponential backoff behind a per-model circuit breaker"""
+
+    def __init__(self, timeout: float = 30.0, max_retries: int = 3, base_delay: float = 1.0,
+                 max_delay: float = 20.0, bad_output_retries: int = 1):
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.bad_output_retries = bad_output_retries
+
+    @classmethod
+    def from_config(cls) -> 'CallPolicy':
+        return cls(
+            timeout=float(config.get("gemini.timeout", 30)),
+            max_retries=int(config.get("gemini.max_retries", 3)),
+            base_delay=float(config.get("gemini.retry_base_delay", 1.0)),
+            max_delay=float(config.get("gemini.retry_max_delay", 20.0)),
+            bad_output_retries=int(config.get("gemini.bad_output_retries", 1)),
+        )
+
+    def backoff(self, retry: int, error_class: str) -> float:
+        """Full-jitter exponential delay before the given retry (1-based)"""
+        if error_class == BAD_OUTPUT:
+            return 0.0
+        base = self.base_delay * (4 if error_class == RATE_LIMIT else 1)
+        return random.uniform(0, min(self.max_delay, base * 2 ** (retry - 1)))
+
+    def _next_delay(self, name: str, error: Exception, error_class: str, retries: Dict[str, int],
+                    bad_output_retries: int) -> Optional[float]:
+        """Delay before retrying, or None when the error is final"""
+        if error_class == BAD_OUTPUT:
+            budget = bad_output_retries
+        elif error_class in UPSTREAM_FAILURES:
+            budget = self.max_retries
+        else:
+            return None
+        retries[error_class] = retries.get(error_class, 0) + 1
+        if retries[error_class] > budget:
+            return None
+        delay = self.backoff(retries[error_class], error_class)
+        logger.warning(f"Gemini call to {name} failed ({error_class}: {error}); "
+                       f"retry {retries[error_class]}/{budget} in {delay:.1f}s")
+        return delay
+
+    def run(self, name: str, call: Callable[[], T], bad_output_retries: Optional[int] = None,
+            acquire: Optional[Callable[[], None]] = None) -> T:
+        """
+        Run a blocking call under the policy; the last error is raised once retries are exhausted.
+        `acquire` runs before every attempt (e.g. to take rate-limit quota) and its errors are not retried
+        or counted by the breaker.
+        """
+        breaker = get_circuit_breaker(name)
+        bad_output_retries = self.bad_output_retries if bad_output_retries is None else bad_output_retries
+        retries: Dict[str, int] = {}
+        while True:
+            probe = breaker.before_call()
+            recorded = False
+            try:
+                if acquire:
+                    acquire()
+                try:
+                    result = call()
+                except Exception as e:
+                    error_class = classify_error(e)
+                    breaker.record(error_class)
+                    recorded = True
+                    delay = self._next_delay(name, e, error_class, retries, bad_output_retries)
+                    if delay is None:
+                        raise
+                else:
+                    breaker.record(None)
+                    recorded = True
+                    return result
+            finally:
+                if probe and not recorded:
+                    breaker.release_probe()
+            time.sleep(delay)
+
+    async def run_async(self, name: str, call: Callable[[], Awaitable[T]], bad_output_retries: Optional[int] = None,
+                        acquire: Optional[Callable[[], Awaitable[None]]] = None) -> T:
+        """Async counterpart of run; backoff sleeps do not hold a thread"""
+        breaker = get_circuit_breaker(name)
+        bad_output_retries = self.bad_output_retries if bad_output_retries is None else bad_output_retries
+        retries: Dict[str, int] = {}
+        while True:
+            probe = breaker.before_call()
+            recorded = False
+            try:
+                if acquire:
+                    await acquire()
+                try:
+                    result = await call()
+                except Exception as e:
+                    error_class = classify_error(e)
+                    breaker.record(error_class)
+                    recorded = True
+                    delay = self._next_delay(name, e, error_class, retries, bad_output_retries)
+                    if delay is None:
+                        raise
+                else:
+                    breaker.record(None)
+                    recorded = True
+                    return result
+            finally:
+                # CancelledError is not an Exception and skips record(); the probe must not stay taken
+                if probe and not recorded:
+                    breaker.release_probe()
+            await asyncio.sleep(delay)
@@ -0,0 +1,101 @@
+"""
+Streaming Code Assembly
+Builds generated game code from streamed response chunks and syntax-checks each complete top-level block
+"""
+
+import ast
+import re
+from typing import Optional
+
+# A line at column 0 that starts a new top-level statement (not a continuation clause or closing bracket)
+_CONTINUATION = re.compile(r"^(else|elif|except|finally|case)\b|^[)\]}]|^#")
+_FENCE = re.compile(r"^```[\w+-]*\s*$")
+
+# SyntaxError messages that only mean "the block is not finished yet"
+_INCOMPLETE_MESSAGES = (
+    "was never closed",
+    "unexpected EOF",
+    "unterminated triple-quoted",
+    "expected an indented block",
+    "EOF while scanning",
+    "EOF in multi-line",
+)
+
+
+class BrokenCodeError(ValueError):
+    """Raised when streamed code contains a syntax error that more output cannot fix"""
+
+
+def chunk_text(chunk) -> str:
+    """Text of a streamed response chunk; chunks without text parts (e.g. the final one) yield nothing"""
+    try:
+        return chunk.text or ""
+    except ValueError:
+        return ""
+
+
+def assemble_code(text: str) -> str:
+    """Validated code from a complete (non-streamed) response"""
+    assembler = StreamingCodeAssembler()
+    assembler.text = text
+    return assembler.finish()
+
+
+class StreamingCodeAssembler:
+    """Accumulates streamed text, strips the markdown fence and validates code as it arrives"""
+
+    def __init__(self):
+        self.text = ""
+        self._checked_upto = 0
+
+    @property
+    def code(self) -> str:
+        """The code inside the markdown block (or the whole text when there is no fence)"""
+        lines = self.text.split("\n")
+        start = next((i for i, line in enumerate(lines) if line.strip()), len(lines))
+        if start < len(lines) and _FENCE.match(lines[start].strip()):
+            start += 1
+            end = next((i for i in range(start, len(lines)) if lines[i].strip() == "```"), len(lines))
+            return "\n".join(lines[start:end])
+        return "\n".join(lines)
+
+    def feed(self, chunk: str):
+        """Add a chunk; raises BrokenCodeError as soon as a finished block fails to parse"""
+        self.text += chunk
+        prefix = self._complete_prefix()
+        if prefix is not None and len(prefix) > self._checked_upto:
+            self._check(prefix, final=False)
+            self._checked_upto = len(prefix)
+
+    def finish(self) -> str:
+        """Validate the whole program once the stream has ended and return it"""
+        code = self.code
+        self._check(code, final=True)
+        return code
+
+    def _complete_prefix(self) -> Optional[str]:
+        """Code up to the start of the last top-level statement, which may still be streaming"""
+        code = self.code
+        lines = code.split("\n")[:-1]  # the last line may be partial
+        boundary = None
+        previous = ""
+        for i, line in enumerate(lines):
+            # Decorators belong to the statement below them
+            if i > 0 and line and not line[0].isspace() and not _CONTINUATION.match(line) \
+                    and not previous.startswith("@"):
+                boundary = i
+            if line.strip():
+                previous = line
+        if boundary is None:
+            return None
+        return "\n".join(lines[:boundary]) + "\n"
+
+    @staticmethod
+    def _check(code: str, final: bool):
+        try:
+            ast.parse(code)
+        except SyntaxError as e:
+            message = str(e.msg)
+            if not final and any(fragment in message for fragment in _INCOMPLETE_MESSAGES):
+                return
+            raise BrokenCodeError(f"Generated code has a syntax error at line {e.lineno}: {message}")
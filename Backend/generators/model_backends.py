@@ -0,0 +1,304 @@
+"""
+Model Backends for the Gemini Generator
+Live, recording and replay backends so the pipeline can run and be benchmarked without the Gemini API
+"""
+
+import os
+import re
+import json
+import time
+import random
+import asyncio
+import hashlib
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Any, Dict, Optional
+import logging
+
+from config import config
+from generators.code_stream import chunk_text
+
+logger = logging.getLogger(__name__)
+
+# The concept prompt carries a random seed; it is ignored when matching recordings
+_SEED_PATTERN = re.compile(r"INTERNAL VARIATION SEED: \d+")
+
+
+def recording_key(model_name: str, prompt: str) -> str:
+    """Stable identifier of a model call used to name recording files"""
+    normalized = _SEED_PATTERN.sub("INTERNAL VARIATION SEED: 0", prompt)
+    return hashlib.sha256(f"{model_name}\n{normalized}".encode('utf-8')).hexdigest()
+
+
+class ModelResponse:
+    """Minimal stand-in for the SDK response object"""
+
+    def __init__(self, text: str):
+        self.text = text
+
+
+class ModelBackend(ABC):
+    """Provides model handles with the SDK's generate_content / generate_content_async interface"""
+
+    @abstractmethod
+    def model(self, model_name: str, json_output: bool = False):
+        """Model handle for the given model name, asking for JSON output when json_output is set"""
+
+
+class GeminiBackend(ModelBackend):
+    """Talks to the live Gemini API"""
+
+    def __init__(self, api_key: str):
+        self.api_key = api_key
+
+    def model(self, model_name: str, json_output: bool = False):
+        from generators.gemini_generator import get_shared_model
+        return get_shared_model(self.api_key, model_name, json_output)
+
+
+class RecordingModel:
+    """Wraps a live model and saves every response it returns"""
+
+    def __init__(self, model, backend: 'RecordingBackend'):
+        self._model = model
+        self._backend = backend
+        self.model_name = getattr(model, 'model_name', str(model))
+        self._generation_config = getattr(model, '_generation_config', None)
+
+    def generate_content(self, prompt: str, **kwargs):
+        response = self._model.generate_content(prompt, **kwargs)
+        if kwargs.get('stream'):
+            return self._record_stream(prompt, response)
+        self._backend.record(self.model_name, prompt, response.text)
+        return response
+
+    async def generate_content_async(self, prompt: str, **kwargs):
+        response = await self._model.generate_content_async(prompt, **kwargs)
+        if kwargs.get('stream'):
+            return self._record_stream_async(prompt, response)
+        self._backend.record(self.model_name, prompt, response.text)
+        return response
+
+    def _record_stream(self, prompt: str, chunks):
+        """Pass chunks through and record the full text once the stream completes (aborted streams are not recorded)"""
+        parts = []
+        for chunk in chunks:
+            parts.append(chunk_text(chunk))
+            yield chunk
+        self._backend.record(self.model_name, prompt, "".join(parts).strip())
+
+    async def _record_stream_async(self, prompt: str, chunks):
+        parts = []
+        async for chunk in chunks:
+            parts.append(chunk_text(chunk))
+            yield chunk
+        self._backend.record(self.model_name, prompt, "".join(parts).strip())
+
+
+class RecordingBackend(ModelBackend):
+    """Live backend that also captures responses to disk for later replay"""
+
+    def __init__(self, inner: ModelBackend, recordings_dir: str):
+        self.inner = inner
+        self.recordings_dir = recordings_dir
+        os.makedirs(recordings_dir, exist_ok=True)
+
+    def model(self, model_name: str, json_output: bool = False):
+        return RecordingModel(self.inner.model(model_name, json_output), self)
+
+    def record(self, model_name: str, prompt: str, text: str):
+        path = os.path.join(self.recordings_dir, f"{recording_key(model_name, prompt)}.json")
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({
+                "model": model_name,
+                "prompt": prompt,
+                "response": text,
+                "recorded_at": datetime.now().isoformat()
+            }, f, indent=2)
+
+
+class ReplayModel:
+    """Model handle that serves recorded or synthesized responses"""
+
+    def __init__(self, model_name: str, backend: 'ReplayBackend'):
+        self.model_name = f"models/{model_name}"
+        self._generation_config = None
+        self._backend = backend
+
+    # Characters per streamed chunk; the injected latency is spread evenly across chunks
+    STREAM_CHUNK_SIZE = 256
+
+    def generate_content(self, prompt: str, **kwargs):
+        if kwargs.get('stream'):
+            return self._stream(prompt)
+        time.sleep(self._backend.sample_latency())
+        return ModelResponse(self._backend.respond(self.model_name, prompt))
+
+    async def generate_content_async(self, prompt: str, **kwargs):
+        if kwargs.get('stream'):
+            return self._stream_async(prompt)
+        await asyncio.sleep(self._backend.sample_latency())
+        return ModelResponse(self._backend.respond(self.model_name, prompt))
+
+    def _chunks(self, prompt: str):
+        text = self._backend.respond(self.model_name, prompt)
+        chunks = [text[i:i + self.STREAM_CHUNK_SIZE] for i in range(0, len(text), self.STREAM_CHUNK_SIZE)] or [""]
+        return chunks, self._backend.sample_latency() / len(chunks)
+
+    def _stream(self, prompt: str):
+        chunks, delay = self._chunks(prompt)
+        for chunk in chunks:
+            time.sleep(delay)
+            yield ModelResponse(chunk)
+
+    async def _stream_async(self, prompt: str):
+        chunks, delay = self._chunks(prompt)
+        for chunk in chunks:
+            await asyncio.sleep(delay)
+            yield ModelResponse(chunk)
+
+
+class ReplayBackend(ModelBackend):
+    """Offline backend: replays recordings and synthesizes fixtures for unrecorded prompts"""
+
+    def __init__(self, recordings_dir: Optional[str] = None, latency: float = 0.0, jitter: float = 0.0,
+                 synthesize_missing: bool = True):
+        self.recordings_dir = recordings_dir
+        self.latency = latency
+        self.jitter = jitter
+        self.synthesize_missing = synthesize_missing
+
+    def model(self, model_name: str, json_output: bool = False):
+        return ReplayModel(model_name, self)
+
+    def sample_latency(self) -> float:
+        """Injected latency for one call, in seconds"""
+        return max(0.0, self.latency + random.uniform(-self.jitter, self.jitter))
+
+    def respond(self, model_name: str, prompt: str) -> str:
+        if self.recordings_dir:
+            path = os.path.join(self.recordings_dir, f"{recording_key(model_name, prompt)}.json")
+            if os.path.exists(path):
+                with open(path, 'r', encoding='utf-8') as f:
+                    return json.load(f)["response"]
+        if not self.synthesize_missing:
+            raise LookupError(f"No recording for {model_name} prompt in {self.recordings_dir}")
+        return synthesize_response(prompt)
+
+
+def synthesize_response(prompt: str) -> str:
+    """Plausible fixture response for each prompt the generator sends"""
+    if "build system architect" in prompt:
+        genre = re.search(r"Game Genre: (.*)", prompt)
+        platformer = genre and "platform" in genre.group(1).lower()
+        movement = "C_MOVEMENT_PLATFORMER" if platformer else "B_MOVEMENT_TOPDOWN"
+        return json.dumps(["A_CORE_SETUP", movement, "D_HEALTH_DAMAGE", "E_BASIC_COLLISION",
+                           "F_GAME_STATES", "G_ASSET_PATH_HANDLER"])
+    if "Pygame coder" in prompt:
+        return f"```python\n{_STUB_GAME_CODE}```"
+    if "SPRITE LIBRARY" in prompt:
+        return json.dumps(_STUB_ASSETS, indent=2)
+    match = re.search(r"design level (\d+)", prompt)
+    if match:
+        return json.dumps(dict(_STUB_LEVEL, level_number=int(match.group(1))), indent=2)
+    theme = re.search(r"Theme: (.*)", prompt)
+    return json.dumps(dict(_STUB_CONCEPT, theme=theme.group(1).strip() if theme else "fantasy"), indent=2)
+
+
+def create_model_backend(api_key: Optional[str]) -> ModelBackend:
+    """Build the backend selected by gemini.backend: "live", "record" or "replay" """
+    gemini_config = config.get("gemini", {})
+    backend = gemini_config.get("backend", "live")
+    recordings_dir = gemini_config.get("recordings_dir", "data/recordings")
+    if not os.path.isabs(recordings_dir):
+        backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        recordings_dir = os.path.join(backend_dir, recordings_dir)
+
+    if backend == "replay":
+        return ReplayBackend(
+            recordings_dir,
+            latency=float(gemini_config.get("replay_latency", 0.0)),
+            jitter=float(gemini_config.get("replay_jitter", 0.0)),
+        )
+
+    if not api_key:
+        raise ValueError("Gemini API key not found...")
+    if backend == "record":
+        return RecordingBackend(GeminiBackend(api_key), recordings_dir)
+    return GeminiBackend(api_key)
+
+
+_STUB_CONCEPT: Dict[str, Any] = {
+    "title": "Replay Quest",
+    "description": "A topdown adventure generated by the offline replay backend",
+    "genre": "adventure",
+    "theme": "fantasy",
+    "objective": "Collect all coins while avoiding enemies",
+    "mechanics": ["movement", "collection", "avoidance"],
+    "player_abilities": ["move", "collect", "dash"],
+    "enemies": [
+        {"name": "Guard", "behavior": "patrols", "difficulty": "easy"},
+        {"name": "Hunter", "behavior": "chases player", "difficulty": "medium"}
+    ],
+    "powerups": [
+        {"name": "Health", "effect": "restores health"},
+        {"name": "Speed", "effect": "increases movement speed"}
+    ],
+    "level_progression": "Linear progression with increasing difficulty",
+    "scoring_system": "Points for collecting items and surviving",
+    "visual_style": "Simple colored shapes",
+    "sound_theme": "Retro arcade style"
+}
+
+_STUB_LEVEL: Dict[str, Any] = {
+    "level_number": 1,
+    "name": "Replay Fields",
+    "description": "A small open field with a few walls",
+    "size": {"width": 800, "height": 600},
+    "spawn_points": [{"x": 100, "y": 100, "type": "player"}],
+    "obstacles": [
+        {"x": 200, "y": 200, "width": 50, "height": 50, "type": "wall"},
+        {"x": 500, "y": 400, "width": 30, "height": 30, "type": "rock"}
+    ],
+    "powerups": [{"x": 300, "y": 150, "type": "health"}],
+    "enemies": [
+        {"x": 350, "y": 250, "type": "basic", "patrol_path": [[350, 250], [400, 250]]},
+        {"x": 150, "y": 450, "type": "aggressive", "patrol_path": [[150, 450], [200, 450]]}
+    ],
+    "objectives": [{"type": "collect", "target": "coin", "count": 5}],
+    "difficulty": "easy",
+    "time_limit": 120
+}
+
+_STUB_ASSETS: Dict[str, Any] = {
+    "player_sprite": "knight.png",
+    "enemies": {"basic": "zombie.png", "aggressive": "ghost.png"},
+    "powerups": {"health": "apple.png"},
+    "background_asset": "SIMPLE_SHAPE, Dark Green"
+}
+
+_STUB_GAME_CODE = '''import pygame
+import sys
+
+pygame.init()
+screen = pygame.display.set_mode((800, 600))
+pygame.display.set_caption("Replay Quest")
+clock = pygame.time.Clock()
+player = pygame.Rect(100, 100, 30, 30)
+
+running = True
+while running:
+    for event in pygame.event.get():
+        if event.type == pygame.QUIT:
+            running = False
+    keys = pygame.key.get_pressed()
+    player.x += (keys[pygame.K_RIGHT] - keys[pygame.K_LEFT]) * 5
+    player.y += (keys[pygame.K_DOWN] - keys[pygame.K_UP]) * 5
+    screen.fill((0, 0, 0))
+    pygame.draw.rect(screen, (0, 0, 255), player)
+    pygame.display.flip()
+    clock.tick(60)
+
+pygame.quit()
+sys.exit()
+'''
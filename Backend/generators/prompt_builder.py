@@ -0,0 +1,179 @@
+"""
+Prompt Builder for Game Code Generation
+Assembles compact code-generation prompts: minified JSON, de-duplicated templates and a token estimate
+"""
+
+import re
+import ast
+import json
+import math
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+
+from config import config
+
+logger = logging.getLogger(__name__)
+
+_TEMPLATE_MARKER = re.compile(r"^# --- TEMPLATE: (\w+) ---\s*$")
+# Rough characters-per-token ratio for English text and Python source
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap local token estimate, so the count is known without an extra API round trip"""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def minify_json(data: Any) -> str:
+    return json.dumps(data, separators=(',', ':'), ensure_ascii=False)
+
+
+def _is_cleanup_call(stmt: ast.stmt) -> bool:
+    """pygame.quit() / sys.exit() at module level"""
+    if not (isinstance(stmt, ast.Expr) and isinstance(stmt.value, ast.Call)):
+        return False
+    func = stmt.value.func
+    return (isinstance(func, ast.Attribute) and isinstance(func.value, ast.Name)
+            and (func.value.id, func.attr) in {("pygame", "quit"), ("sys", "exit")})
+
+
+def _loop_flag(loop: ast.While) -> Optional[str]:
+    """Name of the flag a `while running:` style loop tests"""
+    return loop.test.id if isinstance(loop.test, ast.Name) else None
+
+
+def _constant_bindings(stmt: ast.stmt) -> Optional[Dict[str, Any]]:
+    """Names bound to literal values by an assignment such as `W, H = 800, 600`, else None"""
+    if not isinstance(stmt, ast.Assign):
+        return None
+    try:
+        value = ast.literal_eval(stmt.value)
+    except (ValueError, SyntaxError, TypeError):
+        return None
+    bindings = {}
+    for target in stmt.targets:
+        if isinstance(target, ast.Name):
+            bindings[target.id] = value
+        elif isinstance(target, ast.Tuple) and isinstance(value, tuple) and len(target.elts) == len(value) \
+                and all(isinstance(elt, ast.Name) for elt in target.elts):
+            bindings.update({elt.id: item for elt, item in zip(target.elts, value)})
+        else:
+            return None
+    return bindings
+
+
+def _strip_docstrings(tree: ast.Module):
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            body = node.body
+            if body and isinstance(body[0], ast.Expr) and isinstance(body[0].value, ast.Constant) \
+                    and isinstance(body[0].value.value, str):
+                node.body = body[1:] or [ast.Pass()]
+
+
+def _template_sections(stitched: str) -> List[Tuple[int, str]]:
+    """(first line, template id) of every template marker in the stitched code"""
+    sections = []
+    for lineno, line in enumerate(stitched.splitlines(), 1):
+        match = _TEMPLATE_MARKER.match(line)
+        if match and (not sections or sections[-1][1] != match.group(1)):
+            sections.append((lineno, match.group(1)))
+    return sections
+
+
+def compact_template_code(stitched: str, strip_docstrings: bool = False) -> str:
+    """
+    Shrinks stitched template code without changing what it teaches the model: comments are
+    dropped, statements a previous template already defined (imports, pygame.init(), the
+    "Assumed from A" constants) are emitted once, and only the last demo main loop is kept.
+    """
+    try:
+        tree = ast.parse(stitched)
+    except SyntaxError as e:
+        logger.warning(f"Stitched template does not parse, sending it uncompacted: {e}")
+        return stitched
+    if strip_docstrings:
+        _strip_docstrings(tree)
+
+    body = tree.body
+    loops = [i for i, stmt in enumerate(body) if isinstance(stmt, ast.While)]
+    last_loop = loops[-1] if loops else None
+    dropped = set(loops[:-1])
+    for i in loops[:-1]:
+        # The `running = True` that only exists to drive a dropped demo loop
+        flag = _loop_flag(body[i])
+        if flag and i > 0 and isinstance(body[i - 1], ast.Assign) and \
+                [getattr(t, 'id', None) for t in body[i - 1].targets] == [flag]:
+            dropped.add(i - 1)
+    for i, stmt in enumerate(body):
+        if _is_cleanup_call(stmt) and (last_loop is None or i < last_loop):
+            dropped.add(i)
+
+    sections = _template_sections(stitched)
+    output: List[str] = []
+    seen = set()
+    constants: Dict[str, Any] = {}
+    current_section = None
+    for i, stmt in enumerate(body):
+        if i in dropped:
+            continue
+        source = ast.unparse(stmt)
+        if source in seen:
+            continue
+        seen.add(source)
+        bindings = _constant_bindings(stmt)
+        if bindings is not None:
+            if all(name in constants and constants[name] == value for name, value in bindings.items()):
+                continue
+            constants.update(bindings)
+
+        section = None
+        for lineno, template_id in sections:
+            if lineno <= stmt.lineno:
+                section = template_id
+        if section != current_section:
+            current_section = section
+            output.append(f"\n# --- TEMPLATE: {section} ---")
+        output.append(source)
+
+    return "\n".join(output).strip() + "\n"
+
+
+def build_game_code_prompt(game_concept: Dict[str, Any], level_design: Dict[str, Any], stitched_template: str) -> str:
+    """Code-generation prompt within the configured token budget"""
+    budget = int(config.get("gemini.code_prompt_token_budget", 6000))
+
+    template = compact_template_code(stitched_template)
+    prompt = _render_code_prompt(game_concept, level_design, template)
+    if estimate_tokens(prompt) > budget:
+        template = compact_template_code(stitched_template, strip_docstrings=True)
+        prompt = _render_code_prompt(game_concept, level_design, template)
+
+    tokens = estimate_tokens(prompt)
+    original_tokens = estimate_tokens(stitched_template) + estimate_tokens(
+        json.dumps(game_concept, indent=2) + json.dumps(level_design, indent=2))
+    logger.info(f"Code prompt: ~{tokens} tokens (template and design data alone were ~{original_tokens})")
+    if tokens > budget:
+        logger.warning(f"Code prompt exceeds the {budget}-token budget")
+    return prompt
+
+
+def _render_code_prompt(game_concept: Dict[str, Any], level_design: Dict[str, Any], template: str) -> str:
+    return f"""You are a specialized Pygame coder. Your task is to complete the provided Python code template
+by generating the unique logic required for this specific game.
+
+Game Concept: {minify_json(game_concept)}
+Level Design: {minify_json(level_design)}
+
+INSTRUCTIONS:
+1. Analyze the provided template code and the concept/design data.
+2. **Generate ONLY** the Python code necessary to replace the **[LLM_INJECT_...]** placeholders.
+3. The generated code MUST be correct, functional Python that integrates seamlessly into the existing template structure.
+
+--- CODE TEMPLATE FOR COMPLETION ---
+{template}
+--- END OF TEMPLATE ---
+
+YOUR RESPONSE MUST CONTAIN ONLY the Python code needed to fill ALL placeholders,
+wrapped in a single markdown block (```python ... ```) and nothing else.
+"""
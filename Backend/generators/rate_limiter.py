@@ -0,0 +1,169 @@
+"""
+Gemini Quota Limiter
+Token buckets for requests/min and tokens/min on the shared API key, kept in the task store so every worker paces together
+"""
+
+import time
+import random
+import asyncio
+import threading
+from typing import Any, Dict, Optional
+import logging
+
+from config import config
+
+logger = logging.getLogger(__name__)
+
+# Code generation for a job that is already under way goes before starting new jobs' planning calls
+PRIORITY_CODING = "coding"
+PRIORITY_PLANNING = "planning"
+
+REQUESTS_BUCKET = "gemini:requests"
+TOKENS_BUCKET = "gemini:tokens"
+
+# Longest single sleep while waiting for quota, so waiters notice refills from other workers
+MAX_POLL_SECONDS = 1.0
+
+
+class QuotaExhausted(RuntimeError):
+    """Raised when quota does not free up within the configured wait"""
+
+
+class QuotaLimiter:
+    """
+    Paces calls to stay within the key's requests/min and tokens/min. Planning calls leave a
+    reserve of each bucket for coding calls, and wait while a coding call in this process waits.
+    """
+
+    def __init__(self, store, requests_per_minute: float, tokens_per_minute: float,
+                 coding_reserve: float = 0.2, max_wait: float = 120.0):
+        self.store = store
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.coding_reserve = coding_reserve
+        self.max_wait = max_wait
+        self._lock = threading.Lock()
+        self._coding_waiters = 0
+
+    @staticmethod
+    def _paced() -> bool:
+        """The replay backend is never paced; checked per call since --backend may be applied after creation"""
+        return config.get("gemini.backend", "live") != "replay"
+
+    def _specs(self) -> Dict[str, tuple]:
+        """(capacity, refill per second) of each bucket; capacity is one minute's worth"""
+        return {
+            REQUESTS_BUCKET: (self.requests_per_minute, self.requests_per_minute / 60.0),
+            TOKENS_BUCKET: (self.tokens_per_minute, self.tokens_per_minute / 60.0),
+        }
+
+    def _try_take(self, tokens: int, priority: str) -> float:
+        """0.0 once quota was taken, else how long to wait before trying again"""
+        coding = priority == PRIORITY_CODING
+        if not coding and self._coding_waiters:
+            return MAX_POLL_SECONDS / 4
+        reserve = 0.0 if coding else self.coding_reserve
+        specs = self._specs()
+        # A prompt larger than what the bucket can ever hold is charged as a full bucket
+        tokens = min(tokens, self.tokens_per_minute * (1 - reserve))
+        buckets = {
+            REQUESTS_BUCKET: (1,) + specs[REQUESTS_BUCKET],
+            TOKENS_BUCKET: (tokens,) + specs[TOKENS_BUCKET],
+        }
+        return self.store.take_tokens(buckets, reserve=reserve)
+
+    def _waiting(self, priority: str, delta: int):
+        if priority == PRIORITY_CODING:
+            with self._lock:
+                self._coding_waiters += delta
+
+    def _next_sleep(self, wait: float, deadline: float, tokens: int) -> float:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise QuotaExhausted(f"No Gemini quota for a {tokens}-token request within {self.max_wait:g}s")
+        # Jitter keeps waiting workers from retrying in lockstep
+        return min(wait, remaining, MAX_POLL_SECONDS) * random.uniform(0.8, 1.0)
+
+    def acquire(self, tokens: int, priority: str = PRIORITY_PLANNING):
+        """Block until one request and `tokens` prompt tokens are available, then take them"""
+        if not self._paced():
+            return
+        deadline = time.monotonic() + self.max_wait
+        self._waiting(priority, 1)
+        try:
+            while True:
+                wait = self._try_take(tokens, priority)
+                if wait == 0.0:
+                    return
+                time.sleep(self._next_sleep(wait, deadline, tokens))
+        finally:
+            self._waiting(priority, -1)
+
+    async def acquire_async(self, tokens: int, priority: str = PRIORITY_PLANNING):
+        """Async counterpart of acquire; the quota check itself is a short store transaction"""
+        if not self._paced():
+            return
+        deadline = time.monotonic() + self.max_wait
+        self._waiting(priority, 1)
+        try:
+            while True:
+                wait = self._try_take(tokens, priority)
+                if wait == 0.0:
+                    return
+                await asyncio.sleep(self._next_sleep(wait, deadline, tokens))
+        finally:
+            self._waiting(priority, -1)
+
+    def record_usage(self, tokens: int):
+        """Charge response tokens once they are known; the bucket may go negative and then refills"""
+        if tokens > 0 and self._paced():
+            self.store.take_tokens({TOKENS_BUCKET: (tokens,) + self._specs()[TOKENS_BUCKET]}, force=True)
+
+    def headroom(self) -> Optional[Dict[str, Any]]:
+        """Quota left right now, for the metrics endpoint; None while calls are not paced"""
+        if not self._paced():
+            return None
+        specs = self._specs()
+        levels = self.store.peek_tokens(specs)
+        return {
+            "requests_per_minute": {
+                "limit": self.requests_per_minute,
+                "available": round(max(0.0, levels[REQUESTS_BUCKET]), 2),
+                "headroom": round(max(0.0, levels[REQUESTS_BUCKET]) / self.requests_per_minute, 3),
+            },
+            "tokens_per_minute": {
+                "limit": self.tokens_per_minute,
+                "available": round(max(0.0, levels[TOKENS_BUCKET])),
+                "headroom": round(max(0.0, levels[TOKENS_BUCKET]) / self.tokens_per_minute, 3),
+            },
+            "waiting_coding_calls": self._coding_waiters,
+        }
+
+
+_shared_limiter: Optional[QuotaLimiter] = None
+_shared_limiter_lock = threading.Lock()
+_shared_limiter_created = False
+
+
+def get_rate_limiter(store=None) -> Optional[QuotaLimiter]:
+    """
+    Process-wide limiter, or None when rate limiting is disabled or the replay backend is in use.
+    Pass the server's task store so the limiter shares its connection settings; otherwise one is created.
+    """
+    global _shared_limiter, _shared_limiter_created
+    with _shared_limiter_lock:
+        if not _shared_limiter_created:
+            _shared_limiter_created = True
+            limit_config = config.get("rate_limit", {})
+            if limit_config.get("enabled", True) and config.get("gemini.backend", "live") != "replay":
+                if store is None:
+                    from services.task_store import create_task_store
+                    store = create_task_store()
+                _shared_limiter = QuotaLimiter(
+                    store,
+                    requests_per_minute=float(limit_config.get("requests_per_minute", 60)),
+                    tokens_per_minute=float(limit_config.get("tokens_per_minute", 1000000)),
+                    coding_reserve=float(limit_config.get("coding_reserve", 0.2)),
+                    max_wait=float(limit_config.get("max_wait_seconds", 120)),
+                )
+        return _shared_limiter
@@ -0,0 +1,164 @@
+"""
+Response Cache for Gemini Prompts
+Content-addressed on-disk cache of model responses keyed by model, prompt and generation config
+"""
+
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+from typing import Dict, Any, Optional
+import logging
+
+from config import config
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseCache:
+    """SQLite-backed response cache with TTL and least-recently-used eviction"""
+
+    # Eviction runs after this many writes rather than on every write
+    EVICT_EVERY = 20
+
+    def __init__(self, db_path: str, max_entries: int = 5000, max_bytes: int = 200 * 1024 * 1024,
+                 ttl_seconds: int = 7 * 86400):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._writes = 0
+        self._local = threading.local()
+        self._counter_lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        conn = self._connection()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                response TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_last_access ON responses (last_access)")
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def make_key(model_name: str, prompt: str, generation_config: Any = None) -> str:
+        """Hash of everything that determines the model output"""
+        payload = json.dumps([model_name, prompt, generation_config], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response, or None on a miss or expired entry"""
+        conn = self._connection()
+        row = conn.execute("SELECT response, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+        now = time.time()
+        if row and (not self.ttl_seconds or now - row[1] < self.ttl_seconds):
+            conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+            self._count(hit=True)
+            return row[0]
+        if row:
+            conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+        self._count(hit=False)
+        return None
+
+    def put(self, key: str, model_name: str, response: str):
+        """Store a response and evict old entries when over budget"""
+        now = time.time()
+        self._connection().execute(
+            "INSERT OR REPLACE INTO responses (key, model, response, size, created_at, last_access) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (key, model_name, response, len(response.encode('utf-8')), now, now)
+        )
+        self._writes += 1
+        if self._writes % self.EVICT_EVERY == 0:
+            self.evict()
+
+    def evict(self) -> int:
+        """Remove expired entries, then least recently used ones until within the size limits"""
+        conn = self._connection()
+        removed = 0
+        if self.ttl_seconds:
+            removed += conn.execute(
+                "DELETE FROM responses WHERE created_at < ?", (time.time() - self.ttl_seconds,)
+            ).rowcount
+
+        count, total_bytes = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        if count <= self.max_entries and total_bytes <= self.max_bytes:
+            return removed
+
+        # Walk entries from least to most recently used until both limits are met
+        to_delete = []
+        for key, size in conn.execute("SELECT key, size FROM responses ORDER BY last_access"):
+            if count <= self.max_entries and total_bytes <= self.max_bytes:
+                break
+            to_delete.append((key,))
+            count -= 1
+            total_bytes -= size
+        conn.executemany("DELETE FROM responses WHERE key = ?", to_delete)
+        removed += len(to_delete)
+        logger.info(f"Evicted {removed} cached responses")
+        return removed
+
+    def _count(self, hit: bool):
+        with self._counter_lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for this process plus the current cache size"""
+        count, total_bytes = self._connection().execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "entries": count,
+            "bytes": total_bytes,
+        }
+
+
+_shared_cache: Optional[ResponseCache] = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """Process-wide response cache, or None when caching is disabled in the configuration"""
+    global _shared_cache
+    cache_config = config.get("cache", {})
+    if not cache_config.get("enabled", True):
+        return None
+
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            db_path = cache_config.get("path", "data/response_cache.db")
+            if not os.path.isabs(db_path):
+                backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+                db_path = os.path.join(backend_dir, db_path)
+            _shared_cache = ResponseCache(
+                db_path,
+                max_entries=int(cache_config.get("max_entries", 5000)),
+                max_bytes=int(cache_config.get("max_megabytes", 200)) * 1024 * 1024,
+                ttl_seconds=int(cache_config.get("ttl_seconds", 7 * 86400)),
+            )
+        return _shared_cache
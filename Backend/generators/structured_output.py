@@ -0,0 +1,247 @@
+"""
+Structured Output Parsing
+Extracts, repairs and validates the JSON the planning model returns, so near-miss responses are salvaged instead of discarded
+"""
+
+import re
+import ast
+import json
+from typing import Any, Dict, List, Optional, Type, Union
+import logging
+
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter, ValidationError, field_validator
+
+logger = logging.getLogger(__name__)
+
+_FENCE = re.compile(r"^\s*```[\w+-]*\s*\n?|\n?\s*```\s*$")
+_CLOSERS = {'{': '}', '[': ']'}
+
+
+class StructuredOutputError(ValueError):
+    """Raised when a response cannot be turned into the expected structure"""
+
+
+def strip_fences(text: str) -> str:
+    return _FENCE.sub("", text.strip())
+
+
+def extract_json(text: str, opener: str = '{') -> str:
+    """The JSON document in a response: from the first opener to the last closer, or to the end when truncated"""
+    text = strip_fences(text)
+    start = text.find(opener)
+    if start == -1:
+        raise StructuredOutputError(f"No JSON {'object' if opener == '{' else 'array'} in response")
+    end = text.rfind(_CLOSERS[opener])
+    return text[start:end + 1] if end > start else text[start:]
+
+
+def repair_json(text: str) -> List[str]:
+    """
+    Repair candidates for almost-JSON, best first: comments and trailing commas are removed, and a
+    truncated document is closed either as-is or cut back to its last complete element.
+    """
+    out: List[str] = []
+    stack: List[str] = []
+    # (length of `out`, open containers) right after each complete element, for cutting back truncated output
+    safe_points = []
+    in_string = escaped = False
+    i = 0
+    while i < len(text):
+        ch = text[i]
+        if in_string:
+            out.append(ch)
+            if escaped:
+                escaped = False
+            elif ch == '\\':
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+            out.append(ch)
+        elif ch == '/' and text.startswith('//', i):
+            newline = text.find('\n', i)
+            i = len(text) if newline == -1 else newline
+            continue
+        elif ch in _CLOSERS:
+            stack.append(_CLOSERS[ch])
+            out.append(ch)
+            safe_points.append((len(out), tuple(stack)))
+        elif ch in '}]':
+            # Trailing comma before the closer
+            while out and out[-1].isspace():
+                out.pop()
+            if out and out[-1] == ',':
+                out.pop()
+            if stack and stack[-1] == ch:
+                stack.pop()
+            out.append(ch)
+            if not stack:
+                break
+        elif ch == ',':
+            safe_points.append((len(out), tuple(stack)))
+            out.append(ch)
+        else:
+            out.append(ch)
+        i += 1
+
+    candidates = []
+    body = "".join(out)
+    if in_string:
+        body += '"'
+    trimmed = body.rstrip()
+    if not trimmed.endswith((',', ':')):
+        candidates.append(trimmed + "".join(reversed(stack)))
+    for length, open_stack in reversed(safe_points[-3:]):
+        prefix = "".join(out[:length]).rstrip().rstrip(',')
+        candidates.append(prefix + "".join(reversed(open_stack)))
+    return candidates
+
+
+def loads_lenient(text: str, opener: str = '{') -> Any:
+    """json.loads on the extracted document, falling back to repaired variants of it"""
+    document = extract_json(text, opener)
+    try:
+        return json.loads(document)
+    except json.JSONDecodeError as e:
+        error = e
+
+    for candidate in repair_json(document):
+        try:
+            value = json.loads(candidate)
+        except json.JSONDecodeError:
+            # Python-style literals (single quotes, True/None) the model sometimes emits
+            try:
+                value = ast.literal_eval(candidate)
+            except (ValueError, TypeError, SyntaxError, MemoryError, RecursionError):
+                continue
+        if isinstance(value, (dict, list)):
+            logger.info("Repaired malformed JSON in model response")
+            return value
+    raise StructuredOutputError(f"Unrecoverable JSON in response: {error}")
+
+
+class _Schema(BaseModel):
+    # Unknown keys are kept; the templates and agents may use fields the schema does not name
+    model_config = ConfigDict(extra='allow')
+
+
+Number = Union[int, float]
+
+
+def _text_items(value: Any) -> Any:
+    """Accept a single string, or objects where plain strings were asked for"""
+    if isinstance(value, str):
+        return [value]
+    if isinstance(value, list):
+        return [item.get("name") or item.get("description") or json.dumps(item) if isinstance(item, dict) else item
+                for item in value]
+    return value
+
+
+class ConceptEnemy(_Schema):
+    name: str
+    behavior: str = ""
+    difficulty: str = "medium"
+
+
+class ConceptPowerup(_Schema):
+    name: str
+    effect: str = ""
+
+
+class GameConcept(_Schema):
+    title: str
+    description: str = ""
+    genre: str = "adventure"
+    theme: str = ""
+    objective: str = ""
+    mechanics: List[str] = Field(default_factory=list)
+    player_abilities: List[str] = Field(default_factory=list)
+    enemies: List[ConceptEnemy] = Field(default_factory=list)
+    powerups: List[ConceptPowerup] = Field(default_factory=list)
+    level_progression: str = ""
+    scoring_system: str = ""
+    visual_style: str = ""
+    sound_theme: str = ""
+
+    @field_validator("mechanics", "player_abilities", mode="before")
+    @classmethod
+    def coerce_text_lists(cls, value: Any) -> Any:
+        return _text_items(value)
+
+
+class LevelSize(_Schema):
+    width: int = 800
+    height: int = 600
+
+
+class Placement(_Schema):
+    x: Number
+    y: Number
+    type: str = ""
+
+
+class Obstacle(Placement):
+    width: Number = 50
+    height: Number = 50
+
+
+class EnemyPlacement(Placement):
+    patrol_path: List[List[Number]] = Field(default_factory=list)
+
+
+class LevelDesign(_Schema):
+    level_number: int = 1
+    name: str = ""
+    description: str = ""
+    size: LevelSize = Field(default_factory=LevelSize)
+    spawn_points: List[Placement] = Field(default_factory=list)
+    obstacles: List[Obstacle] = Field(default_factory=list)
+    powerups: List[Placement] = Field(default_factory=list)
+    enemies: List[EnemyPlacement] = Field(default_factory=list)
+    objectives: List[Dict[str, Any]] = Field(default_factory=list)
+    difficulty: str = "medium"
+    time_limit: Optional[int] = None
+
+
+class AssetSelection(_Schema):
+    player_sprite: str
+    enemies: Dict[str, str] = Field(default_factory=dict)
+    powerups: Dict[str, str] = Field(default_factory=dict)
+    background_asset: str = "SIMPLE_SHAPE, Black"
+
+
+_TEMPLATE_PLAN = TypeAdapter(List[str])
+
+
+def parse_structured(text: str, schema: Type[BaseModel]) -> Dict[str, Any]:
+    """Parse a JSON object response and validate it against a schema; missing optional fields get defaults"""
+    data = loads_lenient(text, '{')
+    try:
+        return schema.model_validate(data).model_dump()
+    except ValidationError as e:
+        raise StructuredOutputError(f"Response does not match {schema.__name__}: {e}") from e
+
+
+def parse_game_concept(text: str) -> Dict[str, Any]:
+    return parse_structured(text, GameConcept)
+
+
+def parse_level_design(text: str) -> Dict[str, Any]:
+    return parse_structured(text, LevelDesign)
+
+
+def parse_asset_selection(text: str) -> Dict[str, Any]:
+    return parse_structured(text, AssetSelection)
+
+
+def parse_template_plan(text: str) -> List[str]:
+    """Template IDs in order, without duplicates"""
+    try:
+        plan = _TEMPLATE_PLAN.validate_python(loads_lenient(text, '['))
+    except ValidationError as e:
+        raise StructuredOutputError(f"Template plan is not a list of template IDs: {e}") from e
+    if not plan:
+        raise StructuredOutputError("Template plan is empty")
+    return list(dict.fromkeys(item.strip() for item in plan))
@@ -0,0 +1,137 @@
+"""
+Template Registry for Game Code Generation
+Loads the templates/template_*.py building blocks once, validates them and caches stitched combinations
+"""
+
+import os
+import ast
+import time
+import threading
+from typing import Dict, Iterable, Optional, Tuple
+import logging
+
+from config import config
+
+logger = logging.getLogger(__name__)
+
+TEMPLATES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "templates")
+
+
+def template_id_from_filename(filename: str) -> str:
+    """template_A_core_setup.py -> A_CORE_SETUP"""
+    return os.path.splitext(filename)[0][len("template_"):].upper()
+
+
+class TemplateRegistry:
+    """In-memory template sources; stitching a known combination is a dictionary lookup"""
+
+    # Minimum seconds between mtime checks when hot reloading
+    RELOAD_CHECK_INTERVAL = 1.0
+
+    def __init__(self, templates_dir: str = TEMPLATES_DIR, hot_reload: Optional[bool] = None):
+        self.templates_dir = templates_dir
+        # None follows templates.hot_reload, read on every lookup so CLI flags applied later still count
+        self._hot_reload = hot_reload
+        self._templates: Dict[str, str] = {}
+        self._mtimes: Dict[str, float] = {}
+        self._stitched: Dict[Tuple[str, ...], str] = {}
+        self._lock = threading.Lock()
+        self._last_check = 0.0
+        self.load()
+
+    @property
+    def hot_reload(self) -> bool:
+        if self._hot_reload is None:
+            return bool(config.get("templates.hot_reload", False))
+        return self._hot_reload
+
+    def _scan(self) -> Dict[str, float]:
+        """mtime of every template file, keyed by file name"""
+        if not os.path.isdir(self.templates_dir):
+            return {}
+        return {
+            entry.name: entry.stat().st_mtime
+            for entry in os.scandir(self.templates_dir)
+            if entry.name.startswith("template_") and entry.name.endswith(".py") and entry.is_file()
+        }
+
+    def load(self):
+        """(Re)load every template, skipping files that do not parse"""
+        mtimes = self._scan()
+        templates = {}
+        for filename in sorted(mtimes):
+            path = os.path.join(self.templates_dir, filename)
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    source = f.read()
+                ast.parse(source, filename=path)
+            except SyntaxError as e:
+                logger.error(f"Template {filename} is not valid Python and was skipped: {e}")
+                continue
+            except Exception as e:
+                logger.error(f"Error reading template {filename}: {e}")
+                continue
+            templates[template_id_from_filename(filename)] = source
+
+        with self._lock:
+            self._templates = templates
+            self._mtimes = mtimes
+            self._stitched = {}
+            self._last_check = time.monotonic()
+        logger.info(f"Loaded {len(templates)} code templates from {self.templates_dir}")
+
+    def _reload_if_changed(self):
+        now = time.monotonic()
+        if now - self._last_check < self.RELOAD_CHECK_INTERVAL:
+            return
+        self._last_check = now
+        if self._scan() != self._mtimes:
+            logger.info("Template files changed, reloading")
+            self.load()
+
+    @property
+    def template_ids(self) -> Iterable[str]:
+        return sorted(self._templates)
+
+    def get(self, template_id: str) -> str:
+        """Source of one template, or an error comment the LLM prompt can carry"""
+        if self.hot_reload:
+            self._reload_if_changed()
+        source = self._templates.get(template_id)
+        if source is None:
+            return f"# ERROR: Template ID '{template_id}' not found.\n"
+        return source
+
+    def stitch(self, template_ids: Iterable[str]) -> str:
+        """Combines template code into a single string for the LLM."""
+        if self.hot_reload:
+            self._reload_if_changed()
+        key = tuple(template_ids)
+        stitched = self._stitched.get(key)
+        if stitched is not None:
+            return stitched
+
+        stitched_code = ["# --- START GENERATED GAME CODE TEMPLATE ---"]
+        for template_id in key:
+            # Add a clear marker before each template for debugging/review
+            stitched_code.append(f"\n# --- TEMPLATE: {template_id} ---")
+            stitched_code.append(self.get(template_id))
+        stitched_code.append("\n# --- END GENERATED GAME CODE TEMPLATE ---")
+        stitched = "\n".join(stitched_code)
+
+        with self._lock:
+            self._stitched[key] = stitched
+        return stitched
+
+
+_shared_registry: Optional[TemplateRegistry] = None
+_shared_registry_lock = threading.Lock()
+
+
+def get_template_registry() -> TemplateRegistry:
+    """Process-wide template registry, loaded on first use"""
+    global _shared_registry
+    with _shared_registry_lock:
+        if _shared_registry is None:
+            _shared_registry = TemplateRegistry()
+        return _shared_registry
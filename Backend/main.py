@@ -13,10 +13,10 @@ import uvicorn
 import uuid
 import subprocess
 import shutil
-from fastapi import FastAPI, BackgroundTasks
+from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect
 from pydantic import BaseModel
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
 from dotenv import load_dotenv
 
 # Load environment variables from the .env file in the same directory as main.py
@@ -30,14 +30,53 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from agents.game_agents import AutonomousGameDirector, GameCreationAgent
 from generators.gemini_generator import GeminiGameGenerator
 from engine.game_engine import GameEngine
+from services.task_store import create_task_store, FINISHED_STATUSES
+from services.job_scheduler import create_scheduler, QueueFullError
+from services.progress_events import ProgressBroker, ProgressReporter
+from services.packaging import GamePackager, BuildCancelled, EXE_MEDIA_TYPE, sprite_asset_files
+from services.downloads import file_download_response
+from services.game_catalog import get_game_catalog
+from services.request_cache import create_request_cache
+from generators.response_cache import get_response_cache
+from generators.template_registry import get_template_registry
+from generators.rate_limiter import get_rate_limiter
+from config import config
 
 # --- Web Server Setup (FastAPI) ---
 
 app = FastAPI()
 
-# In-memory storage for task statuses
-# For a production application, you would use a more robust solution like Redis or a database.
-tasks = {}
+# Shared storage for task statuses (SQLite by default, Redis when configured),
+# so several uvicorn workers can serve the same tasks and jobs survive restarts.
+task_store = create_task_store()
+
+# Dedicated generation workers, so LLM calls and PyInstaller builds never run
+# on the server's request threadpool.
+scheduler = create_scheduler()
+
+def cancel_requested(task_id: str) -> bool:
+    """Cancel flag of a task, set in the shared task store by whichever worker handled the cancel request"""
+    task = task_store.get(task_id)
+    return bool(task and task.get('cancel_requested'))
+
+# Packages games into a prebuilt pygame runtime instead of a cold PyInstaller build per game;
+# full builds run on a process pool, each in its own scratch workdir, and stop once their task is cancelled
+packager = GamePackager(cancel_check=cancel_requested)
+
+# Code templates are read and validated once up front; stitching is then an in-memory lookup
+get_template_registry()
+
+# Paces Gemini calls from every worker against the shared key's quota, through the task store
+rate_limiter = get_rate_limiter(task_store)
+
+# Past requests by theme, so near-identical themes resolve to an existing game
+request_cache = create_request_cache()
+
+# Wakes up event streams in this process as soon as a local job reports progress
+progress_broker = ProgressBroker()
+
+# Streams re-check the task store at least this often, which covers jobs running in other workers
+EVENT_POLL_SECONDS = 1.0
 
 # Configure CORS
 app.add_middleware(
@@ -61,6 +100,15 @@ class GenerationRequest(BaseModel):
     imageCategory: str
     gameMode: str
     settings: GameSettings
+    # Set to False to always generate a new game, even for a theme seen before
+    reuseExisting: bool = True
+
+
+def request_theme(request: GenerationRequest) -> str:
+    theme = request.worldDescription
+    if request.imageDescription:
+        theme += f" with an image of {request.imageDescription}"
+    return theme
 
 import subprocess
 import shutil
@@ -68,66 +116,53 @@ import shutil
 def run_game_generation(task_id: str, request: GenerationRequest):
     """The actual game generation logic that runs in the background."""
     logger.info(f"[{task_id}] Starting game generation...")
-    tasks[task_id] = {'status': 'IN_PROGRESS', 'result': None}
+    progress = ProgressReporter(task_store, task_id, progress_broker)
+    if cancel_requested(task_id):
+        # Cancelled through another worker while it sat in this worker's queue
+        progress.set_status('CANCELLED', {'error': 'Generation was cancelled.'})
+        return
+    progress.set_status('IN_PROGRESS')
     try:
         api_key = os.getenv('GEMINI_API_KEY')
-        if not api_key:
+        # The offline replay backend serves recorded responses and needs no key
+        if not api_key and config.get("gemini.backend") != "replay":
             raise ValueError("Gemini API key not found on the server.")
 
         creation_agent = GameCreationAgent(api_key)
-        theme = request.worldDescription
-        if request.imageDescription:
-            theme += f" with an image of {request.imageDescription}"
+        theme = request_theme(request)
 
         logger.info(f"[{task_id}] Generating game package...")
-        game_package = creation_agent.create_game_autonomously(theme)
-        filepath = creation_agent.save_game(game_package)
+        with scheduler.stage("llm"):
+            game_package = creation_agent.create_game_autonomously(theme, progress_callback=progress)
+        with progress.stage("save"):
+            filepath = creation_agent.save_game(game_package)
         logger.info(f"[{task_id}] Game package saved to {filepath}")
         
         # --- Create Executable ---
         logger.info(f"[{task_id}] Starting packaging process...")
-        tasks[task_id]['status'] = 'PACKAGING'
+        progress.set_status('PACKAGING')
         game_filename = os.path.basename(filepath)
         game_name = os.path.splitext(game_filename)[0]
         
         backend_dir = os.path.dirname(os.path.abspath(__file__))
-        
-        pyinstaller_exe_path = os.path.expanduser("~/AppData/Roaming/Python/Python312/Scripts/pyinstaller.exe")
-        if not os.path.exists(pyinstaller_exe_path):
-            pyinstaller_exe_path = "pyinstaller"
-
-        pyinstaller_command = [
-            pyinstaller_exe_path,
-            "--onefile",
-            "--name", game_name,
-            "--distpath", os.path.join(backend_dir, "dist"),
-            "--workpath", os.path.join(backend_dir, "build"),
-            "--specpath", os.path.join(backend_dir, "spec"),
-            os.path.abspath(filepath)  # Use absolute path here
-        ]
-
-        process = subprocess.run(pyinstaller_command, capture_output=True, encoding="utf-8", text=True, cwd=backend_dir)
-        logger.info(f"[{task_id}] PyInstaller finished.")
-
-        if process.returncode != 0:
-            logger.error(f"[{task_id}] PyInstaller failed: {process.stderr}")
-            raise Exception(f"PyInstaller failed: {process.stderr}")
-
-        exe_filename = f"{game_name}.exe"
-        dist_path = os.path.join(backend_dir, "dist", exe_filename)
-        final_exe_path = os.path.join(backend_dir, "games", exe_filename)
-
-        shutil.move(dist_path, final_exe_path)
-
-        # exe_filename_only = os.path.basename(final_exe_path)
-        # result = {
-        #     "message": "Game generated and packaged successfully!",
-        #     "title": game_package.get('concept', {}).get('title', 'Unknown'),
-        #     "description": game_package.get('concept', {}).get('description', 'Unknown'),
-        #     "python_script": exe_filename_only,
-        #     "executable_file": final_exe_path 
-        # }
-        # tasks[task_id] = {'status': 'SUCCESS', 'result': result}
+
+        catalog = get_game_catalog()
+        catalog_entry = catalog.get_game(game_filename) or {}
+        existing_exe = catalog_entry.get('executable')
+        if existing_exe and os.path.exists(os.path.join(backend_dir, "games", existing_exe)):
+            # save_game resolved this to an identical game that is already built
+            logger.info(f"[{task_id}] Reusing existing build {existing_exe}")
+            final_exe_path = os.path.join(backend_dir, "games", existing_exe)
+        else:
+            with scheduler.stage("packaging"), progress.stage("package"):
+                final_exe_path = packager.package(
+                    os.path.abspath(filepath), game_name, os.path.join(backend_dir, "games"),
+                    asset_files=sprite_asset_files(game_package.get('assets', {})),
+                    job_id=task_id
+                )
+            logger.info(f"[{task_id}] Packaging finished.")
+            catalog.set_executable(game_filename, os.path.basename(final_exe_path))
+
         exe_filename_only = os.path.basename(final_exe_path)
 
         result = {
@@ -137,52 +172,221 @@ def run_game_generation(task_id: str, request: GenerationRequest):
             "python_script": exe_filename_only, 
             "executable_file": exe_filename_only
         }
-        tasks[task_id] = {'status': 'SUCCESS', 'result': result}
+        progress.set_status('SUCCESS', result)
+        if request_cache:
+            request_cache.add(theme, result)
         logger.info(f"[{task_id}] Game generation successful.")
 
+    except BuildCancelled:
+        logger.info(f"[{task_id}] Game generation cancelled.")
+        progress.set_status('CANCELLED', {'error': 'Generation was cancelled.'})
     except Exception as e:
         logger.error(f"Error during game generation for task {task_id}: {e}")
-        tasks[task_id] = {'status': 'FAILURE', 'result': {'error': str(e)}}
+        progress.set_status('FAILURE', {'error': str(e)})
+
+def find_reusable_result(request: GenerationRequest):
+    """Result of an earlier request with a near-identical theme whose executable still exists"""
+    if not request_cache or not request.reuseExisting:
+        return None
+    theme = request_theme(request)
+    match = request_cache.lookup(theme, float(config.get("request_cache.similarity_threshold", 0.9)))
+    if not match:
+        return None
+    backend_dir = os.path.dirname(os.path.abspath(__file__))
+    executable = match['result'].get('executable_file')
+    if not executable or not os.path.exists(os.path.join(backend_dir, "games", executable)):
+        request_cache.forget(match['theme'])
+        return None
+    return match
+
 
 @app.post("/api/generate/start")
-async def start_generation_endpoint(request: GenerationRequest, background_tasks: BackgroundTasks):
+async def start_generation_endpoint(request: GenerationRequest):
     """
-    Starts the game generation as a background task and returns a task ID.
+    Queues the game generation on the job scheduler and returns a task ID.
+    A theme close enough to an earlier request completes immediately with that game,
+    unless reuseExisting is false.
+    Responds with 429 and a Retry-After header when the queue is full.
     """
     task_id = str(uuid.uuid4())
-    tasks[task_id] = {'status': 'PENDING', 'result': None}
-    background_tasks.add_task(run_game_generation, task_id, request)
+    task_store.set(task_id, {'status': 'PENDING', 'result': None})
+
+    reused = find_reusable_result(request)
+    if reused:
+        logger.info(f"[{task_id}] Reusing game for similar theme '{reused['theme']}' ({reused['similarity']})")
+        result = dict(reused['result'], reused_from=reused['theme'], similarity=reused['similarity'])
+        ProgressReporter(task_store, task_id, progress_broker).set_status('SUCCESS', result)
+        return {"task_id": task_id, "queue_position": 0}
+
+    try:
+        position = scheduler.submit(task_id, run_game_generation, task_id, request)
+    except QueueFullError as e:
+        task_store.delete(task_id)
+        logger.warning(f"Rejected generation request: {e}")
+        return JSONResponse(
+            status_code=429,
+            content={"error": "Server is busy, please retry later.", "retry_after": e.retry_after},
+            headers={"Retry-After": str(e.retry_after)}
+        )
     
-    return {"task_id": task_id}
+    return {"task_id": task_id, "queue_position": position}
 
 @app.get("/api/generate/status/{task_id}")
 async def get_generation_status(task_id: str):
     """
     Checks the status of a game generation task.
     """
-    task = tasks.get(task_id)
+    task = task_store.get(task_id)
     if not task:
         return {"error": "Task not found."}
+    # Queue positions are only known to the worker process that holds the job
+    position = scheduler.queue_position(task_id)
+    if position is not None:
+        task['queue_position'] = position
     return task
 
 
+@app.post("/api/generate/cancel/{task_id}")
+async def cancel_generation(task_id: str):
+    """
+    Cancels a queued task, or stops its packaging build.
+    A task still in the LLM stage is stopped before packaging starts.
+    """
+    task = task_store.get(task_id)
+    if not task:
+        return JSONResponse(status_code=404, content={"error": "Task not found."})
+    if task['status'] in FINISHED_STATUSES:
+        return {"task_id": task_id, "status": task['status']}
+
+    if scheduler.cancel(task_id):
+        ProgressReporter(task_store, task_id, progress_broker).set_status('CANCELLED', {'error': 'Generation was cancelled.'})
+        return {"task_id": task_id, "status": 'CANCELLED'}
+
+    # The worker that owns the task polls this flag; a build running in this worker stops right away
+    task_store.update(task_id, cancel_requested=True)
+    packager.cancel(task_id)
+    return {"task_id": task_id, "status": 'CANCELLING'}
+
+
+@app.on_event("shutdown")
+def shutdown_packager():
+    packager.shutdown()
+
+
+async def iter_task_events(task_id: str, last_seq: int = 0):
+    """
+    Yields progress events of a task as they happen, ending after SUCCESS or FAILURE.
+    Yields None on idle intervals so transports can send keepalives.
+    """
+    with progress_broker.subscribe(task_id) as subscription:
+        last_position = None
+        while True:
+            task = task_store.get(task_id)
+            if not task:
+                yield {"stage": "error", "status": "FAILURE", "result": {"error": "Task not found."}}
+                return
+
+            for event in task.get('events', [])[last_seq:]:
+                last_seq = event["seq"]
+                yield event
+
+            if task['status'] in FINISHED_STATUSES:
+                return
+
+            position = scheduler.queue_position(task_id)
+            if position is not None and position != last_position:
+                last_position = position
+                yield {"stage": "queued", "status": task['status'], "queue_position": position}
+
+            if not await subscription.wait(EVENT_POLL_SECONDS):
+                yield None
+
+
+@app.get("/api/generate/events/{task_id}")
+async def stream_generation_events(task_id: str, request: Request):
+    """
+    Server-Sent Events stream of stage transitions for a generation task.
+    Supports resuming with the Last-Event-ID header.
+    """
+    try:
+        last_seq = int(request.headers.get("last-event-id", 0))
+    except ValueError:
+        last_seq = 0
+
+    async def event_stream():
+        async for event in iter_task_events(task_id, last_seq):
+            if await request.is_disconnected():
+                break
+            if event is None:
+                yield ": keepalive\n\n"
+                continue
+            event_id = f"id: {event['seq']}\n" if "seq" in event else ""
+            yield f"{event_id}event: progress\ndata: {json.dumps(event)}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.websocket("/api/generate/ws/{task_id}")
+async def generation_events_websocket(websocket: WebSocket, task_id: str):
+    """
+    WebSocket variant of the progress stream; sends each event as a JSON message.
+    """
+    await websocket.accept()
+    try:
+        async for event in iter_task_events(task_id):
+            if event is not None:
+                await websocket.send_json(event)
+        await websocket.close()
+    except WebSocketDisconnect:
+        logger.info(f"[{task_id}] Progress WebSocket disconnected")
+
+
+@app.get("/api/metrics")
+async def get_metrics():
+    """
+    Operational counters for the generation pipeline.
+    """
+    cache = get_response_cache()
+    return {
+        "scheduler": scheduler.stats(),
+        "response_cache": cache.stats() if cache else None,
+        "gemini_quota": rate_limiter.headroom() if rate_limiter else None,
+    }
+
+
+@app.get("/api/games")
+async def list_games_endpoint(genre: Optional[str] = None, theme: Optional[str] = None, q: Optional[str] = None,
+                              created_after: Optional[str] = None, created_before: Optional[str] = None,
+                              limit: int = 50, offset: int = 0):
+    """
+    Lists generated games newest first, filtered by genre, theme, title search (q) and creation time.
+    """
+    return get_game_catalog().query(
+        genre=genre, theme=theme, search=q, created_after=created_after, created_before=created_before,
+        limit=limit, offset=offset
+    )
+
+
 @app.get("/api/game/{game_filename}")
-async def download_game_file(game_filename: str):
+async def download_game_file(game_filename: str, request: Request):
     """
     Serves the generated game file for download.
     """
     games_dir = "games"
     game_filename = os.path.basename(game_filename)
     filepath = os.path.join(games_dir, game_filename)
-    
-    if os.path.exists(filepath):
-        return FileResponse(path=filepath, media_type='application/octet-stream', filename=game_filename)
-    
-    return {"error": "File not found."}
+    return await file_download_response(request, filepath, 'application/octet-stream', game_filename)
 
 
 @app.get("/api/game/download/{game_filename}")
-async def download_executable_file(game_filename: str):
+async def download_executable_file(game_filename: str, request: Request):
+    """
+    Serves a packaged executable; supports resuming with Range and revalidating with If-None-Match.
+    """
     # Get the absolute path of the directory where main.py is running
     backend_dir = os.path.dirname(os.path.abspath(__file__))
     
@@ -190,20 +394,11 @@ async def download_executable_file(game_filename: str):
     games_dir = "games"
     filepath = os.path.join(backend_dir, games_dir, os.path.basename(game_filename))
     
-    # DEBUG: Log the exact path being checked
-    logger.info(f"Checking for file at: {filepath}")
-    
-    # Check for file existence
-    if os.path.exists(filepath):
-        logger.info(f"File FOUND. Serving: {game_filename}")
-        return FileResponse(
-            path=filepath, 
-            media_type='application/vnd.microsoft.portable-executable', 
-            filename=game_filename
-        )
-    
-    logger.error(f"File NOT found: {filepath}")
-    return {"error": "File not found."}
+    logger.info(f"Serving download: {filepath}")
+    return await file_download_response(
+        request, filepath, EXE_MEDIA_TYPE, os.path.basename(game_filename),
+        content_digest=True
+    )
 
 # --- Existing CLI Code ---
 
@@ -221,7 +416,7 @@ class GameGeneratorCLI:
     def setup_api_key(self, api_key: Optional[str] = None):
         """Setup Gemini API key"""
         self.api_key = api_key or os.getenv('GEMINI_API_KEY')
-        if not self.api_key:
+        if not self.api_key and config.get("gemini.backend") != "replay":
             print("Error: Gemini API key not found!")
             print("Please set the GEMINI_API_KEY environment variable or provide it as an argument.")
             print("You can get an API key from: https://makersuite.google.com/app/apikey")
@@ -313,37 +508,26 @@ class GameGeneratorCLI:
     
     def list_games(self):
         """List all generated games"""
-        games_dir = "games"
-        if not os.path.exists(games_dir):
-            print("📁 No games directory found. Create some games first!")
+        catalog = get_game_catalog()
+        total = catalog.count()
+        if total == 0:
+            print("No games found. Create some games first!")
             return
         
-        print(f"\n📁 Generated Games in {games_dir}:")
+        print(f"\n📁 Generated Games ({total}):")
         print("-" * 50)
         
-        game_files = []
-        for filename in os.listdir(games_dir):
-            if filename.endswith('.py'):
-                filepath = os.path.join(games_dir, filename)
-                metadata_path = filepath.replace('.py', '_metadata.json')
-                
-                if os.path.exists(metadata_path):
-                    try:
-                        with open(metadata_path, 'r') as f:
-                            metadata = json.load(f)
-                        title = metadata.get('concept', {}).get('title', 'Unknown')
-                        created_at = metadata.get('created_at', 'Unknown')
-                        print(f"🎮 {title}")
-                        print(f"   📁 {filename}")
-                        print(f"   📅 {created_at}")
-                        print()
-                    except Exception as e:
-                        print(f"📄 {filename} (metadata error)")
-                else:
-                    print(f"📄 {filename}")
-        
-        if not game_files:
-            print("No games found. Create some games first!")
+        offset = 0
+        while offset < total:
+            page = catalog.query(limit=catalog.MAX_PAGE_SIZE, offset=offset)
+            if not page["games"]:
+                break
+            for game in page["games"]:
+                print(f"🎮 {game['title']}")
+                print(f"   📁 {game['game_id']}")
+                print(f"   📅 {game['created_at'] or 'Unknown'}")
+                print()
+            offset += len(page["games"])
     
     def interactive_mode(self):
         """Interactive mode for game creation"""
@@ -405,12 +589,36 @@ def main_cli():
     parser.add_argument("--run", help="Run a specific game file")
     parser.add_argument("--interactive", action="store_true", help="Start interactive mode")
     parser.add_argument("--server", action="store_true", help="Run the FastAPI web server")
+    parser.add_argument("--workers", type=int, default=1, help="Number of server worker processes")
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the Gemini response cache")
+    parser.add_argument("--backend", choices=["live", "record", "replay"],
+                        help="Model backend: live Gemini, live with recording, or offline replay")
+    parser.add_argument("--replay-latency", type=float, help="Injected latency in seconds per replayed model call")
+    parser.add_argument("--dev", action="store_true", help="Development mode: reload code templates when they change")
     
     args = parser.parse_args()
     
+    # Overrides are exported through the environment as well, so extra server workers pick them up
+    if args.no_cache:
+        os.environ["RESPONSE_CACHE_ENABLED"] = "false"
+        config.set("cache.enabled", False)
+    if args.backend:
+        os.environ["GEMINI_BACKEND"] = args.backend
+        config.set("gemini.backend", args.backend)
+    if args.replay_latency is not None:
+        os.environ["GEMINI_REPLAY_LATENCY"] = str(args.replay_latency)
+        config.set("gemini.replay_latency", args.replay_latency)
+    if args.dev:
+        os.environ["TEMPLATES_HOT_RELOAD"] = "true"
+        config.set("templates.hot_reload", True)
+
     if args.server:
         print("🚀 Starting FastAPI server...")
-        uvicorn.run(app, host="0.0.0.0", port=8000)
+        if args.workers > 1:
+            # Multiple workers need an import string; task state is shared through the task store
+            uvicorn.run("main:app", host="0.0.0.0", port=8000, workers=args.workers)
+        else:
+            uvicorn.run(app, host="0.0.0.0", port=8000)
         return 0
 
     cli = GameGeneratorCLI()
@@ -0,0 +1,59 @@
+"""
+Game Download Responses
+Serves built games with strong ETags, conditional requests and HTTP Range support
+"""
+
+import os
+
+import anyio
+from fastapi import Request
+from fastapi.responses import FileResponse, JSONResponse, Response
+import logging
+
+from services.packaging import artifact_digest
+
+logger = logging.getLogger(__name__)
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    candidates = [tag.strip() for tag in header.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+async def _etag(path: str, stat: os.stat_result, content_digest: bool) -> str:
+    """
+    Content digest for packaged executables (recorded at build time, or hashed once off the event
+    loop); other files get a validator from their modification time and size, and no sidecar file
+    """
+    if content_digest:
+        return f'"{await anyio.to_thread.run_sync(artifact_digest, path)}"'
+    return f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+
+
+async def file_download_response(request: Request, path: str, media_type: str, filename: str,
+                                 content_digest: bool = False) -> Response:
+    """
+    Response for a built artifact: 304 when the client's copy is current, otherwise
+    FileResponse, which serves byte ranges natively and hands whole-file transfers to
+    the server's sendfile path when it has one.
+    """
+    if not os.path.isfile(path):
+        return JSONResponse(status_code=404, content={"error": "File not found."})
+
+    stat = os.stat(path)
+    etag = await _etag(path, stat, content_digest)
+    headers = {
+        "ETag": etag,
+        "Accept-Ranges": "bytes",
+        # Artifacts are immutable per ETag, but a game can be regenerated under the same name
+        "Cache-Control": "no-cache",
+    }
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+
+    # FileResponse answers Range requests itself (206, or 416 when unsatisfiable) and checks
+    # If-Range against the ETag given here, so a partial copy of another build gets the whole file
+    return FileResponse(path=path, media_type=media_type, filename=filename, headers=headers,
+                        stat_result=stat)
@@ -0,0 +1,302 @@
+"""
+Game Catalog Index
+SQLite index of generated games, updated on save, so listing never scans the games directory
+"""
+
+import os
+import json
+import sqlite3
+import threading
+from typing import Any, Dict, List, Optional
+import logging
+
+from config import config
+from services.game_dedup import (
+    content_hash, estimate_similarity, lsh_buckets, minhash_signature, pack_signature, unpack_signature
+)
+
+logger = logging.getLogger(__name__)
+
+_COLUMNS = ["game_id", "kind", "title", "description", "genre", "theme", "created_at", "executable",
+            "content_hash", "near_duplicate_of", "duplicate_saves"]
+
+# Columns added after the first catalog schema, created on open if missing
+_MIGRATIONS = {
+    "content_hash": "TEXT",
+    "signature": "BLOB",
+    "near_duplicate_of": "TEXT",
+    "duplicate_saves": "INTEGER NOT NULL DEFAULT 0",
+}
+
+
+class GameCatalog:
+    """Index of saved games supporting filtered, paginated queries"""
+
+    MAX_PAGE_SIZE = 200
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._local = threading.local()
+
+        directory = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(directory, exist_ok=True)
+
+        conn = self._connection()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS games (
+                game_id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                title TEXT NOT NULL,
+                description TEXT,
+                genre TEXT,
+                theme TEXT,
+                created_at TEXT NOT NULL,
+                executable TEXT
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_games_created_at ON games (created_at)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_games_genre ON games (genre, created_at)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_games_theme ON games (theme, created_at)")
+        existing_columns = {row[1] for row in conn.execute("PRAGMA table_info(games)")}
+        for column, definition in _MIGRATIONS.items():
+            if column not in existing_columns:
+                conn.execute(f"ALTER TABLE games ADD COLUMN {column} {definition}")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_games_content_hash ON games (content_hash)")
+        # Locality-sensitive hashing buckets of each game's MinHash signature
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS game_buckets (
+                band INTEGER NOT NULL,
+                bucket TEXT NOT NULL,
+                game_id TEXT NOT NULL,
+                PRIMARY KEY (band, bucket, game_id)
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_game_buckets_game ON game_buckets (game_id)")
+        self.fts_enabled = self._create_title_index(conn)
+
+    def _create_title_index(self, conn: sqlite3.Connection) -> bool:
+        """Trigram full-text index on titles; substring search falls back to LIKE without FTS5"""
+        existed = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'games_fts'").fetchone()
+        try:
+            conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS games_fts USING fts5("
+                         "title, content='games', content_rowid='rowid', tokenize='trigram')")
+        except sqlite3.OperationalError as e:
+            logger.info(f"FTS5 trigram index unavailable, title search will scan: {e}")
+            return False
+        conn.execute("""
+            CREATE TRIGGER IF NOT EXISTS games_fts_insert AFTER INSERT ON games BEGIN
+                INSERT INTO games_fts (rowid, title) VALUES (new.rowid, new.title);
+            END
+        """)
+        conn.execute("""
+            CREATE TRIGGER IF NOT EXISTS games_fts_delete AFTER DELETE ON games BEGIN
+                INSERT INTO games_fts (games_fts, rowid, title) VALUES ('delete', old.rowid, old.title);
+            END
+        """)
+        conn.execute("""
+            CREATE TRIGGER IF NOT EXISTS games_fts_update AFTER UPDATE ON games BEGIN
+                INSERT INTO games_fts (games_fts, rowid, title) VALUES ('delete', old.rowid, old.title);
+                INSERT INTO games_fts (rowid, title) VALUES (new.rowid, new.title);
+            END
+        """)
+        if not existed:
+            conn.execute("INSERT INTO games_fts (games_fts) VALUES ('rebuild')")
+        return True
+
+    def _connection(self) -> sqlite3.Connection:
+        """One connection per thread; SQLite connections must not be shared across threads"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def add_game(self, game_id: str, metadata: Dict[str, Any], kind: str = "game",
+                 signature: Optional[List[int]] = None, near_duplicate_of: Optional[str] = None):
+        """Index a saved game from its metadata (the *_metadata.json contents)"""
+        concept = metadata.get("concept", {}) or {}
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT INTO games (game_id, kind, title, description, genre, theme, created_at, "
+                "content_hash, signature, near_duplicate_of) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(game_id) DO UPDATE SET kind = excluded.kind, title = excluded.title, "
+                "description = excluded.description, genre = excluded.genre, theme = excluded.theme, "
+                "created_at = excluded.created_at, content_hash = excluded.content_hash, "
+                "signature = excluded.signature, near_duplicate_of = excluded.near_duplicate_of",
+                (
+                    game_id,
+                    kind,
+                    concept.get("title", "Unknown"),
+                    concept.get("description", ""),
+                    (concept.get("genre") or "").lower() or None,
+                    metadata.get("theme") or concept.get("theme"),
+                    metadata.get("created_at") or "",
+                    metadata.get("content_hash"),
+                    pack_signature(signature) if signature else None,
+                    near_duplicate_of,
+                )
+            )
+            conn.execute("DELETE FROM game_buckets WHERE game_id = ?", (game_id,))
+            if signature:
+                conn.executemany(
+                    "INSERT OR IGNORE INTO game_buckets (band, bucket, game_id) VALUES (?, ?, ?)",
+                    [(band, bucket, game_id) for band, bucket in enumerate(lsh_buckets(signature))]
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def get_game(self, game_id: str) -> Optional[Dict[str, Any]]:
+        row = self._connection().execute(
+            f"SELECT {', '.join(_COLUMNS)} FROM games WHERE game_id = ?", (game_id,)
+        ).fetchone()
+        return dict(zip(_COLUMNS, row)) if row else None
+
+    def find_by_hash(self, digest: str) -> Optional[Dict[str, Any]]:
+        """Oldest game with exactly this content hash"""
+        row = self._connection().execute(
+            f"SELECT {', '.join(_COLUMNS)} FROM games WHERE content_hash = ? ORDER BY created_at LIMIT 1",
+            (digest,)
+        ).fetchone()
+        return dict(zip(_COLUMNS, row)) if row else None
+
+    def record_duplicate_save(self, game_id: str):
+        """Count a save that was resolved to an existing identical game"""
+        self._connection().execute(
+            "UPDATE games SET duplicate_saves = duplicate_saves + 1 WHERE game_id = ?", (game_id,)
+        )
+
+    def find_near_duplicate(self, signature: List[int], threshold: float) -> Optional[Dict[str, Any]]:
+        """Most similar indexed game whose estimated code similarity reaches the threshold"""
+        buckets = lsh_buckets(signature)
+        conn = self._connection()
+        candidates = conn.execute(
+            "SELECT DISTINCT g.game_id, g.signature FROM game_buckets b JOIN games g ON g.game_id = b.game_id "
+            "WHERE " + " OR ".join(["(b.band = ? AND b.bucket = ?)"] * len(buckets)),
+            [value for band, bucket in enumerate(buckets) for value in (band, bucket)]
+        ).fetchall()
+
+        best_id, best_score = None, threshold
+        for game_id, blob in candidates:
+            if not blob:
+                continue
+            score = estimate_similarity(signature, unpack_signature(blob))
+            if score >= best_score:
+                best_id, best_score = game_id, score
+        if best_id is None:
+            return None
+        return {"game_id": best_id, "similarity": round(best_score, 3)}
+
+    def set_executable(self, game_id: str, executable: str):
+        """Link a packaged executable to its game"""
+        self._connection().execute("UPDATE games SET executable = ? WHERE game_id = ?", (executable, game_id))
+
+    def remove_game(self, game_id: str):
+        conn = self._connection()
+        conn.execute("DELETE FROM game_buckets WHERE game_id = ?", (game_id,))
+        conn.execute("DELETE FROM games WHERE game_id = ?", (game_id,))
+
+    def count(self) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM games").fetchone()[0]
+
+    def query(self, genre: Optional[str] = None, theme: Optional[str] = None, search: Optional[str] = None,
+              created_after: Optional[str] = None, created_before: Optional[str] = None,
+              limit: int = 50, offset: int = 0) -> Dict[str, Any]:
+        """Newest-first page of games matching the filters, with the total number of matches"""
+        clauses, params = [], []
+        if genre:
+            clauses.append("genre = ?")
+            params.append(genre.lower())
+        if theme:
+            clauses.append("theme LIKE ?")
+            params.append(f"%{theme}%")
+        if search and self.fts_enabled and len(search) >= 3:
+            # Trigram matching needs at least three characters
+            clauses.append("rowid IN (SELECT rowid FROM games_fts WHERE games_fts MATCH ?)")
+            params.append('"' + search.replace('"', '""') + '"')
+        elif search:
+            clauses.append("title LIKE ?")
+            params.append(f"%{search}%")
+        # created_at is ISO 8601, so string comparison orders it chronologically
+        if created_after:
+            clauses.append("created_at >= ?")
+            params.append(created_after)
+        if created_before:
+            clauses.append("created_at < ?")
+            params.append(created_before)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+        limit = max(1, min(int(limit), self.MAX_PAGE_SIZE))
+        offset = max(0, int(offset))
+        conn = self._connection()
+        total = conn.execute(f"SELECT COUNT(*) FROM games {where}", params).fetchone()[0]
+        rows = conn.execute(
+            f"SELECT {', '.join(_COLUMNS)} FROM games {where} "
+            f"ORDER BY created_at DESC, game_id DESC LIMIT ? OFFSET ?",
+            params + [limit, offset]
+        ).fetchall()
+        return {
+            "total": total,
+            "limit": limit,
+            "offset": offset,
+            "games": [dict(zip(_COLUMNS, row)) for row in rows],
+        }
+
+    def reindex(self, games_dir: str) -> int:
+        """Index every game already on disk; used once to backfill an empty catalog"""
+        if not os.path.isdir(games_dir):
+            return 0
+        indexed = 0
+        for filename in os.listdir(games_dir):
+            path = os.path.join(games_dir, filename)
+            if filename.endswith('_metadata.json'):
+                game_id, kind = filename[:-len('_metadata.json')] + '.py', "game"
+                metadata_path = path
+            elif os.path.isdir(path) and os.path.exists(os.path.join(path, "metadata.json")):
+                game_id, kind = filename, "complete"
+                metadata_path = os.path.join(path, "metadata.json")
+            else:
+                continue
+            try:
+                with open(metadata_path, 'r') as f:
+                    metadata = json.load(f)
+                signature = None
+                code_path = os.path.join(games_dir, game_id) if kind == "game" else os.path.join(path, "main.py")
+                if os.path.exists(code_path):
+                    with open(code_path, 'r', encoding='utf-8') as f:
+                        code = f.read()
+                    metadata.setdefault("content_hash", content_hash(code, metadata.get("concept", {})))
+                    signature = minhash_signature(code)
+                self.add_game(game_id, metadata, kind, signature=signature)
+                indexed += 1
+            except Exception as e:
+                logger.warning(f"Skipping unreadable game metadata {metadata_path}: {e}")
+        return indexed
+
+
+_shared_catalog: Optional[GameCatalog] = None
+_shared_catalog_lock = threading.Lock()
+
+
+def get_game_catalog() -> GameCatalog:
+    """Process-wide game catalog; backfills from the games directory the first time it is created"""
+    global _shared_catalog
+    with _shared_catalog_lock:
+        if _shared_catalog is None:
+            db_path = config.get("catalog.path", "data/games.db")
+            if not os.path.isabs(db_path):
+                backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+                db_path = os.path.join(backend_dir, db_path)
+            catalog = GameCatalog(db_path)
+            if catalog.count() == 0:
+                indexed = catalog.reindex(config.get("directories.games", "games"))
+                if indexed:
+                    logger.info(f"Indexed {indexed} existing games into the catalog")
+            _shared_catalog = catalog
+        return _shared_catalog
@@ -0,0 +1,94 @@
+"""
+Duplicate Detection for Generated Games
+Content hashes for exact duplicates and MinHash signatures over code tokens for near-duplicates
+"""
+
+import re
+import json
+import struct
+import hashlib
+from typing import Any, Dict, List
+
+NUM_PERMUTATIONS = 64
+# 16 bands of 4 rows: pairs above ~0.5 similarity share a bucket with high probability
+LSH_BANDS = 16
+LSH_ROWS = NUM_PERMUTATIONS // LSH_BANDS
+SHINGLE_SIZE = 5
+
+_MAX_HASH = (1 << 32) - 1
+_PRIME = 4294967311  # smallest prime above 2**32
+_TOKEN_PATTERN = re.compile(r"[A-Za-z_]\w*|\d+(?:\.\d+)?|\S")
+_COMMENT_PATTERN = re.compile(r"#[^\n]*")
+
+
+def _permutations():
+    """Fixed (a, b) pairs for the universal hashes h(x) = (a*x + b) mod p"""
+    params = []
+    for i in range(NUM_PERMUTATIONS):
+        seed = hashlib.sha256(f"minhash-{i}".encode()).digest()
+        a, b = struct.unpack("<II", seed[:8])
+        params.append((a | 1, b))
+    return params
+
+
+_PERMUTATIONS = _permutations()
+
+
+def _normalize(value: Any) -> Any:
+    if isinstance(value, str):
+        return " ".join(value.lower().split())
+    if isinstance(value, dict):
+        return {k: _normalize(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_normalize(v) for v in value]
+    return value
+
+
+def content_hash(code: str, concept: Dict[str, Any]) -> str:
+    """Identifies a game by its script and normalized concept; identical games share a hash"""
+    digest = hashlib.sha256()
+    digest.update(code.strip().encode('utf-8'))
+    digest.update(b"\0")
+    digest.update(json.dumps(_normalize(concept or {}), sort_keys=True).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def code_shingles(code: str) -> set:
+    """Hashed runs of SHINGLE_SIZE consecutive code tokens, ignoring comments and layout"""
+    tokens = _TOKEN_PATTERN.findall(_COMMENT_PATTERN.sub("", code))
+    if len(tokens) < SHINGLE_SIZE:
+        tokens = tokens + [""] * (SHINGLE_SIZE - len(tokens))
+    shingles = set()
+    for i in range(len(tokens) - SHINGLE_SIZE + 1):
+        shingle = " ".join(tokens[i:i + SHINGLE_SIZE]).encode('utf-8')
+        shingles.add(struct.unpack("<I", hashlib.blake2b(shingle, digest_size=4).digest())[0])
+    return shingles
+
+
+def minhash_signature(code: str) -> List[int]:
+    """MinHash signature of the code's token shingles"""
+    shingles = code_shingles(code)
+    return [min((a * x + b) % _PRIME for x in shingles) & _MAX_HASH for a, b in _PERMUTATIONS]
+
+
+def estimate_similarity(signature_a: List[int], signature_b: List[int]) -> float:
+    """Estimated Jaccard similarity of the two shingle sets"""
+    matches = sum(1 for a, b in zip(signature_a, signature_b) if a == b)
+    return matches / len(signature_a)
+
+
+def lsh_buckets(signature: List[int]) -> List[str]:
+    """One bucket key per band; similar signatures collide in at least one band"""
+    buckets = []
+    for band in range(LSH_BANDS):
+        rows = signature[band * LSH_ROWS:(band + 1) * LSH_ROWS]
+        buckets.append(hashlib.blake2b(struct.pack(f"<{LSH_ROWS}I", *rows), digest_size=8).hexdigest())
+    return buckets
+
+
+def pack_signature(signature: List[int]) -> bytes:
+    return struct.pack(f"<{NUM_PERMUTATIONS}I", *signature)
+
+
+def unpack_signature(blob: bytes) -> List[int]:
+    return list(struct.unpack(f"<{NUM_PERMUTATIONS}I", blob))
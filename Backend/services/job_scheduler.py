@@ -0,0 +1,129 @@
+"""
+Generation Job Scheduler
+Runs game generation jobs on dedicated worker threads with a bounded queue and per-stage concurrency limits
+"""
+
+import time
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional
+import logging
+
+from config import config
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFullError(Exception):
+    """Raised when the scheduler cannot accept another job"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Generation queue is full, retry after {retry_after} seconds")
+        self.retry_after = retry_after
+
+
+class GenerationScheduler:
+    """Bounded job queue with separate concurrency limits for the LLM and packaging stages"""
+
+    def __init__(self, llm_concurrency: int = 2, packaging_concurrency: int = 1,
+                 max_queue: int = 16, retry_after: int = 30):
+        self.max_queue = max_queue
+        self.retry_after = retry_after
+        self._stages: Dict[str, threading.BoundedSemaphore] = {
+            "llm": threading.BoundedSemaphore(llm_concurrency),
+            "packaging": threading.BoundedSemaphore(packaging_concurrency),
+        }
+        # One worker per stage slot, so a job waiting on packaging never blocks an LLM slot
+        self.num_workers = llm_concurrency + packaging_concurrency
+        self._pending: "OrderedDict[str, tuple]" = OrderedDict()
+        self._running = set()
+        self._condition = threading.Condition()
+        self._workers = []
+        self._avg_job_seconds: Optional[float] = None
+
+    def _start_workers(self):
+        """Start worker threads on first use"""
+        for i in range(self.num_workers):
+            worker = threading.Thread(target=self._worker_loop, name=f"generation-worker-{i}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+
+    def submit(self, task_id: str, func: Callable, *args) -> int:
+        """Queue a job and return its 1-based queue position"""
+        with self._condition:
+            if len(self._pending) >= self.max_queue:
+                raise QueueFullError(self.estimate_retry_after())
+            if not self._workers:
+                self._start_workers()
+            self._pending[task_id] = (func, args)
+            self._condition.notify()
+            return len(self._pending)
+
+    def queue_position(self, task_id: str) -> Optional[int]:
+        """1-based position of a queued job, or None if it is running, finished or unknown"""
+        with self._condition:
+            for position, pending_id in enumerate(self._pending, 1):
+                if pending_id == task_id:
+                    return position
+        return None
+
+    def cancel(self, task_id: str) -> bool:
+        """Drop a job that has not started yet; returns False if it is running or unknown"""
+        with self._condition:
+            return self._pending.pop(task_id, None) is not None
+
+    def estimate_retry_after(self) -> int:
+        """Seconds until a queue slot is likely to free up"""
+        if self._avg_job_seconds is None:
+            return self.retry_after
+        return max(1, int(self._avg_job_seconds / self.num_workers))
+
+    @contextmanager
+    def stage(self, name: str):
+        """Hold one of the concurrency slots for a pipeline stage ("llm" or "packaging")"""
+        semaphore = self._stages[name]
+        semaphore.acquire()
+        try:
+            yield
+        finally:
+            semaphore.release()
+
+    def stats(self) -> Dict[str, int]:
+        """Current queue depth and number of running jobs"""
+        with self._condition:
+            return {"queued": len(self._pending), "running": len(self._running), "max_queue": self.max_queue}
+
+    def _worker_loop(self):
+        while True:
+            with self._condition:
+                while not self._pending:
+                    self._condition.wait()
+                task_id, (func, args) = self._pending.popitem(last=False)
+                self._running.add(task_id)
+
+            started = time.monotonic()
+            try:
+                func(*args)
+            except Exception as e:
+                logger.error(f"[{task_id}] Unhandled error in generation job: {e}")
+            finally:
+                elapsed = time.monotonic() - started
+                with self._condition:
+                    self._running.discard(task_id)
+                    # Exponentially weighted average keeps Retry-After estimates current
+                    if self._avg_job_seconds is None:
+                        self._avg_job_seconds = elapsed
+                    else:
+                        self._avg_job_seconds = 0.8 * self._avg_job_seconds + 0.2 * elapsed
+
+
+def create_scheduler() -> GenerationScheduler:
+    """Build the scheduler using the configured limits"""
+    scheduler_config = config.get("scheduler", {})
+    return GenerationScheduler(
+        llm_concurrency=int(scheduler_config.get("llm_concurrency", 2)),
+        packaging_concurrency=int(scheduler_config.get("packaging_concurrency", 1)),
+        max_queue=int(scheduler_config.get("max_queue", 16)),
+        retry_after=int(scheduler_config.get("retry_after_seconds", 30)),
+    )
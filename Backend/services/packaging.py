@@ -0,0 +1,359 @@
+"""
+Game Packaging Service
+Turns generated game scripts into standalone executables, reusing a prebuilt pygame runtime
+and running PyInstaller builds on a process pool with an isolated workdir per build
+"""
+
+import os
+import sys
+import ast
+import time
+import shutil
+import hashlib
+import zipfile
+import tempfile
+import threading
+import subprocess
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, Iterable, List, Optional
+import logging
+
+from config import config
+
+logger = logging.getLogger(__name__)
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LAUNCHER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "runtime_launcher.py")
+EXE_SUFFIX = ".exe" if os.name == "nt" else ""
+# Executables built on Linux and macOS are plain binaries without a suffix
+EXE_MEDIA_TYPE = "application/vnd.microsoft.portable-executable" if EXE_SUFFIX else "application/octet-stream"
+
+# Modules bundled into the shared runtime. Games importing anything else get a full PyInstaller build.
+RUNTIME_MODULES = [
+    "pygame", "math", "random", "json", "time", "enum", "dataclasses", "collections", "itertools",
+    "functools", "typing", "re", "string", "datetime", "copy", "heapq", "abc", "os", "sys",
+]
+
+
+# Content hash of each artifact, written next to it at build time and used as its ETag
+DIGEST_SUFFIX = ".sha256"
+
+# A build stops as soon as this file appears in its workdir
+CANCEL_MARKER = "CANCELLED"
+CANCEL_POLL_SECONDS = 0.5
+
+
+class PackagingError(Exception):
+    """Raised when a game could not be packaged"""
+
+
+class BuildCancelled(PackagingError):
+    """Raised when a build was cancelled before it finished"""
+
+
+class BuildTimeout(PackagingError):
+    """Raised when a build ran longer than the configured timeout"""
+
+
+def find_pyinstaller() -> str:
+    """Path of the PyInstaller executable"""
+    pyinstaller_exe_path = os.path.expanduser("~/AppData/Roaming/Python/Python312/Scripts/pyinstaller.exe")
+    if not os.path.exists(pyinstaller_exe_path):
+        pyinstaller_exe_path = "pyinstaller"
+    return pyinstaller_exe_path
+
+
+def script_imports(script: str) -> List[str]:
+    """Top-level module names imported by a script"""
+    modules = set()
+    for node in ast.walk(ast.parse(script)):
+        if isinstance(node, ast.Import):
+            modules.update(alias.name.split('.')[0] for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            modules.add(node.module.split('.')[0])
+    return sorted(modules)
+
+
+def file_digest(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def record_artifact_digest(path: str) -> str:
+    """Hash a finished artifact and store the digest beside it"""
+    digest = file_digest(path)
+    with open(path + DIGEST_SUFFIX, 'w') as f:
+        f.write(digest)
+    return digest
+
+
+def artifact_digest(path: str) -> str:
+    """Digest recorded at build time; artifacts built before digests existed are hashed once on demand"""
+    digest_path = path + DIGEST_SUFFIX
+    if os.path.exists(digest_path) and os.path.getmtime(digest_path) >= os.path.getmtime(path):
+        with open(digest_path, 'r') as f:
+            return f.read().strip()
+    return record_artifact_digest(path)
+
+
+def publish_atomically(source: str, final_path: str):
+    """Move a finished artifact into place without exposing a partial file"""
+    output_dir = os.path.dirname(final_path)
+    fd, temp_path = tempfile.mkstemp(prefix=".packaging_", dir=output_dir)
+    os.close(fd)
+    try:
+        shutil.move(source, temp_path)
+        os.replace(temp_path, final_path)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def _run_build(command: List[str], workdir: str, timeout: float):
+    """Run a PyInstaller command in workdir, stopping it on timeout or when the cancel marker appears"""
+    cancel_marker = os.path.join(workdir, CANCEL_MARKER)
+    if os.path.exists(cancel_marker):
+        raise BuildCancelled("Build cancelled before it started")
+
+    log_path = os.path.join(workdir, "build.log")
+    deadline = time.monotonic() + timeout
+    with open(log_path, 'w', encoding='utf-8') as log:
+        process = subprocess.Popen(command, cwd=workdir, stdout=log, stderr=subprocess.STDOUT)
+        while True:
+            try:
+                returncode = process.wait(timeout=CANCEL_POLL_SECONDS)
+                break
+            except subprocess.TimeoutExpired:
+                if os.path.exists(cancel_marker):
+                    process.kill()
+                    process.wait()
+                    raise BuildCancelled("Build cancelled")
+                if time.monotonic() > deadline:
+                    process.kill()
+                    process.wait()
+                    raise BuildTimeout(f"Build exceeded {timeout:.0f} seconds")
+
+    if returncode != 0:
+        with open(log_path, 'r', encoding='utf-8', errors='replace') as f:
+            output = f.read()
+        raise PackagingError(f"PyInstaller failed: {output[-4000:]}")
+
+
+def _pyinstaller_command(name: str, workdir: str, script_path: str, hidden_imports: Iterable[str] = ()) -> List[str]:
+    command = [
+        find_pyinstaller(),
+        "--onefile",
+        "--noconfirm",
+        "--name", name,
+        "--distpath", os.path.join(workdir, "dist"),
+        "--workpath", os.path.join(workdir, "build"),
+        "--specpath", workdir,
+    ]
+    for module in hidden_imports:
+        command += ["--hidden-import", module]
+    command.append(os.path.abspath(script_path))  # Use absolute path here
+    return command
+
+
+def build_runtime(runtime_path: str, runtime_modules: List[str], workdir: str, timeout: float) -> str:
+    """Pool job: build the shared runtime executable"""
+    _run_build(_pyinstaller_command("game_runtime", workdir, LAUNCHER_PATH, runtime_modules), workdir, timeout)
+    os.makedirs(os.path.dirname(runtime_path), exist_ok=True)
+    publish_atomically(os.path.join(workdir, "dist", f"game_runtime{EXE_SUFFIX}"), runtime_path)
+    return runtime_path
+
+
+def build_executable(script_path: str, game_name: str, output_dir: str, workdir: str, timeout: float) -> str:
+    """Pool job: cold one-file PyInstaller build of a single script"""
+    _run_build(_pyinstaller_command(game_name, workdir, script_path), workdir, timeout)
+    exe_filename = f"{game_name}{EXE_SUFFIX}"
+    final_path = os.path.join(output_dir, exe_filename)
+    publish_atomically(os.path.join(workdir, "dist", exe_filename), final_path)
+    return final_path
+
+
+class GamePackager:
+    """Packages games by appending them to a cached runtime, falling back to a cold PyInstaller build"""
+
+    def __init__(self, runtime_dir: Optional[str] = None, runtime_modules: Optional[List[str]] = None,
+                 max_workers: Optional[int] = None, build_timeout: Optional[float] = None,
+                 work_dir: Optional[str] = None, cancel_check: Optional[Callable[[str], bool]] = None):
+        self.runtime_modules = runtime_modules or RUNTIME_MODULES
+        self.runtime_dir = runtime_dir or os.path.join(BACKEND_DIR, config.get("packaging.runtime_dir", "data/runtime"))
+        self.work_dir = work_dir or os.path.join(BACKEND_DIR, config.get("packaging.work_dir", "data/packaging"))
+        self.max_workers = max_workers or int(config.get("scheduler.packaging_concurrency", 1))
+        self.build_timeout = build_timeout or float(config.get("packaging.build_timeout_seconds", 600))
+        self._runtime_lock = threading.Lock()
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+        # Whether a job was cancelled, e.g. through a flag in the shared task store, so a cancel
+        # handled by any server worker reaches the worker that owns the build
+        self.cancel_check = cancel_check
+        # job id -> workdir of its running build
+        self._active: Dict[str, str] = {}
+        self._jobs_lock = threading.Lock()
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._pool_lock:
+            if self._pool is None:
+                # spawn: forking a process that runs server threads is not safe
+                self._pool = ProcessPoolExecutor(max_workers=self.max_workers,
+                                                 mp_context=multiprocessing.get_context("spawn"))
+            return self._pool
+
+    def is_cancelled(self, job_id: str) -> bool:
+        return bool(self.cancel_check and self.cancel_check(job_id))
+
+    def _run_in_pool(self, job_id: str, func, *args):
+        """Run a build job on the pool in a fresh workdir and wait for its result, stopping it once cancelled"""
+        if self.is_cancelled(job_id):
+            raise BuildCancelled("Build cancelled before it started")
+        os.makedirs(self.work_dir, exist_ok=True)
+        workdir = tempfile.mkdtemp(prefix=f"{job_id}_", dir=self.work_dir)
+        with self._jobs_lock:
+            self._active[job_id] = workdir
+        try:
+            future = self._get_pool().submit(func, *args, workdir, self.build_timeout)
+            while True:
+                try:
+                    return future.result(timeout=CANCEL_POLL_SECONDS)
+                except FutureTimeout:
+                    if self.is_cancelled(job_id):
+                        self.cancel(job_id)
+        except BrokenProcessPool as e:
+            # A crashed worker poisons the whole pool; start a fresh one for the next build
+            with self._pool_lock:
+                self._pool = None
+            raise PackagingError(f"Packaging worker crashed: {e}")
+        finally:
+            with self._jobs_lock:
+                self._active.pop(job_id, None)
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    def cancel(self, job_id: str) -> bool:
+        """Stop a build of this process right away; returns True if one was running"""
+        with self._jobs_lock:
+            workdir = self._active.get(job_id)
+            marker = os.path.join(workdir, CANCEL_MARKER) if workdir else None
+            if marker and not os.path.exists(marker):
+                open(marker, 'w').close()
+                logger.info(f"[{job_id}] Cancelling packaging build")
+        return workdir is not None
+
+    def runtime_key(self) -> str:
+        """Identifies a runtime build; any change to the launcher, modules or interpreter triggers a rebuild"""
+        with open(LAUNCHER_PATH, 'rb') as f:
+            launcher = f.read()
+        fingerprint = b"\n".join([
+            launcher,
+            ",".join(sorted(self.runtime_modules)).encode(),
+            sys.version.encode(),
+            sys.platform.encode(),
+        ])
+        return hashlib.sha256(fingerprint).hexdigest()[:16]
+
+    def runtime_path(self) -> str:
+        return os.path.join(self.runtime_dir, self.runtime_key(), f"game_runtime{EXE_SUFFIX}")
+
+    def ensure_runtime(self) -> str:
+        """Build the shared runtime once; later calls return the cached executable"""
+        runtime_path = self.runtime_path()
+        if os.path.exists(runtime_path):
+            return runtime_path
+
+        with self._runtime_lock:
+            if os.path.exists(runtime_path):
+                return runtime_path
+            logger.info("Building shared game runtime (one-time)...")
+            self._run_in_pool("runtime", build_runtime, runtime_path, self.runtime_modules)
+            logger.info(f"Shared game runtime ready at {runtime_path}")
+            return runtime_path
+
+    def can_use_runtime(self, script: str) -> bool:
+        """True when every module the script imports is bundled in the runtime"""
+        try:
+            imports = script_imports(script)
+        except SyntaxError:
+            return False
+        missing = [module for module in imports if module not in self.runtime_modules]
+        if missing:
+            logger.info(f"Script imports modules outside the runtime {missing}; using a full build")
+        return not missing
+
+    def package(self, script_path: str, game_name: str, output_dir: str,
+                asset_files: Iterable[str] = (), job_id: Optional[str] = None) -> str:
+        """Package a game script and return the path of the executable in output_dir"""
+        job_id = job_id or game_name
+        if self.is_cancelled(job_id):
+            raise BuildCancelled("Packaging cancelled before it started")
+        with open(script_path, 'r', encoding='utf-8') as f:
+            script = f.read()
+        os.makedirs(output_dir, exist_ok=True)
+
+        final_path = None
+        if config.get("packaging.use_runtime", True) and self.can_use_runtime(script):
+            try:
+                final_path = self._package_with_runtime(script, game_name, output_dir, asset_files)
+            except (BuildCancelled, BuildTimeout):
+                raise
+            except PackagingError as e:
+                logger.warning(f"Runtime packaging unavailable, falling back to a full build: {e}")
+        if final_path is None:
+            final_path = self._run_in_pool(job_id, build_executable, os.path.abspath(script_path), game_name, output_dir)
+        record_artifact_digest(final_path)
+        return final_path
+
+    def _package_with_runtime(self, script: str, game_name: str, output_dir: str,
+                              asset_files: Iterable[str]) -> str:
+        """Copy the prebuilt runtime and append the game as a zip payload"""
+        runtime_path = self.ensure_runtime()
+        final_path = os.path.join(output_dir, f"{game_name}{EXE_SUFFIX}")
+
+        fd, temp_path = tempfile.mkstemp(prefix=".packaging_", dir=output_dir)
+        os.close(fd)
+        try:
+            shutil.copyfile(runtime_path, temp_path)
+            # Mode 'a' on a non-zip file appends a new archive after the existing bytes
+            with zipfile.ZipFile(temp_path, 'a', compression=zipfile.ZIP_DEFLATED) as bundle:
+                bundle.writestr("game.py", script)
+                for asset in asset_files:
+                    bundle.write(asset, os.path.join("assets", os.path.basename(asset)))
+            shutil.copymode(runtime_path, temp_path)
+            os.replace(temp_path, final_path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+        logger.info(f"Packaged {game_name} with the shared runtime")
+        return final_path
+
+    def shutdown(self):
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+
+def sprite_asset_files(assets: dict) -> List[str]:
+    """Sprite files from the asset library that a game's asset selection refers to"""
+    images_dir = os.path.join(BACKEND_DIR, "assets", "images")
+    files = set()
+
+    def collect(value):
+        if isinstance(value, dict):
+            for item in value.values():
+                collect(item)
+        elif isinstance(value, str):
+            path = os.path.join(images_dir, os.path.basename(value.strip()))
+            if os.path.isfile(path):
+                files.add(path)
+
+    collect(assets or {})
+    return sorted(files)
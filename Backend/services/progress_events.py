@@ -0,0 +1,138 @@
+"""
+Progress Events for Generation Tasks
+Records stage transitions with timings and pushes them to Server-Sent Events / WebSocket subscribers
+"""
+
+import time
+import asyncio
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, Any, List, Optional
+import logging
+
+from services.task_store import TaskStore
+
+logger = logging.getLogger(__name__)
+
+
+class ProgressBroker:
+    """Wakes up in-process subscribers when a task they watch changes"""
+
+    def __init__(self):
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def publish(self, task_id: str):
+        """Notify subscribers of a task; safe to call from worker threads"""
+        with self._lock:
+            subscribers = list(self._subscribers.get(task_id, ()))
+        for subscription in subscribers:
+            subscription.notify()
+
+    @contextmanager
+    def subscribe(self, task_id: str):
+        """Register a subscription for the lifetime of a stream"""
+        subscription = Subscription()
+        with self._lock:
+            self._subscribers[task_id].add(subscription)
+        try:
+            yield subscription
+        finally:
+            with self._lock:
+                self._subscribers[task_id].discard(subscription)
+                if not self._subscribers[task_id]:
+                    del self._subscribers[task_id]
+
+
+class Subscription:
+    """A single stream waiting for task updates on an event loop"""
+
+    def __init__(self):
+        self._loop = asyncio.get_running_loop()
+        self._event = asyncio.Event()
+
+    def notify(self):
+        self._loop.call_soon_threadsafe(self._event.set)
+
+    async def wait(self, timeout: float) -> bool:
+        """Wait for an update; returns False on timeout"""
+        try:
+            await asyncio.wait_for(self._event.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            self._event.clear()
+
+
+class ProgressReporter:
+    """Records stage transitions of one generation task into the task store"""
+
+    def __init__(self, task_store: TaskStore, task_id: str, broker: Optional[ProgressBroker] = None):
+        self.task_store = task_store
+        self.task_id = task_id
+        self.broker = broker
+        self.started_at = time.time()
+        self.status = 'IN_PROGRESS'
+        self.events: List[Dict[str, Any]] = []
+        self.stage_timings: Dict[str, float] = {}
+        self._stage_starts: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, stage: str, phase: str = "started"):
+        """Progress callback used by the agents: phase is "started" or "finished" """
+        with self._lock:
+            now = time.time()
+            event = self._new_event(stage, phase, now)
+            if phase == "started":
+                self._stage_starts[stage] = now
+            else:
+                duration = round(now - self._stage_starts.pop(stage, now), 3)
+                self.stage_timings[stage] = duration
+                event["duration"] = duration
+            self._publish(event)
+
+    @contextmanager
+    def stage(self, stage: str):
+        """Report the start and end of a stage around a block"""
+        self(stage, "started")
+        try:
+            yield
+        finally:
+            self(stage, "finished")
+
+    def set_status(self, status: str, result: Optional[Dict[str, Any]] = None):
+        """Change the task status; SUCCESS, FAILURE and CANCELLED end the event stream"""
+        with self._lock:
+            self.status = status
+            event = self._new_event(status.lower(), "status", time.time())
+            event["stage_timings"] = dict(self.stage_timings)
+            if result is not None:
+                event["result"] = result
+            self._publish(event, result=result)
+
+    def _new_event(self, stage: str, phase: str, now: float) -> Dict[str, Any]:
+        return {
+            "seq": len(self.events) + 1,
+            "stage": stage,
+            "phase": phase,
+            "status": self.status,
+            "timestamp": now,
+            "elapsed": round(now - self.started_at, 3),
+        }
+
+    def _publish(self, event: Dict[str, Any], result: Optional[Dict[str, Any]] = None):
+        self.events.append(event)
+        fields = {
+            'status': self.status,
+            'stage': event["stage"],
+            'events': self.events,
+            'stage_timings': self.stage_timings,
+            'started_at': self.started_at,
+        }
+        if result is not None:
+            fields['result'] = result
+        self.task_store.update(self.task_id, **fields)
+        if self.broker:
+            self.broker.publish(self.task_id)
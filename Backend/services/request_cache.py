@@ -0,0 +1,156 @@
+"""
+Semantic Request Cache
+Character n-gram similarity index over past generation requests, so near-duplicate themes reuse an existing game
+"""
+
+import os
+import re
+import json
+import math
+import time
+import sqlite3
+import threading
+from collections import Counter, defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+
+from config import config
+
+logger = logging.getLogger(__name__)
+
+NGRAM_SIZE = 3
+_NON_WORD = re.compile(r"[^a-z0-9 ]+")
+# Filler words ignored by the word-level check
+_STOP_WORDS = {"a", "an", "the", "of", "about", "game", "games"}
+# Per-word trigram similarity that still counts as the same word (plurals, typos)
+WORD_SIMILARITY = 0.6
+
+
+def _normalize(theme: str) -> str:
+    return " ".join(_NON_WORD.sub(" ", theme.lower()).split())
+
+
+def theme_vector(theme: str) -> Dict[str, float]:
+    """L2-normalized character trigram counts of a lowercased, punctuation-free theme"""
+    padded = f" {_normalize(theme)} "
+    counts = Counter(padded[i:i + NGRAM_SIZE] for i in range(len(padded) - NGRAM_SIZE + 1))
+    norm = math.sqrt(sum(c * c for c in counts.values())) or 1.0
+    return {gram: c / norm for gram, c in counts.items()}
+
+
+def _stem(word: str) -> str:
+    return word[:-1] if len(word) > 3 and word.endswith("s") and not word.endswith("ss") else word
+
+
+def theme_words(theme: str) -> List[str]:
+    """Content words of a theme, in order, with plural "s" dropped"""
+    return [_stem(word) for word in _normalize(theme).split() if word not in _STOP_WORDS]
+
+
+def _word_similarity(a: str, b: str) -> float:
+    va, vb = theme_vector(a), theme_vector(b)
+    return sum(weight * vb.get(gram, 0.0) for gram, weight in va.items())
+
+
+def same_words(a: str, b: str) -> bool:
+    """
+    Word-level guard on top of the trigram score: both themes need the same content words in the
+    same order, up to plurals and typos, so "cats in space" never matches "bats in space" and
+    "pirates fighting ninjas" never matches "ninjas fighting pirates"
+    """
+    words_a, words_b = theme_words(a), theme_words(b)
+    return len(words_a) == len(words_b) and all(
+        wa == wb or _word_similarity(wa, wb) >= WORD_SIMILARITY for wa, wb in zip(words_a, words_b)
+    )
+
+
+class SemanticRequestCache:
+    """Maps request themes to finished generation results and finds the closest past theme"""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        # In-memory inverted index: trigram -> [(entry id, weight)], kept in sync by rowid
+        self._postings: Dict[str, List[Tuple[int, float]]] = defaultdict(list)
+        self._entries: Dict[int, Tuple[str, Dict[str, Any]]] = {}
+        self._last_id = 0
+
+        directory = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(directory, exist_ok=True)
+
+        self._connection().execute("""
+            CREATE TABLE IF NOT EXISTS requests (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                theme TEXT NOT NULL,
+                result TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+        """)
+
+    def _connection(self) -> sqlite3.Connection:
+        """One connection per thread; SQLite connections must not be shared across threads"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _refresh(self):
+        """Load requests recorded since the last refresh, including those from other workers"""
+        rows = self._connection().execute(
+            "SELECT id, theme, result FROM requests WHERE id > ? ORDER BY id", (self._last_id,)
+        ).fetchall()
+        for entry_id, theme, result in rows:
+            self._entries[entry_id] = (theme, json.loads(result))
+            for gram, weight in theme_vector(theme).items():
+                self._postings[gram].append((entry_id, weight))
+            self._last_id = entry_id
+
+    def add(self, theme: str, result: Dict[str, Any]):
+        """Remember the result of a successful generation for this theme"""
+        self._connection().execute(
+            "INSERT INTO requests (theme, result, created_at) VALUES (?, ?, ?)",
+            (theme, json.dumps(result), time.time())
+        )
+
+    def lookup(self, theme: str, threshold: float) -> Optional[Dict[str, Any]]:
+        """Newest, most similar past request whose cosine similarity reaches the threshold and whose words match"""
+        query = theme_vector(theme)
+        with self._lock:
+            self._refresh()
+            scores: Dict[int, float] = defaultdict(float)
+            for gram, weight in query.items():
+                for entry_id, entry_weight in self._postings.get(gram, ()):
+                    scores[entry_id] += weight * entry_weight
+            candidates = sorted(((score, entry_id) for entry_id, score in scores.items() if score >= threshold),
+                                reverse=True)
+            for score, entry_id in candidates:
+                matched_theme, result = self._entries[entry_id]
+                if same_words(theme, matched_theme):
+                    return {"theme": matched_theme, "similarity": round(score, 3), "result": result}
+        return None
+
+    def forget(self, theme: str):
+        """Drop entries for a theme, e.g. when their build no longer exists"""
+        with self._lock:
+            self._connection().execute("DELETE FROM requests WHERE theme = ?", (theme,))
+            stale = {entry_id for entry_id, (entry_theme, _) in self._entries.items() if entry_theme == theme}
+            for entry_id in stale:
+                del self._entries[entry_id]
+            for gram in theme_vector(theme):
+                self._postings[gram] = [p for p in self._postings[gram] if p[0] not in stale]
+
+
+def create_request_cache() -> Optional[SemanticRequestCache]:
+    """Build the request cache, or None when it is disabled in the configuration"""
+    cache_config = config.get("request_cache", {})
+    if not cache_config.get("enabled", True):
+        return None
+    db_path = cache_config.get("path", "data/request_cache.db")
+    if not os.path.isabs(db_path):
+        backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        db_path = os.path.join(backend_dir, db_path)
+    return SemanticRequestCache(db_path)
@@ -0,0 +1,29 @@
+"""
+Game Runtime Launcher
+Entry point of the prebuilt pygame runtime executable. The packager appends a zip with the
+game script and its assets to a copy of the runtime; this launcher extracts and runs it.
+"""
+
+import os
+import sys
+import runpy
+import zipfile
+
+GAME_SCRIPT = "game.py"
+
+
+def main():
+    # In a one-file build _MEIPASS is the temporary extraction folder, which the
+    # asset path handler template already resolves 'assets/...' against.
+    base_path = getattr(sys, '_MEIPASS', os.path.dirname(os.path.abspath(sys.executable)))
+
+    # zipfile locates the archive from the end of the file, so the runtime bytes in front are skipped
+    with zipfile.ZipFile(sys.executable) as bundle:
+        bundle.extractall(base_path)
+
+    sys.path.insert(0, base_path)
+    runpy.run_path(os.path.join(base_path, GAME_SCRIPT), run_name="__main__")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,334 @@
+"""
+Task Store for Game Generation Jobs
+Persists generation task state so several server workers can share it and jobs survive restarts
+"""
+
+import os
+import json
+import time
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from typing import Dict, Any, Optional, Tuple
+import logging
+
+from config import config
+
+logger = logging.getLogger(__name__)
+
+# Statuses after which a task no longer changes and may be expired
+FINISHED_STATUSES = ("SUCCESS", "FAILURE", "CANCELLED")
+
+
+class TaskStore(ABC):
+    """Base interface for generation task storage"""
+
+    def __init__(self, ttl_seconds: int = 86400):
+        self.ttl_seconds = ttl_seconds
+
+    @abstractmethod
+    def get(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """Return the task record, or None if it does not exist"""
+
+    @abstractmethod
+    def set(self, task_id: str, record: Dict[str, Any]):
+        """Create or replace a task record"""
+
+    def update(self, task_id: str, **fields) -> Dict[str, Any]:
+        """Merge fields into an existing task record"""
+        record = self.get(task_id) or {'status': 'PENDING', 'result': None}
+        record.update(fields)
+        self.set(task_id, record)
+        return record
+
+    @abstractmethod
+    def delete(self, task_id: str):
+        """Remove a task record"""
+
+    def purge_expired(self) -> int:
+        """Remove finished tasks whose TTL has elapsed"""
+        return 0
+
+    @abstractmethod
+    def take_tokens(self, buckets: Dict[str, Tuple[float, float, float]], reserve: float = 0.0,
+                    force: bool = False) -> float:
+        """
+        Atomically take tokens from shared token buckets, given as name -> (cost, capacity, refill per second).
+        Either every cost is taken and 0.0 is returned, or nothing is taken and the result is the number of
+        seconds until all buckets can cover their cost while keeping `reserve` (a fraction of capacity) left.
+        With force, costs are always taken, possibly driving buckets negative.
+        """
+
+    @abstractmethod
+    def peek_tokens(self, buckets: Dict[str, Tuple[float, float]]) -> Dict[str, float]:
+        """Current level of each bucket, given as name -> (capacity, refill per second)"""
+
+    @staticmethod
+    def _refill(tokens: Optional[float], updated_at: Optional[float], capacity: float, rate: float,
+                now: float) -> float:
+        """Bucket level at `now`; a bucket that was never used starts full"""
+        if tokens is None:
+            return capacity
+        return min(capacity, tokens + max(0.0, now - updated_at) * rate)
+
+    @staticmethod
+    def _wait_for(levels: Dict[str, float], buckets: Dict[str, Tuple[float, float, float]], reserve: float) -> float:
+        wait = 0.0
+        for name, (cost, capacity, rate) in buckets.items():
+            missing = cost + reserve * capacity - levels[name]
+            if missing > 0:
+                wait = max(wait, missing / rate)
+        return wait
+
+    def _expires_at(self, record: Dict[str, Any]) -> Optional[float]:
+        """Finished tasks expire after the TTL, in-flight tasks never do"""
+        if record.get('status') in FINISHED_STATUSES and self.ttl_seconds:
+            return time.time() + self.ttl_seconds
+        return None
+
+
+class SQLiteTaskStore(TaskStore):
+    """Task store backed by a single SQLite file in WAL mode"""
+
+    # How often (in seconds) writes opportunistically purge expired tasks
+    PURGE_INTERVAL = 60
+
+    def __init__(self, db_path: str, ttl_seconds: int = 86400):
+        super().__init__(ttl_seconds)
+        self.db_path = db_path
+        self._local = threading.local()
+        self._last_purge = 0.0
+
+        directory = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(directory, exist_ok=True)
+
+        conn = self._connection()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS tasks (
+                task_id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                record TEXT NOT NULL,
+                updated_at REAL NOT NULL,
+                expires_at REAL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_tasks_expires_at ON tasks (expires_at)")
+        # Token buckets shared by every worker using this store (API rate limiting)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS rate_buckets (
+                name TEXT PRIMARY KEY,
+                tokens REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+        conn.commit()
+
+    def _connection(self) -> sqlite3.Connection:
+        """One connection per thread; SQLite connections must not be shared across threads"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, task_id: str) -> Optional[Dict[str, Any]]:
+        row = self._connection().execute(
+            "SELECT record, expires_at FROM tasks WHERE task_id = ?", (task_id,)
+        ).fetchone()
+        if not row:
+            return None
+        record, expires_at = row
+        if expires_at is not None and expires_at < time.time():
+            return None
+        return json.loads(record)
+
+    def set(self, task_id: str, record: Dict[str, Any]):
+        now = time.time()
+        self._connection().execute(
+            "INSERT OR REPLACE INTO tasks (task_id, status, record, updated_at, expires_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (task_id, record.get('status', 'PENDING'), json.dumps(record), now, self._expires_at(record))
+        )
+        if now - self._last_purge > self.PURGE_INTERVAL:
+            self._last_purge = now
+            self.purge_expired()
+
+    def update(self, task_id: str, **fields) -> Dict[str, Any]:
+        # Read-modify-write inside one transaction so concurrent workers don't lose fields
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT record FROM tasks WHERE task_id = ?", (task_id,)).fetchone()
+            record = json.loads(row[0]) if row else {'status': 'PENDING', 'result': None}
+            record.update(fields)
+            conn.execute(
+                "INSERT OR REPLACE INTO tasks (task_id, status, record, updated_at, expires_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (task_id, record.get('status', 'PENDING'), json.dumps(record), time.time(), self._expires_at(record))
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return record
+
+    def delete(self, task_id: str):
+        self._connection().execute("DELETE FROM tasks WHERE task_id = ?", (task_id,))
+
+    def _bucket_levels(self, conn: sqlite3.Connection, buckets: Dict[str, Tuple[float, float]],
+                       now: float) -> Dict[str, float]:
+        names = list(buckets)
+        rows = conn.execute(
+            f"SELECT name, tokens, updated_at FROM rate_buckets WHERE name IN ({','.join('?' * len(names))})", names
+        ).fetchall()
+        state = {name: (tokens, updated_at) for name, tokens, updated_at in rows}
+        return {
+            name: self._refill(*state.get(name, (None, None)), capacity, rate, now)
+            for name, (capacity, rate) in buckets.items()
+        }
+
+    def take_tokens(self, buckets: Dict[str, Tuple[float, float, float]], reserve: float = 0.0,
+                    force: bool = False) -> float:
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            now = time.time()
+            levels = self._bucket_levels(conn, {name: spec[1:] for name, spec in buckets.items()}, now)
+            wait = 0.0 if force else self._wait_for(levels, buckets, reserve)
+            if wait == 0.0:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO rate_buckets (name, tokens, updated_at) VALUES (?, ?, ?)",
+                    [(name, levels[name] - cost, now) for name, (cost, _, _) in buckets.items()]
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return wait
+
+    def peek_tokens(self, buckets: Dict[str, Tuple[float, float]]) -> Dict[str, float]:
+        return self._bucket_levels(self._connection(), buckets, time.time())
+
+    def purge_expired(self) -> int:
+        cursor = self._connection().execute(
+            "DELETE FROM tasks WHERE expires_at IS NOT NULL AND expires_at < ?", (time.time(),)
+        )
+        if cursor.rowcount:
+            logger.info(f"Purged {cursor.rowcount} expired tasks")
+        return cursor.rowcount
+
+
+class RedisTaskStore(TaskStore):
+    """Task store backed by Redis (or any Redis-protocol compatible server)"""
+
+    KEY_PREFIX = "gamegen:task:"
+    BUCKET_PREFIX = "gamegen:bucket:"
+
+    # KEYS: bucket keys. ARGV: now, reserve, force, then cost, capacity and rate per bucket.
+    # Returns the wait in seconds as a string (Lua numbers are truncated to integers on the way out).
+    _TAKE_TOKENS_SCRIPT = """
+        local now, reserve, force = tonumber(ARGV[1]), tonumber(ARGV[2]), ARGV[3] == '1'
+        local levels, wait = {}, 0
+        for i, key in ipairs(KEYS) do
+            local base = 3 + (i - 1) * 3
+            local cost, capacity, rate = tonumber(ARGV[base + 1]), tonumber(ARGV[base + 2]), tonumber(ARGV[base + 3])
+            local state = redis.call('HMGET', key, 'tokens', 'updated_at')
+            local tokens = tonumber(state[1])
+            if tokens == nil then
+                tokens = capacity
+            else
+                tokens = math.min(capacity, tokens + math.max(0, now - tonumber(state[2])) * rate)
+            end
+            levels[i] = tokens - cost
+            local missing = cost + reserve * capacity - tokens
+            if not force and missing > 0 then
+                wait = math.max(wait, missing / rate)
+            end
+        end
+        if wait == 0 then
+            for i, key in ipairs(KEYS) do
+                redis.call('HSET', key, 'tokens', levels[i], 'updated_at', now)
+                redis.call('EXPIRE', key, 3600)
+            end
+        end
+        return tostring(wait)
+    """
+
+    def __init__(self, url: str, ttl_seconds: int = 86400):
+        super().__init__(ttl_seconds)
+        try:
+            import redis
+        except ImportError:
+            raise ValueError("Redis task store requested but the 'redis' package is not installed.")
+        self.client = redis.Redis.from_url(url, decode_responses=True)
+
+    def _key(self, task_id: str) -> str:
+        return f"{self.KEY_PREFIX}{task_id}"
+
+    def get(self, task_id: str) -> Optional[Dict[str, Any]]:
+        value = self.client.get(self._key(task_id))
+        return json.loads(value) if value else None
+
+    def set(self, task_id: str, record: Dict[str, Any]):
+        # Redis handles expiry itself, so finished tasks simply get a TTL on their key
+        ttl = self.ttl_seconds if record.get('status') in FINISHED_STATUSES and self.ttl_seconds else None
+        self.client.set(self._key(task_id), json.dumps(record), ex=ttl)
+
+    def update(self, task_id: str, **fields) -> Dict[str, Any]:
+        import redis
+        key = self._key(task_id)
+        with self.client.pipeline() as pipe:
+            while True:
+                try:
+                    pipe.watch(key)
+                    value = pipe.get(key)
+                    record = json.loads(value) if value else {'status': 'PENDING', 'result': None}
+                    record.update(fields)
+                    ttl = self.ttl_seconds if record.get('status') in FINISHED_STATUSES and self.ttl_seconds else None
+                    pipe.multi()
+                    pipe.set(key, json.dumps(record), ex=ttl)
+                    pipe.execute()
+                    return record
+                except redis.WatchError:
+                    continue
+
+    def delete(self, task_id: str):
+        self.client.delete(self._key(task_id))
+
+    def take_tokens(self, buckets: Dict[str, Tuple[float, float, float]], reserve: float = 0.0,
+                    force: bool = False) -> float:
+        keys = [f"{self.BUCKET_PREFIX}{name}" for name in buckets]
+        args = [time.time(), reserve, 1 if force else 0]
+        for cost, capacity, rate in buckets.values():
+            args.extend((cost, capacity, rate))
+        return float(self.client.eval(self._TAKE_TOKENS_SCRIPT, len(keys), *keys, *args))
+
+    def peek_tokens(self, buckets: Dict[str, Tuple[float, float]]) -> Dict[str, float]:
+        now = time.time()
+        levels = {}
+        for name, (capacity, rate) in buckets.items():
+            tokens, updated_at = self.client.hmget(f"{self.BUCKET_PREFIX}{name}", 'tokens', 'updated_at')
+            levels[name] = self._refill(float(tokens) if tokens is not None else None,
+                                        float(updated_at) if updated_at is not None else None, capacity, rate, now)
+        return levels
+
+
+def create_task_store() -> TaskStore:
+    """Build the task store selected in the configuration"""
+    task_config = config.get("tasks", {})
+    backend = task_config.get("backend", "sqlite")
+    ttl_seconds = int(task_config.get("ttl_seconds", 86400))
+
+    if backend == "redis":
+        url = task_config.get("redis_url") or "redis://localhost:6379/0"
+        logger.info(f"Using Redis task store at {url}")
+        return RedisTaskStore(url, ttl_seconds)
+
+    db_path = task_config.get("sqlite_path", "data/tasks.db")
+    if not os.path.isabs(db_path):
+        backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        db_path = os.path.join(backend_dir, db_path)
+    logger.info(f"Using SQLite task store at {db_path}")
+    return SQLiteTaskStore(db_path, ttl_seconds)
@@ -0,0 +1,32 @@
+"""
+Shared pytest setup: makes the Backend packages importable the way main.py does, and runs pygame headless
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+from config import config  # noqa: E402 - importable only once sys.path is set up
+
+
+@pytest.fixture
+def replay_backend(tmp_path):
+    """Serve synthesized model responses with a small injected latency and no response cache"""
+    overrides = {
+        "gemini.backend": "replay",
+        "gemini.recordings_dir": str(tmp_path / "recordings"),
+        "gemini.replay_latency": 0.1,
+        "gemini.replay_jitter": 0.0,
+        "cache.enabled": False,
+    }
+    previous = {key: config.get(key) for key in overrides}
+    for key, value in overrides.items():
+        config.set(key, value)
+    yield
+    for key, value in previous.items():
+        config.set(key, value)
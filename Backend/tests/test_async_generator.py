@@ -0,0 +1,72 @@
+"""
+Tests for the async Gemini client: calls share one event loop without holding threads, bounded per loop
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from generators.async_gemini_generator import AsyncGeminiGameGenerator
+from generators.model_backends import ModelBackend, ReplayBackend
+
+
+class CountingBackend(ModelBackend):
+    """Replay backend that records how many async calls are in flight at once"""
+
+    def __init__(self, latency: float):
+        self.inner = ReplayBackend(latency=latency)
+        self.in_flight = 0
+        self.peak = 0
+
+    def model(self, model_name: str, json_output: bool = False):
+        backend, model = self, self.inner.model(model_name, json_output)
+
+        class CountingModel:
+            model_name = model.model_name
+            _generation_config = None
+
+            async def generate_content_async(self, prompt, **kwargs):
+                backend.in_flight += 1
+                backend.peak = max(backend.peak, backend.in_flight)
+                try:
+                    return await model.generate_content_async(prompt, **kwargs)
+                finally:
+                    backend.in_flight -= 1
+
+        return CountingModel()
+
+
+def test_concurrent_calls_are_bounded_by_max_concurrency(replay_backend):
+    backend = CountingBackend(latency=0.05)
+    generator = AsyncGeminiGameGenerator(max_concurrency=2, use_cache=False, backend=backend)
+
+    async def plan_many():
+        concept = generator._get_fallback_concept("castle")
+        return await asyncio.gather(*(generator.generate_template_plan(concept) for _ in range(6)))
+
+    plans = asyncio.run(plan_many())
+    assert all(plan for plan in plans)
+    assert backend.peak == 2
+
+
+def test_games_on_one_loop_overlap_their_model_calls(replay_backend):
+    pytest.importorskip("pygame")
+    from agents.game_agents import GameCreationAgent
+    from config import config
+
+    games, latency = 4, 0.3
+    config.set("gemini.replay_latency", latency)
+
+    async def create_all():
+        agents = [GameCreationAgent() for _ in range(games)]
+        return await asyncio.gather(*(agent.create_game_autonomously_async(f"castle #{i}")
+                                      for i, agent in enumerate(agents)))
+
+    started = time.perf_counter()
+    packages = asyncio.run(create_all())
+    elapsed = time.perf_counter() - started
+
+    assert all(package["code"] for package in packages)
+    # Each game makes three dependent rounds of calls; one game after another would take over 3.6s
+    assert elapsed < games * 3 * latency / 2
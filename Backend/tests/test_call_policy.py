@@ -0,0 +1,198 @@
+"""
+Tests for the Gemini call policy: error classes, retries and circuit breaker recovery
+"""
+
+import time
+import asyncio
+import itertools
+
+import pytest
+
+from generators.call_policy import (
+    BAD_OUTPUT, FATAL, RATE_LIMIT, SERVER_ERROR, TIMEOUT,
+    CallPolicy, CallTimeout, CircuitBreaker, CircuitOpenError,
+    call_with_deadline, classify_error, get_circuit_breaker,
+)
+
+_names = itertools.count()
+
+
+class ResourceExhausted(Exception):
+    code = 429
+
+
+class ServiceUnavailable(Exception):
+    code = 503
+
+
+def open_breaker(reset_timeout: float = 0.05) -> str:
+    """Name of a fresh shared breaker that is open and becomes half-open after reset_timeout"""
+    name = f"test-model-{next(_names)}"
+    breaker = get_circuit_breaker(name)
+    breaker.reset_timeout = reset_timeout
+    for _ in range(breaker.failure_threshold):
+        breaker.record(SERVER_ERROR)
+    return name
+
+
+def fast_policy(**overrides) -> CallPolicy:
+    settings = dict(timeout=1.0, max_retries=2, base_delay=0.0, max_delay=0.0, bad_output_retries=1)
+    settings.update(overrides)
+    return CallPolicy(**settings)
+
+
+@pytest.mark.parametrize("error, expected", [
+    (ResourceExhausted(), RATE_LIMIT),
+    (ServiceUnavailable(), SERVER_ERROR),
+    (CallTimeout(), TIMEOUT),
+    (ConnectionError(), SERVER_ERROR),
+    (ValueError("bad json"), BAD_OUTPUT),
+    (KeyError("x"), FATAL),
+    (CircuitOpenError("m", 1.0), FATAL),
+])
+def test_classify_error(error, expected):
+    assert classify_error(error) == expected
+
+
+def test_breaker_opens_after_threshold():
+    breaker = CircuitBreaker("m", failure_threshold=3, reset_timeout=60)
+    for _ in range(2):
+        breaker.record(TIMEOUT)
+    assert breaker.state == "closed"
+    breaker.record(TIMEOUT)
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+def test_bad_output_does_not_count_as_upstream_failure():
+    breaker = CircuitBreaker("m", failure_threshold=2, reset_timeout=60)
+    breaker.record(TIMEOUT)
+    breaker.record(BAD_OUTPUT)
+    breaker.record(TIMEOUT)
+    assert breaker.state == "closed"
+
+
+def test_half_open_allows_a_single_probe():
+    breaker = CircuitBreaker("m", failure_threshold=1, reset_timeout=0.01)
+    breaker.record(SERVER_ERROR)
+    time.sleep(0.02)
+    assert breaker.state == "half_open"
+    assert breaker.before_call() is True
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    breaker.record(None)
+    assert breaker.state == "closed"
+    assert breaker.before_call() is False
+
+
+def test_failed_probe_reopens():
+    breaker = CircuitBreaker("m", failure_threshold=1, reset_timeout=0.01)
+    breaker.record(SERVER_ERROR)
+    time.sleep(0.02)
+    breaker.before_call()
+    breaker.record(SERVER_ERROR)
+    assert breaker.state == "open"
+
+
+def test_run_retries_upstream_failures():
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise ServiceUnavailable()
+        return "ok"
+
+    assert fast_policy().run(f"test-model-{next(_names)}", flaky) == "ok"
+    assert len(attempts) == 3
+
+
+def test_run_gives_up_after_max_retries():
+    attempts = []
+
+    def down():
+        attempts.append(1)
+        raise ServiceUnavailable()
+
+    with pytest.raises(ServiceUnavailable):
+        fast_policy(max_retries=1).run(f"test-model-{next(_names)}", down)
+    assert len(attempts) == 2
+
+
+def test_run_does_not_retry_fatal_errors():
+    attempts = []
+
+    def broken():
+        attempts.append(1)
+        raise KeyError("x")
+
+    with pytest.raises(KeyError):
+        fast_policy().run(f"test-model-{next(_names)}", broken)
+    assert len(attempts) == 1
+
+
+def test_half_open_probe_recovers_the_breaker():
+    name = open_breaker()
+    with pytest.raises(CircuitOpenError):
+        fast_policy().run(name, lambda: "ok")
+    time.sleep(0.06)
+    assert fast_policy().run(name, lambda: "ok") == "ok"
+    assert get_circuit_breaker(name).state == "closed"
+
+
+def test_quota_failure_during_probe_releases_it():
+    name = open_breaker()
+    time.sleep(0.06)
+
+    def no_quota():
+        raise RuntimeError("no quota")
+
+    with pytest.raises(RuntimeError):
+        fast_policy().run(name, lambda: "unreached", acquire=no_quota)
+    # The quota error is not an upstream failure, and the next call may probe again
+    assert get_circuit_breaker(name).state == "half_open"
+    assert fast_policy().run(name, lambda: "ok") == "ok"
+    assert get_circuit_breaker(name).state == "closed"
+
+
+def test_cancelled_probe_releases_it():
+    name = open_breaker()
+    time.sleep(0.06)
+
+    async def hang():
+        await asyncio.sleep(10)
+
+    async def ok():
+        return "ok"
+
+    async def scenario():
+        task = asyncio.ensure_future(fast_policy().run_async(name, hang))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        return await fast_policy().run_async(name, ok)
+
+    assert asyncio.run(scenario()) == "ok"
+    assert get_circuit_breaker(name).state == "closed"
+
+
+def test_call_with_deadline_times_out():
+    started = time.monotonic()
+    with pytest.raises(CallTimeout):
+        call_with_deadline(lambda: time.sleep(1), 0.05)
+    assert time.monotonic() - started < 0.5
+
+
+def test_call_with_deadline_does_not_count_other_hung_calls():
+    # Hung calls must not delay or time out a later call
+    for _ in range(10):
+        with pytest.raises(CallTimeout):
+            call_with_deadline(lambda: time.sleep(1), 0.01)
+    assert call_with_deadline(lambda: "ok", 0.5) == "ok"
+
+
+def test_call_with_deadline_propagates_errors():
+    with pytest.raises(ServiceUnavailable):
+        call_with_deadline(lambda: (_ for _ in ()).throw(ServiceUnavailable()), 1.0)
@@ -0,0 +1,79 @@
+"""
+Tests for streamed code assembly: fence stripping and syntax checks of each finished top-level block
+"""
+
+import pytest
+
+from generators.code_stream import BrokenCodeError, StreamingCodeAssembler, assemble_code, chunk_text
+
+GAME = '''import pygame
+
+@staticmethod
+def speed():
+    return 5
+
+class Player:
+    def update(self):
+        try:
+            self.x += speed()
+        except AttributeError:
+            pass
+        else:
+            self.moved = True
+
+running = True
+while running:
+    running = False
+'''
+
+
+def feed_in_chunks(assembler, text, size):
+    for i in range(0, len(text), size):
+        assembler.feed(text[i:i + size])
+
+
+@pytest.mark.parametrize("size", [1, 7, 64])
+def test_valid_code_streams_through_any_chunking(size):
+    assembler = StreamingCodeAssembler()
+    feed_in_chunks(assembler, f"```python\n{GAME}```\n", size)
+    assert assembler.finish() == GAME.rstrip("\n")
+
+
+def test_code_without_a_fence_is_used_as_is():
+    assert assemble_code(GAME) == GAME
+
+
+def test_broken_block_is_reported_before_the_stream_ends():
+    assembler = StreamingCodeAssembler()
+    assembler.feed("```python\nimport pygame\n\ndef broken(:\n    pass\n")
+    with pytest.raises(BrokenCodeError):
+        # The next top-level statement completes the broken block
+        assembler.feed("\nrunning = True\n")
+
+
+def test_unfinished_blocks_are_not_errors_yet():
+    assembler = StreamingCodeAssembler()
+    assembler.feed("```python\nPLAYER = {\n    'speed': 5,\n")
+    assembler.feed("    'lives': 3,\n")
+    assembler.feed("}\nrunning = True\n```")
+    assert assembler.finish() == "PLAYER = {\n    'speed': 5,\n    'lives': 3,\n}\nrunning = True"
+
+
+def test_truncated_stream_fails_on_finish():
+    assembler = StreamingCodeAssembler()
+    assembler.feed("```python\ndef update(self):\n    values = [1, 2,\n")
+    with pytest.raises(BrokenCodeError):
+        assembler.finish()
+
+
+def test_chunk_text_of_chunks_without_text():
+    class FinalChunk:
+        @property
+        def text(self):
+            raise ValueError("no text parts")
+
+    class TextChunk:
+        text = "abc"
+
+    assert chunk_text(FinalChunk()) == ""
+    assert chunk_text(TextChunk()) == "abc"
@@ -0,0 +1,96 @@
+"""
+Tests for game downloads: ETags, conditional requests and byte ranges
+"""
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("httpx")
+
+from fastapi import FastAPI, Request  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+from services.downloads import file_download_response  # noqa: E402
+
+CONTENT = bytes(range(256)) * 4
+
+
+@pytest.fixture
+def artifact(tmp_path):
+    path = tmp_path / "castle"
+    path.write_bytes(CONTENT)
+    return path
+
+
+@pytest.fixture
+def client(artifact):
+    app = FastAPI()
+
+    @app.get("/script")
+    async def script(request: Request):
+        return await file_download_response(request, str(artifact), "text/x-python", "castle.py")
+
+    @app.get("/executable")
+    async def executable(request: Request):
+        return await file_download_response(request, str(artifact), "application/octet-stream", "castle",
+                                            content_digest=True)
+
+    @app.get("/missing")
+    async def missing(request: Request):
+        return await file_download_response(request, str(artifact) + ".gone", "text/x-python", "gone.py")
+
+    return TestClient(app)
+
+
+def test_full_download(client):
+    response = client.get("/script")
+    assert response.status_code == 200
+    assert response.content == CONTENT
+    assert response.headers["accept-ranges"] == "bytes"
+    assert response.headers["etag"]
+    assert 'filename="castle.py"' in response.headers["content-disposition"]
+
+
+def test_missing_file(client):
+    assert client.get("/missing").status_code == 404
+
+
+def test_matching_etag_is_not_modified(client):
+    etag = client.get("/script").headers["etag"]
+    response = client.get("/script", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+
+
+def test_executable_etag_is_its_content_digest(client, artifact):
+    from services.packaging import file_digest
+
+    assert client.get("/executable").headers["etag"] == f'"{file_digest(str(artifact))}"'
+    assert (artifact.parent / "castle.sha256").exists()
+
+
+@pytest.mark.parametrize("header, start, end", [
+    ("bytes=10-19", 10, 19),
+    ("bytes=1000-", 1000, 1023),
+    ("bytes=-4", 1020, 1023),
+])
+def test_byte_ranges(client, header, start, end):
+    response = client.get("/script", headers={"Range": header})
+    assert response.status_code == 206
+    assert response.headers["content-range"] == f"bytes {start}-{end}/{len(CONTENT)}"
+    assert response.content == CONTENT[start:end + 1]
+
+
+def test_unsatisfiable_range(client):
+    response = client.get("/script", headers={"Range": "bytes=5000-"})
+    assert response.status_code == 416
+    assert response.headers["content-range"] == f"bytes */{len(CONTENT)}"
+
+
+def test_stale_if_range_sends_the_whole_file(client):
+    etag = client.get("/script").headers["etag"]
+    resumed = client.get("/script", headers={"Range": "bytes=0-9", "If-Range": etag})
+    assert resumed.status_code == 206
+    stale = client.get("/script", headers={"Range": "bytes=0-9", "If-Range": '"another-build"'})
+    assert stale.status_code == 200
+    assert stale.content == CONTENT
@@ -0,0 +1,51 @@
+"""
+Tests for slot-based entities and their lazily synced rects
+"""
+
+import pytest
+
+pygame = pytest.importorskip("pygame")
+pytest.importorskip("numpy")
+
+from engine.game_engine import Collectible, Entity, Obstacle, Player, Powerup
+
+
+@pytest.mark.parametrize("entity", [
+    Player(1, 2), Powerup(1, 2, "health"), Collectible(1, 2, "coin"), Obstacle(1, 2, 10, 10, "wall"),
+], ids=lambda entity: type(entity).__name__)
+def test_entities_have_no_instance_dict(entity):
+    assert not hasattr(entity, "__dict__")
+    with pytest.raises(AttributeError):
+        entity.undeclared = 1
+
+
+def test_rect_follows_position_lazily():
+    entity = Entity(1.7, 2.2, 10, 10, (0, 0, 0))
+    assert entity.rect.topleft == (1, 2)
+    entity.x += 5
+    assert entity._rect_dirty
+    assert entity.rect.topleft == (6, 2)
+    assert not entity._rect_dirty
+
+
+def test_assigning_rect_moves_entity():
+    entity = Entity(0, 0, 10, 10, (0, 0, 0))
+    entity.rect = pygame.Rect(30, 40, 10, 10)
+    assert (entity.x, entity.y) == (30, 40)
+    assert entity.rect.topleft == (30, 40)
+
+
+def test_collisions_see_unsynced_moves():
+    a = Entity(0, 0, 10, 10, (0, 0, 0))
+    b = Entity(100, 0, 10, 10, (0, 0, 0))
+    assert not a.collides_with(b)
+    a.x = 95
+    assert a.collides_with(b)
+
+
+def test_reset_reactivates_pooled_entity():
+    powerup = Powerup(0, 0, "score")
+    powerup.active = False
+    powerup.reset(20, 30, "health")
+    assert powerup.active and powerup.rect.topleft == (20, 30)
+    assert powerup.value == 20 and powerup.color == Powerup.COLORS["health"]
@@ -0,0 +1,137 @@
+"""
+Tests for the engine's entity pool: O(1) swap-remove and recycling
+"""
+
+import pytest
+
+from engine.entity_pool import EntityPool
+
+
+class Thing:
+    created = 0
+
+    def __init__(self, name):
+        Thing.created += 1
+        self.reset(name)
+
+    def reset(self, name):
+        self.name = name
+        self.active = True
+
+
+def names(pool):
+    return [thing.name for thing in pool]
+
+
+def test_acquire_creates_then_recycles():
+    Thing.created = 0
+    pool = EntityPool(Thing)
+    a = pool.acquire("a")
+    pool.release(a)
+    assert not a.active and len(pool) == 0
+    b = pool.acquire("b")
+    assert b is a and b.active and b.name == "b"
+    assert Thing.created == 1
+
+
+def test_remove_swaps_last_into_the_gap():
+    pool = EntityPool(Thing)
+    things = [pool.acquire(name) for name in "abcd"]
+    pool.remove(things[1])
+    assert names(pool) == ["a", "d", "c"]
+    pool.remove(things[3])
+    assert names(pool) == ["a", "c"]
+    pool.remove(things[2])
+    assert names(pool) == ["a"]
+    assert things[1] not in pool and things[0] in pool
+
+
+def test_slots_stay_consistent_after_many_removals():
+    pool = EntityPool(Thing)
+    things = [pool.acquire(str(i)) for i in range(50)]
+    for thing in things[::3]:
+        pool.release(thing)
+    remaining = [thing for i, thing in enumerate(things) if i % 3]
+    assert sorted(names(pool), key=int) == [thing.name for thing in remaining]
+    for index, thing in enumerate(pool.active):
+        assert pool._slots[thing] == index
+
+
+def test_remove_unknown_entity_raises():
+    pool = EntityPool(Thing)
+    with pytest.raises(ValueError):
+        pool.remove(Thing("x"))
+
+
+def test_add_is_idempotent_and_append_alias():
+    pool = EntityPool(Thing)
+    thing = Thing("x")
+    pool.add(thing)
+    pool.append(thing)
+    assert len(pool) == 1 and pool[0] is thing
+
+
+def test_clear_releases_everything_for_reuse():
+    Thing.created = 0
+    pool = EntityPool(Thing)
+    for name in "abc":
+        pool.acquire(name)
+    pool.clear()
+    assert len(pool) == 0 and not pool
+    for name in "xyz":
+        pool.acquire(name)
+    assert Thing.created == 3
+    assert sorted(names(pool)) == ["x", "y", "z"]
+
+
+@pytest.fixture
+def engine():
+    pytest.importorskip("numpy")
+    pytest.importorskip("pygame")
+    from engine.game_engine import GameEngine
+    engine = GameEngine(400, 300)
+    engine.load_level({
+        "spawn_points": [{"type": "player", "x": 200, "y": 150}],
+        "obstacles": [{"x": 380, "y": 0, "width": 20, "height": 300, "type": "wall"}],
+        "powerups": [{"x": 50, "y": 50, "type": "score"}, {"x": 100, "y": 100, "type": "health"}],
+        "enemies": [{"x": 250, "y": 150, "type": "basic", "patrol_path": [[250, 150], [250, 160]]}],
+        "objectives": [],
+    })
+    return engine
+
+
+def test_engine_reuses_pooled_entities_across_levels(engine):
+    powerups = set(engine.powerups.active)
+    enemy = engine.enemies[0]
+    rows = engine.enemy_store.count
+    engine.load_level({"spawn_points": [], "powerups": [{"x": 10, "y": 10, "type": "speed"}],
+                       "enemies": [{"x": 20, "y": 20, "type": "fast"}], "objectives": []})
+    assert engine.powerups[0] in powerups and engine.powerups[0].type == "speed"
+    assert engine.enemies[0] is enemy and enemy.type == "fast" and (enemy.x, enemy.y) == (20, 20)
+    assert engine.enemy_store.count == rows
+
+
+def test_remove_entity_updates_pool_and_grid(engine):
+    powerup = engine.powerups[0]
+    engine.remove_entity("powerups", powerup)
+    assert powerup not in engine.powerups and powerup in engine.powerups.free
+    assert engine.query_rect(powerup.rect, ["powerups"]) == []
+
+
+def test_player_projectile_removes_enemy(engine):
+    enemy = engine.enemies[0]
+    engine.spawn_projectile(225, 155, 600, 0)
+    for _ in range(10):
+        engine._update_enemies(1 / 60)
+        engine._update_projectiles(1 / 60)
+    assert enemy not in engine.enemies and len(engine.projectiles) == 0
+    assert engine.projectiles.free
+
+
+def test_projectiles_stop_at_obstacles_and_hit_the_player(engine):
+    engine.spawn_projectile(300, 20, 900, 0)
+    engine.spawn_projectile(150, 155, 900, 0, owner="enemy", damage=15)
+    for _ in range(20):
+        engine._update_projectiles(1 / 60)
+    assert len(engine.projectiles) == 0
+    assert engine.player.health == engine.player.max_health - 15
@@ -0,0 +1,69 @@
+"""
+Tests for the vectorized enemy store and the Enemy views onto it
+"""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pygame = pytest.importorskip("pygame")
+
+from engine.entity_store import EnemyStore
+from engine.game_engine import Enemy
+
+
+def test_chasers_move_towards_player():
+    store = EnemyStore()
+    enemy = Enemy(0, 0, "aggressive", store=store)
+    store.step(1.0, 300.0, 400.0)
+    # speed 80 along the (3, 4) direction
+    assert enemy.x == pytest.approx(48)
+    assert enemy.y == pytest.approx(64)
+
+
+def test_patrollers_advance_to_next_waypoint():
+    store = EnemyStore()
+    enemy = Enemy(0, 0, "basic", store=store)
+    enemy.patrol_path = [[5, 0], [100, 0]]
+    store.step(0.1, 0, 0)
+    # Within the waypoint radius: switch targets without moving
+    assert enemy.current_target == 1 and enemy.x == 0
+    store.step(0.1, 0, 0)
+    assert enemy.x == pytest.approx(5)
+
+
+def test_inactive_enemies_do_not_move():
+    store = EnemyStore()
+    enemy = Enemy(10, 10, "aggressive", store=store)
+    enemy.active = False
+    store.step(1.0, 500, 500)
+    assert (enemy.x, enemy.y) == (10, 10)
+
+
+def test_store_grows_past_capacity():
+    store = EnemyStore(capacity=2)
+    enemies = [Enemy(i, i, "fast", store=store) for i in range(5)]
+    assert store.count == 5 and store.capacity >= 5
+    assert [enemy.x for enemy in enemies] == [0, 1, 2, 3, 4]
+    assert all(enemy.speed == 120 for enemy in enemies)
+
+
+def test_rebucket_reports_cell_changes_only():
+    store = EnemyStore()
+    still = Enemy(10, 10, "other", store=store)
+    mover = Enemy(60, 10, "other", store=store)
+    assert sorted(store.rebucket(64).tolist()) == [0, 1]
+    assert store.rebucket(64).tolist() == []
+    mover.x = 70
+    assert store.rebucket(64).tolist() == [1]
+    assert still.rect.topleft == (10, 10)
+
+
+def test_detached_enemy_owns_its_store_until_adopted():
+    enemy = Enemy(5, 6, "basic")
+    own_store = enemy._store
+    assert own_store.count == 1
+    engine_store = EnemyStore()
+    engine_store.adopt(enemy)
+    assert enemy._store is engine_store
+    assert (enemy.x, enemy.y, enemy.type) == (5, 6, "basic")
+    assert not own_store.active[0]
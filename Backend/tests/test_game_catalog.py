@@ -0,0 +1,86 @@
+"""
+Tests for the game catalog: filtered, paginated queries, title search and backfilling from disk
+"""
+
+import json
+
+import pytest
+
+from services.game_catalog import GameCatalog
+
+GAMES = [
+    ("castle.py", "Haunted Castle", "Platformer", "haunted castle", "2024-01-01T10:00:00"),
+    ("ocean.py", "Turtle Ocean Run", "Adventure", "turtles getting back to the ocean", "2024-02-01T10:00:00"),
+    ("space.py", "Space Castle Siege", "Shooter", "castles in space", "2024-03-01T10:00:00"),
+    ("forest.py", "Forest Escape", "platformer", "enchanted forest", "2024-04-01T10:00:00"),
+]
+
+
+def metadata(title, genre, theme, created_at):
+    return {"concept": {"title": title, "genre": genre, "description": title}, "theme": theme,
+            "created_at": created_at}
+
+
+@pytest.fixture
+def catalog(tmp_path):
+    catalog = GameCatalog(str(tmp_path / "games.db"))
+    for game_id, title, genre, theme, created_at in GAMES:
+        catalog.add_game(game_id, metadata(title, genre, theme, created_at))
+    return catalog
+
+
+def ids(page):
+    return [game["game_id"] for game in page["games"]]
+
+
+def test_newest_first_with_pagination(catalog):
+    first = catalog.query(limit=3)
+    assert first["total"] == 4
+    assert ids(first) == ["forest.py", "space.py", "ocean.py"]
+    assert ids(catalog.query(limit=3, offset=3)) == ["castle.py"]
+
+
+def test_page_size_is_capped(catalog):
+    assert catalog.query(limit=10_000)["limit"] == GameCatalog.MAX_PAGE_SIZE
+
+
+def test_genre_filter_ignores_case(catalog):
+    assert ids(catalog.query(genre="PLATFORMER")) == ["forest.py", "castle.py"]
+
+
+def test_theme_and_title_search(catalog):
+    assert ids(catalog.query(theme="ocean")) == ["ocean.py"]
+    assert ids(catalog.query(search="Castle")) == ["space.py", "castle.py"]
+    # Shorter than a trigram, so matched with LIKE even when the full-text index exists
+    assert ids(catalog.query(search="Ru")) == ["ocean.py"]
+
+
+def test_created_range(catalog):
+    page = catalog.query(created_after="2024-02-01", created_before="2024-04-01")
+    assert ids(page) == ["space.py", "ocean.py"]
+
+
+def test_updates_are_reflected_in_search(catalog):
+    catalog.add_game("castle.py", metadata("Sunken Ship", "Platformer", "ship", "2024-01-01T10:00:00"))
+    assert ids(catalog.query(search="castle")) == ["space.py"]
+    catalog.remove_game("space.py")
+    assert catalog.query(search="castle")["total"] == 0
+
+
+def test_executable_is_linked(catalog):
+    catalog.set_executable("castle.py", "castle.exe")
+    assert catalog.get_game("castle.py")["executable"] == "castle.exe"
+
+
+def test_reindex_backfills_games_on_disk(tmp_path):
+    games_dir = tmp_path / "games"
+    games_dir.mkdir()
+    (games_dir / "castle.py").write_text("print('castle')\n")
+    (games_dir / "castle_metadata.json").write_text(json.dumps(metadata(*GAMES[0][1:])))
+    (games_dir / "notes.txt").write_text("not a game")
+
+    catalog = GameCatalog(str(tmp_path / "games.db"))
+    assert catalog.reindex(str(games_dir)) == 1
+    game = catalog.get_game("castle.py")
+    assert game["title"] == "Haunted Castle"
+    assert game["content_hash"]
@@ -0,0 +1,83 @@
+"""
+Tests for duplicate detection: exact content hashes, MinHash similarity and LSH lookups in the catalog
+"""
+
+import random
+
+import pytest
+
+from services.game_catalog import GameCatalog
+from services.game_dedup import (
+    content_hash, estimate_similarity, lsh_buckets, minhash_signature, pack_signature, unpack_signature,
+)
+
+
+def game_code(seed: int, functions: int = 40) -> str:
+    """Plausible script whose function bodies depend on the seed"""
+    rng = random.Random(seed)
+    lines = ["import pygame", ""]
+    for i in range(functions):
+        speed, name = rng.randint(1, 1000), rng.choice(["player", "enemy", "coin", "wall", "door"])
+        lines += [f"def update_{name}_{i}(entity, dt):",
+                  f"    entity.x += {speed} * dt",
+                  f"    return entity.x > {rng.randint(0, 800)}", ""]
+    return "\n".join(lines)
+
+
+CONCEPT = {"title": "Haunted Castle", "genre": "Platformer"}
+
+
+def test_content_hash_ignores_surrounding_whitespace_and_concept_case():
+    code = game_code(1)
+    assert content_hash(code, CONCEPT) == content_hash(f"\n{code}\n", {"genre": "platformer", "title": "haunted  castle"})
+    assert content_hash(code, CONCEPT) != content_hash(game_code(2), CONCEPT)
+    assert content_hash(code, CONCEPT) != content_hash(code, {**CONCEPT, "title": "Sunken Ship"})
+
+
+def test_comments_and_layout_do_not_change_the_signature():
+    code = game_code(1)
+    reformatted = "# Generated game\n" + code.replace("entity.x += ", "entity.x  +=  ") + "\n\n# end\n"
+    assert minhash_signature(code) == minhash_signature(reformatted)
+
+
+def test_similarity_tracks_how_much_code_is_shared():
+    base = game_code(1)
+    # Rename a few functions (0, 10, 20 and 30) and change one condition
+    edited = base.replace("_0(entity", "_first(entity").replace("return entity.x >", "return entity.y >", 1)
+    assert edited != base
+    assert estimate_similarity(minhash_signature(base), minhash_signature(edited)) > 0.8
+    assert estimate_similarity(minhash_signature(base), minhash_signature(game_code(2))) < 0.5
+
+
+def test_signature_round_trips_through_storage():
+    signature = minhash_signature(game_code(1))
+    assert unpack_signature(pack_signature(signature)) == signature
+
+
+def test_near_duplicates_share_an_lsh_bucket():
+    base = minhash_signature(game_code(1))
+    edited = minhash_signature(game_code(1).replace("_0(entity", "_first(entity"))
+    assert set(lsh_buckets(base)) & set(lsh_buckets(edited))
+
+
+@pytest.fixture
+def catalog(tmp_path):
+    return GameCatalog(str(tmp_path / "games.db"))
+
+
+def test_catalog_finds_near_duplicates_only_above_the_threshold(catalog):
+    base = game_code(1)
+    catalog.add_game("base.py", {"concept": CONCEPT}, signature=minhash_signature(base))
+    catalog.add_game("other.py", {"concept": CONCEPT}, signature=minhash_signature(game_code(2)))
+
+    match = catalog.find_near_duplicate(minhash_signature(base.replace("update_coin", "update_gem")), 0.6)
+    assert match["game_id"] == "base.py"
+    assert match["similarity"] >= 0.6
+    assert catalog.find_near_duplicate(minhash_signature(game_code(3)), 0.6) is None
+
+
+def test_catalog_finds_exact_duplicates_by_hash(catalog):
+    digest = content_hash(game_code(1), CONCEPT)
+    catalog.add_game("first.py", {"concept": CONCEPT, "content_hash": digest, "created_at": "2024-01-01"})
+    catalog.add_game("second.py", {"concept": CONCEPT, "content_hash": digest, "created_at": "2024-02-01"})
+    assert catalog.find_by_hash(digest)["game_id"] == "first.py"
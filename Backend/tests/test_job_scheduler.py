@@ -0,0 +1,87 @@
+"""
+Tests for the generation scheduler: bounded admission, queue positions, cancellation and stage limits
+"""
+
+import threading
+import time
+
+import pytest
+
+from services.job_scheduler import GenerationScheduler, QueueFullError
+
+
+def wait_until(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not reached in time")
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def gate():
+    """Event that blocking jobs wait on; set at teardown so no worker is left stuck"""
+    event = threading.Event()
+    yield event
+    event.set()
+
+
+def test_jobs_run_on_worker_threads():
+    scheduler = GenerationScheduler(llm_concurrency=1, packaging_concurrency=1)
+    done = threading.Event()
+    scheduler.submit("t1", done.set)
+    assert done.wait(5)
+    wait_until(lambda: scheduler.stats()["running"] == 0)
+
+
+def test_full_queue_is_rejected_with_retry_after(gate):
+    scheduler = GenerationScheduler(llm_concurrency=1, packaging_concurrency=0, max_queue=2, retry_after=7)
+    scheduler.submit("running", gate.wait)
+    wait_until(lambda: scheduler.stats()["running"] == 1)
+    assert scheduler.submit("a", gate.wait) == 1
+    assert scheduler.submit("b", gate.wait) == 2
+    with pytest.raises(QueueFullError) as excinfo:
+        scheduler.submit("c", gate.wait)
+    assert excinfo.value.retry_after == 7
+
+
+def test_queue_position_and_cancel(gate):
+    scheduler = GenerationScheduler(llm_concurrency=1, packaging_concurrency=0)
+    scheduler.submit("running", gate.wait)
+    wait_until(lambda: scheduler.stats()["running"] == 1)
+    scheduler.submit("a", gate.wait)
+    scheduler.submit("b", gate.wait)
+    assert scheduler.queue_position("b") == 2
+    assert scheduler.queue_position("running") is None
+
+    assert scheduler.cancel("a")
+    assert not scheduler.cancel("running")
+    assert scheduler.queue_position("b") == 1
+
+
+def test_stage_limits_concurrency():
+    scheduler = GenerationScheduler(llm_concurrency=2, packaging_concurrency=1)
+    active, peak = [0], [0]
+    lock = threading.Lock()
+
+    def job():
+        with scheduler.stage("packaging"):
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.05)
+            with lock:
+                active[0] -= 1
+
+    for i in range(3):
+        scheduler.submit(f"t{i}", job)
+    wait_until(lambda: scheduler.stats() == {"queued": 0, "running": 0, "max_queue": 16})
+    assert peak[0] == 1
+
+
+def test_failing_job_does_not_stop_the_worker():
+    scheduler = GenerationScheduler(llm_concurrency=1, packaging_concurrency=0)
+    done = threading.Event()
+    scheduler.submit("bad", lambda: 1 / 0)
+    scheduler.submit("good", done.set)
+    assert done.wait(5)
@@ -0,0 +1,62 @@
+"""
+Tests for the model backends: recording live calls and replaying them offline
+"""
+
+import pytest
+
+from generators.model_backends import (
+    ModelBackend, ModelResponse, RecordingBackend, ReplayBackend, recording_key,
+)
+
+
+class FixedBackend(ModelBackend):
+    """Stands in for the live API, answering every prompt with the same text"""
+
+    def __init__(self, text: str):
+        self.text = text
+
+    def model(self, model_name: str, json_output: bool = False):
+        backend = self
+
+        class FixedModel:
+            def __init__(self):
+                # Named like SDK models, which is what the replay backend looks recordings up by
+                self.model_name = f"models/{model_name}"
+
+            def generate_content(self, prompt, **kwargs):
+                if kwargs.get("stream"):
+                    return iter([ModelResponse(backend.text[:3]), ModelResponse(backend.text[3:])])
+                return ModelResponse(backend.text)
+
+        return FixedModel()
+
+
+def test_model_backend_is_abstract():
+    with pytest.raises(TypeError):
+        ModelBackend()
+
+
+def test_recording_key_ignores_the_variation_seed():
+    first = "Theme: castle\nINTERNAL VARIATION SEED: 123456"
+    second = "Theme: castle\nINTERNAL VARIATION SEED: 654321"
+    assert recording_key("gemini", first) == recording_key("gemini", second)
+    assert recording_key("gemini", first) != recording_key("gemini", "Theme: forest\nINTERNAL VARIATION SEED: 1")
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_recorded_responses_are_replayed(tmp_path, stream):
+    recorder = RecordingBackend(FixedBackend("recorded answer"), str(tmp_path))
+    response = recorder.model("gemini").generate_content("prompt", stream=stream)
+    if stream:
+        # Streams are recorded once they have been read to the end
+        assert "".join(chunk.text for chunk in response) == "recorded answer"
+
+    replay = ReplayBackend(str(tmp_path), synthesize_missing=False)
+    assert replay.model("gemini").generate_content("prompt").text == "recorded answer"
+
+
+def test_missing_recordings_are_synthesized_or_refused(tmp_path):
+    prompt = "Theme: castle"
+    assert "Replay Quest" in ReplayBackend(str(tmp_path)).respond("gemini", prompt)
+    with pytest.raises(LookupError):
+        ReplayBackend(str(tmp_path), synthesize_missing=False).respond("gemini", prompt)
@@ -0,0 +1,81 @@
+"""
+Tests for runtime packaging: games are appended as a zip to a cached runtime instead of rebuilt
+"""
+
+import os
+import zipfile
+
+import pytest
+
+from services.packaging import EXE_SUFFIX, GamePackager, artifact_digest, file_digest, script_imports
+
+RUNTIME_BYTES = b"\x7fELF fake runtime executable"
+GAME_SCRIPT = "import pygame\nimport random\n\nprint('hello')\n"
+
+
+@pytest.fixture
+def packager(tmp_path):
+    packager = GamePackager(runtime_dir=str(tmp_path / "runtime"), work_dir=str(tmp_path / "work"))
+    # A prebuilt runtime in the cache, so no PyInstaller build is needed
+    runtime_path = packager.runtime_path()
+    os.makedirs(os.path.dirname(runtime_path))
+    with open(runtime_path, 'wb') as f:
+        f.write(RUNTIME_BYTES)
+    yield packager
+    packager.shutdown()
+
+
+@pytest.fixture
+def script_path(tmp_path):
+    path = tmp_path / "game.py"
+    path.write_text(GAME_SCRIPT)
+    return str(path)
+
+
+def test_script_imports():
+    assert script_imports("import os.path\nfrom pygame import locals\nfrom . import sibling\n") == ["os", "pygame"]
+
+
+def test_runtime_key_changes_with_the_bundled_modules():
+    assert (GamePackager(runtime_modules=["pygame"]).runtime_key()
+            != GamePackager(runtime_modules=["pygame", "numpy"]).runtime_key())
+
+
+def test_game_is_appended_to_the_cached_runtime(packager, script_path, tmp_path):
+    asset = tmp_path / "player.png"
+    asset.write_bytes(b"png")
+    output_dir = str(tmp_path / "games")
+
+    exe_path = packager.package(script_path, "castle", output_dir, asset_files=[str(asset)])
+
+    with open(exe_path, 'rb') as f:
+        assert f.read().startswith(RUNTIME_BYTES)
+    # zipfile finds the archive from the end of the file, as the runtime launcher does
+    with zipfile.ZipFile(exe_path) as bundle:
+        assert bundle.read("game.py").decode() == GAME_SCRIPT
+        assert bundle.read("assets/player.png") == b"png"
+    assert artifact_digest(exe_path) == file_digest(exe_path)
+
+
+def test_runtime_is_reused_across_games(packager, script_path, tmp_path, monkeypatch):
+    builds = []
+    monkeypatch.setattr(packager, "_run_in_pool", lambda *args: builds.append(args))
+    for name in ("first", "second"):
+        packager.package(script_path, name, str(tmp_path / "games"))
+    assert builds == []
+    for name in ("first", "second"):
+        assert os.path.isfile(tmp_path / "games" / f"{name}{EXE_SUFFIX}")
+
+
+@pytest.mark.parametrize("script", ["import numpy\n", "def broken(:\n"])
+def test_scripts_outside_the_runtime_get_a_full_build(packager, tmp_path, monkeypatch, script):
+    path = tmp_path / "game.py"
+    path.write_text(script)
+    output = tmp_path / "games" / "full_build"
+
+    def fake_build(job_id, func, script_path, game_name, output_dir):
+        output.write_bytes(b"full build")
+        return str(output)
+
+    monkeypatch.setattr(packager, "_run_in_pool", fake_build)
+    assert packager.package(str(path), "full_build", str(tmp_path / "games")) == str(output)
@@ -0,0 +1,60 @@
+"""
+Tests for isolated packaging builds: cancellation and timeouts stop the build process
+"""
+
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+from services.packaging import (
+    CANCEL_MARKER, BuildCancelled, BuildTimeout, GamePackager, PackagingError, _run_build,
+)
+
+SLEEP_COMMAND = [sys.executable, "-c", "import time; time.sleep(30)"]
+
+
+def test_cancel_marker_stops_a_running_build(tmp_path):
+    marker = tmp_path / CANCEL_MARKER
+    threading.Timer(0.2, marker.touch).start()
+    started = time.monotonic()
+    with pytest.raises(BuildCancelled):
+        _run_build(SLEEP_COMMAND, str(tmp_path), timeout=60)
+    assert time.monotonic() - started < 5
+
+
+def test_build_is_stopped_at_the_timeout(tmp_path):
+    with pytest.raises(BuildTimeout):
+        _run_build(SLEEP_COMMAND, str(tmp_path), timeout=0.5)
+
+
+def test_failed_build_reports_its_output(tmp_path):
+    with pytest.raises(PackagingError, match="no such module"):
+        _run_build([sys.executable, "-c", "raise SystemExit('no such module')"], str(tmp_path), timeout=60)
+
+
+def test_cancelled_job_is_not_started(tmp_path):
+    packager = GamePackager(work_dir=str(tmp_path / "work"), cancel_check=lambda job_id: True)
+    script = tmp_path / "game.py"
+    script.write_text("print('hello')\n")
+    with pytest.raises(BuildCancelled):
+        packager.package(str(script), "game", str(tmp_path / "games"), job_id="t1")
+
+
+def test_cancel_check_reaches_a_build_in_the_worker_process(tmp_path):
+    # The flag another server worker would set in the shared task store
+    cancelled = threading.Event()
+    packager = GamePackager(work_dir=str(tmp_path / "work"), max_workers=1,
+                            cancel_check=lambda job_id: cancelled.is_set())
+    threading.Timer(1.0, cancelled.set).start()
+    started = time.monotonic()
+    try:
+        with pytest.raises(BuildCancelled):
+            packager._run_in_pool("t1", _run_build, SLEEP_COMMAND)
+    finally:
+        packager.shutdown()
+    assert time.monotonic() - started < 10
+    # The build's workdir is cleaned up
+    assert os.listdir(tmp_path / "work") == []
@@ -0,0 +1,73 @@
+"""
+Tests for progress events: stage transitions recorded in the task store and pushed to stream subscribers
+"""
+
+import asyncio
+import threading
+
+import pytest
+
+from services.progress_events import ProgressBroker, ProgressReporter
+from services.task_store import SQLiteTaskStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SQLiteTaskStore(str(tmp_path / "tasks.db"))
+
+
+def test_stages_are_recorded_in_order_with_timings(store):
+    progress = ProgressReporter(store, "t1")
+    with progress.stage("concept"):
+        pass
+    progress("code", "started")
+    progress("code", "finished")
+    progress.set_status("SUCCESS", {"executable_file": "game"})
+
+    record = store.get("t1")
+    events = record["events"]
+    assert [(e["seq"], e["stage"], e["phase"]) for e in events] == [
+        (1, "concept", "started"), (2, "concept", "finished"),
+        (3, "code", "started"), (4, "code", "finished"),
+        (5, "success", "status"),
+    ]
+    assert set(record["stage_timings"]) == {"concept", "code"}
+    assert events[-1]["stage_timings"] == record["stage_timings"]
+    assert record["status"] == "SUCCESS"
+    assert record["result"] == {"executable_file": "game"}
+
+
+def test_stage_is_finished_when_the_block_raises(store):
+    progress = ProgressReporter(store, "t1")
+    with pytest.raises(RuntimeError):
+        with progress.stage("package"):
+            raise RuntimeError("build failed")
+    assert store.get("t1")["events"][-1]["phase"] == "finished"
+
+
+def test_subscribers_are_woken_from_worker_threads(store):
+    broker = ProgressBroker()
+
+    async def watch():
+        with broker.subscribe("t1") as subscription:
+            progress = ProgressReporter(store, "t1", broker)
+            threading.Thread(target=progress, args=("concept", "started")).start()
+            assert await subscription.wait(5)
+            # Nothing else happens, so the next wait times out
+            assert not await subscription.wait(0.05)
+
+    asyncio.run(watch())
+    assert store.get("t1")["stage"] == "concept"
+
+
+def test_unsubscribed_streams_are_dropped(store):
+    broker = ProgressBroker()
+
+    async def watch():
+        with broker.subscribe("t1"):
+            pass
+
+    asyncio.run(watch())
+    # Publishing to a task nobody watches any more is a no-op
+    broker.publish("t1")
+    assert not broker._subscribers
@@ -0,0 +1,111 @@
+"""
+Tests for the code prompt builder: template compaction and the token budget
+"""
+
+import ast
+
+import pytest
+
+from config import config
+from generators.prompt_builder import (
+    build_game_code_prompt, compact_template_code, estimate_tokens, minify_json,
+)
+from generators.template_registry import TemplateRegistry
+
+STITCHED = '''# --- START GENERATED GAME CODE TEMPLATE ---
+
+# --- TEMPLATE: A_CORE_SETUP ---
+import pygame
+import sys
+# Screen size
+WIDTH, HEIGHT = 800, 600
+pygame.init()
+running = True
+while running:
+    running = False
+pygame.quit()
+sys.exit()
+
+# --- TEMPLATE: B_MOVEMENT ---
+import pygame
+pygame.init()
+# Assumed from A
+WIDTH, HEIGHT = 800, 600
+SPEED = 5
+
+def move(rect):
+    """Move the player by SPEED"""
+    rect.x += SPEED
+running = True
+while running:
+    running = False
+pygame.quit()
+sys.exit()
+
+# --- END GENERATED GAME CODE TEMPLATE ---
+'''
+
+
+def statements(source):
+    return [ast.unparse(stmt) for stmt in ast.parse(source).body]
+
+
+def test_repeated_setup_is_emitted_once():
+    compact = statements(compact_template_code(STITCHED))
+    for stmt in ("import pygame", "pygame.init()", "WIDTH, HEIGHT = (800, 600)"):
+        assert compact.count(stmt) == 1
+    assert "SPEED = 5" in compact
+
+
+def test_only_the_last_demo_loop_and_cleanup_are_kept():
+    compact = statements(compact_template_code(STITCHED))
+    assert sum(stmt.startswith("while running") for stmt in compact) == 1
+    assert compact[-2:] == ["pygame.quit()", "sys.exit()"]
+    # The kept loop still follows the code it demonstrates
+    move = next(i for i, stmt in enumerate(compact) if stmt.startswith("def move"))
+    assert move < compact.index("running = True")
+
+
+def test_comments_are_dropped_but_template_markers_kept():
+    compact = compact_template_code(STITCHED)
+    assert "# Screen size" not in compact and "# Assumed from A" not in compact
+    assert "# --- TEMPLATE: A_CORE_SETUP ---" in compact
+    assert "# --- TEMPLATE: B_MOVEMENT ---" in compact
+
+
+def test_docstrings_are_stripped_on_request():
+    assert "Move the player" in compact_template_code(STITCHED)
+    assert "Move the player" not in compact_template_code(STITCHED, strip_docstrings=True)
+
+
+def test_unparsable_templates_are_sent_unchanged():
+    assert compact_template_code("def broken(:\n") == "def broken(:\n"
+
+
+def test_repository_templates_stay_valid_and_shrink():
+    registry = TemplateRegistry(hot_reload=False)
+    stitched = registry.stitch(list(registry.template_ids))
+    compact = compact_template_code(stitched)
+    ast.parse(compact)
+    assert estimate_tokens(compact) < estimate_tokens(stitched)
+
+
+def test_minify_json():
+    assert minify_json({"a": [1, 2], "b": "é"}) == '{"a":[1,2],"b":"é"}'
+
+
+@pytest.fixture
+def budget():
+    previous = config.get("gemini.code_prompt_token_budget", 6000)
+    yield lambda tokens: config.set("gemini.code_prompt_token_budget", tokens)
+    config.set("gemini.code_prompt_token_budget", previous)
+
+
+def test_docstrings_are_stripped_only_over_budget(budget):
+    concept, level = {"title": "Castle"}, {"level_number": 1}
+    budget(100_000)
+    assert "Move the player" in build_game_code_prompt(concept, level, STITCHED)
+    budget(10)
+    prompt = build_game_code_prompt(concept, level, STITCHED)
+    assert "Move the player" not in prompt
+    assert '{"title":"Castle"}' in prompt
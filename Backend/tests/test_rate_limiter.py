@@ -0,0 +1,93 @@
+"""
+Tests for Gemini quota pacing: shared token buckets in the task store and the QuotaLimiter on top of them
+"""
+
+import pytest
+
+from config import config
+from services.task_store import SQLiteTaskStore
+from generators.rate_limiter import (
+    PRIORITY_CODING, PRIORITY_PLANNING, REQUESTS_BUCKET, TOKENS_BUCKET, QuotaExhausted, QuotaLimiter,
+)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SQLiteTaskStore(str(tmp_path / "tasks.db"))
+
+
+@pytest.fixture
+def live_backend():
+    previous = config.get("gemini.backend", "live")
+    config.set("gemini.backend", "live")
+    yield
+    config.set("gemini.backend", previous)
+
+
+def test_new_bucket_starts_full(store):
+    assert store.peek_tokens({"b": (10, 1)}) == {"b": 10}
+
+
+def test_take_tokens_is_all_or_nothing(store):
+    assert store.take_tokens({"a": (5, 10, 1), "b": (3, 4, 1)}) == 0.0
+    # "b" has 1 left, so nothing is taken from "a" either
+    wait = store.take_tokens({"a": (1, 10, 1), "b": (3, 4, 1)})
+    assert wait == pytest.approx(2, abs=0.1)
+    levels = store.peek_tokens({"a": (10, 1), "b": (4, 1)})
+    assert levels["a"] == pytest.approx(5, abs=0.1)
+    assert levels["b"] == pytest.approx(1, abs=0.1)
+
+
+def test_buckets_refill_over_time(store, monkeypatch):
+    import services.task_store as task_store_module
+    now = [1000.0]
+    monkeypatch.setattr(task_store_module.time, "time", lambda: now[0])
+    store.take_tokens({"b": (10, 10, 2)})
+    assert store.peek_tokens({"b": (10, 2)})["b"] == 0
+    now[0] += 3
+    assert store.peek_tokens({"b": (10, 2)})["b"] == pytest.approx(6)
+    now[0] += 100
+    assert store.peek_tokens({"b": (10, 2)})["b"] == pytest.approx(10)
+
+
+def test_reserve_is_kept_back(store):
+    assert store.take_tokens({"b": (7, 10, 1)}, reserve=0.2) == 0.0
+    assert store.take_tokens({"b": (2, 10, 1)}, reserve=0.2) > 0
+    assert store.take_tokens({"b": (2, 10, 1)}) == 0.0
+
+
+def test_force_drives_bucket_negative(store):
+    store.take_tokens({"b": (15, 10, 1)}, force=True)
+    assert store.peek_tokens({"b": (10, 1)})["b"] == pytest.approx(-5, abs=0.1)
+
+
+def test_limiter_leaves_coding_reserve(store, live_backend):
+    limiter = QuotaLimiter(store, requests_per_minute=10, tokens_per_minute=1000, coding_reserve=0.2, max_wait=0)
+    for _ in range(8):
+        limiter.acquire(10, PRIORITY_PLANNING)
+    with pytest.raises(QuotaExhausted):
+        limiter.acquire(10, PRIORITY_PLANNING)
+    limiter.acquire(10, PRIORITY_CODING)
+    headroom = limiter.headroom()
+    assert headroom["requests_per_minute"]["available"] == pytest.approx(1, abs=0.1)
+
+
+def test_limiter_charges_response_tokens(store, live_backend):
+    limiter = QuotaLimiter(store, requests_per_minute=10, tokens_per_minute=1000, max_wait=0)
+    limiter.acquire(100, PRIORITY_CODING)
+    limiter.record_usage(300)
+    levels = store.peek_tokens({TOKENS_BUCKET: (1000, 1000 / 60), REQUESTS_BUCKET: (10, 10 / 60)})
+    assert levels[TOKENS_BUCKET] == pytest.approx(600, abs=1)
+
+
+def test_replay_backend_is_not_paced(store, live_backend):
+    limiter = QuotaLimiter(store, requests_per_minute=1, tokens_per_minute=1000, max_wait=0)
+    limiter.acquire(10, PRIORITY_CODING)
+    # Switching to replay after the limiter exists, as main_cli does for --backend replay
+    config.set("gemini.backend", "replay")
+    for _ in range(5):
+        limiter.acquire(10, PRIORITY_CODING)
+    limiter.record_usage(5000)
+    assert store.peek_tokens({TOKENS_BUCKET: (1000, 1000 / 60)})[TOKENS_BUCKET] == pytest.approx(990, abs=1)
+    # Metrics must not report a quota that nothing is drawing from
+    assert limiter.headroom() is None
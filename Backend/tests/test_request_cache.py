@@ -0,0 +1,72 @@
+"""
+Tests for the semantic request cache: trigram threshold and the word-level guard
+"""
+
+import pytest
+
+from services.request_cache import SemanticRequestCache, same_words
+
+THRESHOLD = 0.9
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return SemanticRequestCache(str(tmp_path / "request_cache.db"))
+
+
+@pytest.mark.parametrize("a, b", [
+    ("a game about cats", "a game about bats"),
+    ("cats in space", "dogs in space"),
+    ("pirates fighting ninjas", "ninjas fighting pirates"),
+    ("castle escape #0", "castle escape #1"),
+])
+def test_different_games_are_not_the_same_words(a, b):
+    assert not same_words(a, b)
+
+
+@pytest.mark.parametrize("a, b", [
+    ("Cats in Space!", "cats in space"),
+    ("Cats in Space", "cat in space"),
+    ("a pirate adventure", "pirate adventures"),
+    ("space pirates", "space pirats"),
+])
+def test_rewordings_are_the_same_words(a, b):
+    assert same_words(a, b)
+
+
+def test_lookup_returns_identical_theme(cache):
+    cache.add("Haunted castle escape", {"executable_file": "castle.exe"})
+    match = cache.lookup("haunted castle escape!", THRESHOLD)
+    assert match["result"] == {"executable_file": "castle.exe"}
+    assert match["similarity"] >= THRESHOLD
+
+
+@pytest.mark.parametrize("theme", [
+    "a game about bats",
+    "dogs in space",
+    "ninjas fighting pirates",
+])
+def test_lookup_rejects_one_word_changes(cache, theme):
+    cache.add("a game about cats", {"executable_file": "cats.exe"})
+    cache.add("cats in space", {"executable_file": "space.exe"})
+    cache.add("pirates fighting ninjas", {"executable_file": "pirates.exe"})
+    assert cache.lookup(theme, THRESHOLD) is None
+
+
+def test_lookup_skips_word_mismatch_for_next_best_candidate(cache):
+    cache.add("pirates fighting ninjas", {"executable_file": "old.exe"})
+    cache.add("ninjas fighting pirates", {"executable_file": "new.exe"})
+    assert cache.lookup("ninjas fighting pirates", THRESHOLD)["result"]["executable_file"] == "new.exe"
+
+
+def test_forget_removes_entries(cache):
+    cache.add("robot factory", {"executable_file": "robots.exe"})
+    cache.forget("robot factory")
+    assert cache.lookup("robot factory", THRESHOLD) is None
+
+
+def test_other_cache_instances_see_new_entries(cache):
+    other = SemanticRequestCache(cache.db_path)
+    assert other.lookup("jungle temple", THRESHOLD) is None
+    cache.add("jungle temple", {"executable_file": "temple.exe"})
+    assert other.lookup("jungle temple", THRESHOLD) is not None
@@ -0,0 +1,70 @@
+"""
+Tests for the response cache: content addressing, expiry, LRU eviction and which generator calls are cached
+"""
+
+import pytest
+
+from generators.gemini_generator import GeminiGameGenerator
+from generators.model_backends import ReplayBackend
+from generators.response_cache import ResponseCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ResponseCache(str(tmp_path / "response_cache.db"))
+
+
+def test_key_depends_on_model_prompt_and_config():
+    key = ResponseCache.make_key("gemini", "prompt", {"temperature": 0.7})
+    assert key == ResponseCache.make_key("gemini", "prompt", {"temperature": 0.7})
+    assert key != ResponseCache.make_key("gemini", "prompt", {"temperature": 0.2})
+    assert key != ResponseCache.make_key("gemini", "other prompt", {"temperature": 0.7})
+    assert key != ResponseCache.make_key("other", "prompt", {"temperature": 0.7})
+
+
+def test_put_and_get(cache):
+    cache.put("k", "gemini", "response")
+    assert cache.get("k") == "response"
+    assert cache.get("missing") is None
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_expired_entries_are_misses(tmp_path):
+    cache = ResponseCache(str(tmp_path / "response_cache.db"), ttl_seconds=1)
+    cache.put("k", "gemini", "response")
+    cache._connection().execute("UPDATE responses SET created_at = created_at - 10")
+    assert cache.get("k") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_eviction_drops_least_recently_used(tmp_path):
+    cache = ResponseCache(str(tmp_path / "response_cache.db"), max_entries=2)
+    for key in ("a", "b", "c"):
+        cache.put(key, "gemini", key)
+        cache._connection().execute("UPDATE responses SET last_access = last_access - 10 WHERE key != ?", (key,))
+    cache.get("a")
+    assert cache.evict() == 1
+    assert cache.get("b") is None
+    assert cache.get("a") == "a" and cache.get("c") == "c"
+
+
+@pytest.fixture
+def generator(cache, replay_backend):
+    generator = GeminiGameGenerator(use_cache=False, backend=ReplayBackend())
+    generator.response_cache = cache
+    return generator
+
+
+def test_repeated_prompts_are_served_from_the_cache(generator, cache):
+    concept = generator._get_fallback_concept("castle")
+    first = generator.generate_template_plan(concept)
+    assert generator.generate_template_plan(concept) == first
+    assert cache.stats()["entries"] == 1
+    assert cache.hits == 1
+
+
+def test_seeded_concept_prompts_are_not_cached(generator, cache):
+    for _ in range(2):
+        # The replay backend's concept, not the fallback used when a call fails
+        assert generator.generate_game_concept("castle")["title"] == "Replay Quest"
+    assert cache.stats() == {"hits": 0, "misses": 0, "hit_rate": 0.0, "entries": 0, "bytes": 0}
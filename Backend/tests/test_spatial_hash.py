@@ -0,0 +1,82 @@
+"""
+Tests for the engine's uniform-grid spatial hash
+"""
+
+import pytest
+
+pygame = pytest.importorskip("pygame")
+
+from engine.spatial_hash import SpatialHash
+
+
+class Box:
+    def __init__(self, x, y, w=10, h=10):
+        self.rect = pygame.Rect(x, y, w, h)
+
+
+def test_query_finds_only_overlapping_entities():
+    grid = SpatialHash(64)
+    near, touching_cell, far = Box(10, 10), Box(60, 60), Box(500, 500)
+    for box in (near, touching_cell, far):
+        grid.insert(box)
+    assert grid.query(pygame.Rect(0, 0, 20, 20)) == [near]
+    assert set(grid.candidates(pygame.Rect(0, 0, 20, 20))) == {near, touching_cell}
+
+
+def test_entity_spanning_cells_is_in_each():
+    grid = SpatialHash(64)
+    wide = Box(0, 0, 200, 10)
+    grid.insert(wide)
+    assert grid.query(pygame.Rect(150, 0, 5, 5)) == [wide]
+    assert grid.query(pygame.Rect(150, 20, 5, 5)) == []
+
+
+def test_query_results_follow_insertion_order():
+    grid = SpatialHash(64)
+    boxes = [Box(5 * i, 5 * i, 40, 40) for i in range(6)]
+    for box in reversed(boxes):
+        grid.insert(box)
+    assert grid.query(pygame.Rect(0, 0, 64, 64)) == list(reversed(boxes))
+
+
+def test_update_rebuckets_moved_entity():
+    grid = SpatialHash(64)
+    box = Box(10, 10)
+    grid.insert(box)
+    box.rect.topleft = (300, 300)
+    grid.update(box)
+    assert grid.query(pygame.Rect(0, 0, 64, 64)) == []
+    assert grid.query(pygame.Rect(295, 295, 20, 20)) == [box]
+    # Old cells are dropped once empty
+    assert (0, 0) not in grid._cells
+
+
+def test_update_within_same_cells_keeps_buckets():
+    grid = SpatialHash(64)
+    box = Box(10, 10)
+    grid.insert(box)
+    cells = dict(grid._cells)
+    box.rect.topleft = (20, 20)
+    grid.update(box)
+    assert grid._cells == cells
+
+
+def test_remove_and_clear():
+    grid = SpatialHash(64)
+    a, b = Box(0, 0), Box(100, 100)
+    grid.insert(a)
+    grid.insert(b)
+    grid.remove(a)
+    grid.remove(a)
+    assert a not in grid and len(grid) == 1
+    grid.clear()
+    assert len(grid) == 0 and grid.query(pygame.Rect(0, 0, 200, 200)) == []
+
+
+def test_negative_and_zero_size_rects():
+    grid = SpatialHash(64)
+    point, negative = Box(64, 64, 0, 0), Box(-30, -30)
+    grid.insert(point)
+    grid.insert(negative)
+    assert point in grid.candidates(pygame.Rect(64, 64, 1, 1))
+    assert grid.query(pygame.Rect(-40, -40, 20, 20)) == [negative]
@@ -0,0 +1,78 @@
+"""
+Tests for parallel stage execution: the stage graph executor and the agent pipeline built on it
+"""
+
+import threading
+import time
+
+import pytest
+
+from agents.stage_graph import run_stage_graph
+
+
+class Timeline:
+    """Progress callback recording when each stage started and finished"""
+
+    def __init__(self):
+        self.started = {}
+        self.finished = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, stage, phase):
+        with self._lock:
+            (self.started if phase == "started" else self.finished)[stage] = time.perf_counter()
+
+    def overlapped(self, a, b):
+        return self.started[a] < self.finished[b] and self.started[b] < self.finished[a]
+
+
+def test_results_are_passed_to_dependent_stages():
+    results = run_stage_graph({
+        "a": (lambda: 1, []),
+        "b": (lambda: 2, []),
+        "sum": (lambda a, b: a + b, ["a", "b"]),
+    })
+    assert results == {"a": 1, "b": 2, "sum": 3}
+
+
+def test_independent_stages_run_concurrently():
+    timeline = Timeline()
+    barrier = threading.Barrier(3, timeout=5)
+    run_stage_graph({name: (barrier.wait, []) for name in "abc"}, max_workers=3, progress_callback=timeline)
+    assert timeline.overlapped("a", "b") and timeline.overlapped("b", "c")
+
+
+def test_stage_waits_for_its_dependencies():
+    timeline = Timeline()
+    run_stage_graph({
+        "slow": (lambda: time.sleep(0.05), []),
+        "after": (lambda slow: None, ["slow"]),
+    }, progress_callback=timeline)
+    assert timeline.started["after"] >= timeline.finished["slow"]
+
+
+def test_failing_stage_is_raised():
+    with pytest.raises(ZeroDivisionError):
+        run_stage_graph({"bad": (lambda: 1 / 0, []), "next": (lambda bad: bad, ["bad"])})
+
+
+@pytest.mark.parametrize("stages", [
+    {"a": (lambda b: b, ["b"]), "b": (lambda a: a, ["a"])},
+    {"a": (lambda missing: missing, ["missing"])},
+])
+def test_invalid_graphs_are_rejected(stages):
+    with pytest.raises(ValueError):
+        run_stage_graph(stages)
+
+
+def test_agent_overlaps_stages_that_only_need_the_concept(replay_backend):
+    pytest.importorskip("pygame")
+    from agents.game_agents import GameCreationAgent
+
+    timeline = Timeline()
+    game_package = GameCreationAgent().create_game_autonomously("haunted lighthouse", progress_callback=timeline)
+
+    assert game_package["code"]
+    assert timeline.overlapped("template_plan", "level_design")
+    assert timeline.overlapped("level_design", "assets")
+    assert timeline.started["code"] >= max(timeline.finished["template_plan"], timeline.finished["level_design"])
@@ -0,0 +1,84 @@
+"""
+Tests for structured output parsing: lenient JSON extraction and repair, and schema validation
+"""
+
+import pytest
+
+from generators.structured_output import (
+    StructuredOutputError, loads_lenient, parse_asset_selection, parse_game_concept, parse_level_design,
+    parse_template_plan,
+)
+
+
+@pytest.mark.parametrize("text, expected", [
+    ('{"a": 1}', {"a": 1}),
+    ('```json\n{"a": 1}\n```', {"a": 1}),
+    ('Here is the concept:\n{"a": 1}\nEnjoy!', {"a": 1}),
+    ('{"a": [1, 2,], "b": 2,}', {"a": [1, 2], "b": 2}),
+    ('{\n  // the title\n  "a": "http://x"\n}', {"a": "http://x"}),
+    ("{'a': True, 'b': None}", {"a": True, "b": None}),
+])
+def test_near_miss_json_is_repaired(text, expected):
+    assert loads_lenient(text) == expected
+
+
+@pytest.mark.parametrize("text, expected", [
+    # Truncated inside a string: the string and containers are closed
+    ('{"a": 1, "b": "cut', {"a": 1, "b": "cut"}),
+    # Truncated after a key: cut back to the last complete element
+    ('{"a": 1, "b": {"c": 2}, "d":', {"a": 1, "b": {"c": 2}}),
+    ('{"a": [1, 2, 3', {"a": [1, 2, 3]}),
+])
+def test_truncated_json_is_closed(text, expected):
+    assert loads_lenient(text) == expected
+
+
+def test_brackets_and_comment_markers_inside_strings_are_left_alone():
+    assert loads_lenient('{"a": "x // y, ]}", "b": "\\"q\\""}') == {"a": "x // y, ]}", "b": '"q"'}
+
+
+@pytest.mark.parametrize("text", ["no json here", "{{{{"])
+def test_hopeless_responses_raise(text):
+    with pytest.raises(StructuredOutputError):
+        loads_lenient(text)
+
+
+def test_concept_defaults_and_coercions():
+    concept = parse_game_concept('{"title": "Castle", "mechanics": "jumping", '
+                                 '"player_abilities": [{"name": "dash"}], "enemies": [{"name": "Ghost"}], '
+                                 '"custom": 1}')
+    assert concept["title"] == "Castle"
+    assert concept["genre"] == "adventure"
+    assert concept["mechanics"] == ["jumping"]
+    assert concept["player_abilities"] == ["dash"]
+    assert concept["enemies"] == [{"name": "Ghost", "behavior": "", "difficulty": "medium"}]
+    # Fields the schema does not name are kept for the templates
+    assert concept["custom"] == 1
+
+
+def test_concept_without_a_title_is_rejected():
+    with pytest.raises(StructuredOutputError):
+        parse_game_concept('{"description": "untitled"}')
+
+
+def test_level_design_fills_in_defaults():
+    level = parse_level_design('{"level_number": 2, "obstacles": [{"x": 10, "y": 20.5}]}')
+    assert level["size"] == {"width": 800, "height": 600}
+    assert level["obstacles"] == [{"x": 10, "y": 20.5, "type": "", "width": 50, "height": 50}]
+
+
+def test_asset_selection_requires_a_player_sprite():
+    assert parse_asset_selection('{"player_sprite": "knight.png"}')["background_asset"] == "SIMPLE_SHAPE, Black"
+    with pytest.raises(StructuredOutputError):
+        parse_asset_selection('{"enemies": {}}')
+
+
+def test_template_plan_is_ordered_and_deduplicated():
+    text = '```json\n["A_CORE_SETUP", " B_MOVEMENT_TOPDOWN", "A_CORE_SETUP",]\n```'
+    assert parse_template_plan(text) == ["A_CORE_SETUP", "B_MOVEMENT_TOPDOWN"]
+
+
+@pytest.mark.parametrize("text", ["[]", '[1, 2]'])
+def test_invalid_template_plans_are_rejected(text):
+    with pytest.raises(StructuredOutputError):
+        parse_template_plan(text)
@@ -0,0 +1,64 @@
+"""
+Tests for the SQLite task store: records shared across workers, surviving restarts and expiring when finished
+"""
+
+import threading
+import time
+
+import pytest
+
+from services.task_store import SQLiteTaskStore, TaskStore
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "data" / "tasks.db")
+
+
+def test_task_store_is_abstract():
+    with pytest.raises(TypeError):
+        TaskStore()
+
+
+def test_records_survive_a_restart(db_path):
+    store = SQLiteTaskStore(db_path)
+    store.set("t1", {"status": "IN_PROGRESS", "result": None, "progress": 40})
+    # A fresh instance on the same file, as after a server restart or in another worker
+    restarted = SQLiteTaskStore(db_path)
+    assert restarted.get("t1") == {"status": "IN_PROGRESS", "result": None, "progress": 40}
+
+
+def test_update_merges_fields_and_creates_missing_records(db_path):
+    store = SQLiteTaskStore(db_path)
+    assert store.update("t1", progress=10) == {"status": "PENDING", "result": None, "progress": 10}
+    store.update("t1", status="SUCCESS", result={"executable_file": "game"})
+    assert store.get("t1") == {"status": "SUCCESS", "result": {"executable_file": "game"}, "progress": 10}
+
+
+def test_concurrent_updates_do_not_lose_fields(db_path):
+    store = SQLiteTaskStore(db_path)
+    store.set("t1", {"status": "IN_PROGRESS", "result": None})
+    workers = [threading.Thread(target=store.update, args=("t1",), kwargs={f"field_{i}": i}) for i in range(8)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    record = store.get("t1")
+    assert all(record[f"field_{i}"] == i for i in range(8))
+
+
+def test_delete(db_path):
+    store = SQLiteTaskStore(db_path)
+    store.set("t1", {"status": "PENDING", "result": None})
+    store.delete("t1")
+    assert store.get("t1") is None
+
+
+def test_finished_tasks_expire_but_running_ones_do_not(db_path):
+    store = SQLiteTaskStore(db_path, ttl_seconds=1)
+    store.set("done", {"status": "SUCCESS", "result": {}})
+    store.set("running", {"status": "IN_PROGRESS", "result": None})
+    time.sleep(1.1)
+    assert store.get("done") is None
+    assert store.get("running") is not None
+    assert store.purge_expired() == 1
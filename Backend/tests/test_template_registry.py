@@ -0,0 +1,73 @@
+"""
+Tests for the template registry: preloading, validation, stitched-combination caching and hot reload
+"""
+
+import os
+
+import pytest
+
+from config import config
+from generators.template_registry import TemplateRegistry, template_id_from_filename
+
+
+@pytest.fixture
+def templates_dir(tmp_path):
+    (tmp_path / "template_A_core_setup.py").write_text("import pygame\n")
+    (tmp_path / "template_B_movement.py").write_text("speed = 5\n")
+    (tmp_path / "template_X_broken.py").write_text("def broken(:\n")
+    (tmp_path / "notes.py").write_text("not a template\n")
+    return tmp_path
+
+
+def test_template_id_from_filename():
+    assert template_id_from_filename("template_A_core_setup.py") == "A_CORE_SETUP"
+
+
+def test_only_valid_templates_are_loaded(templates_dir):
+    registry = TemplateRegistry(str(templates_dir), hot_reload=False)
+    assert list(registry.template_ids) == ["A_CORE_SETUP", "B_MOVEMENT"]
+    assert registry.get("A_CORE_SETUP") == "import pygame\n"
+    assert registry.get("X_BROKEN").startswith("# ERROR")
+
+
+def test_stitch_keeps_order_and_is_cached(templates_dir):
+    registry = TemplateRegistry(str(templates_dir), hot_reload=False)
+    stitched = registry.stitch(["B_MOVEMENT", "A_CORE_SETUP"])
+    assert stitched.index("speed = 5") < stitched.index("import pygame")
+    assert registry.stitch(["B_MOVEMENT", "A_CORE_SETUP"]) is stitched
+
+
+def test_changes_are_ignored_without_hot_reload(templates_dir):
+    registry = TemplateRegistry(str(templates_dir), hot_reload=False)
+    registry.RELOAD_CHECK_INTERVAL = 0
+    (templates_dir / "template_B_movement.py").write_text("speed = 9\n")
+    assert registry.get("B_MOVEMENT") == "speed = 5\n"
+
+
+def test_hot_reload_picks_up_edits_and_drops_cached_stitches(templates_dir):
+    registry = TemplateRegistry(str(templates_dir), hot_reload=True)
+    registry.RELOAD_CHECK_INTERVAL = 0
+    before = registry.stitch(["B_MOVEMENT"])
+    path = templates_dir / "template_B_movement.py"
+    path.write_text("speed = 9\n")
+    # Make sure the edit is visible even on filesystems with coarse mtimes
+    os.utime(path, (path.stat().st_atime, path.stat().st_mtime + 5))
+    assert registry.get("B_MOVEMENT") == "speed = 9\n"
+    assert registry.stitch(["B_MOVEMENT"]) != before
+
+
+def test_hot_reload_follows_the_configuration(templates_dir):
+    registry = TemplateRegistry(str(templates_dir))
+    previous = config.get("templates.hot_reload", False)
+    try:
+        config.set("templates.hot_reload", True)
+        assert registry.hot_reload
+        config.set("templates.hot_reload", False)
+        assert not registry.hot_reload
+    finally:
+        config.set("templates.hot_reload", previous)
+
+
+def test_repository_templates_all_load():
+    registry = TemplateRegistry(hot_reload=False)
+    assert {"A_CORE_SETUP", "B_MOVEMENT_TOPDOWN", "C_MOVEMENT_PLATFORMER"} <= set(registry.template_ids)
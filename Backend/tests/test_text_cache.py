@@ -0,0 +1,65 @@
+"""
+Tests for the HUD text-surface cache and the reused overlay
+"""
+
+import pytest
+
+pygame = pytest.importorskip("pygame")
+pytest.importorskip("numpy")
+
+from engine.text_cache import TextCache
+
+pygame.font.init()
+
+
+@pytest.fixture
+def font():
+    return pygame.font.Font(None, 24)
+
+
+def test_same_text_is_rendered_once(font):
+    cache = TextCache()
+    first = cache.render(font, "Score: 10", (255, 255, 255))
+    assert cache.render(font, "Score: 10", (255, 255, 255)) is first
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_font_text_and_color_are_all_part_of_the_key(font):
+    cache = TextCache()
+    other_font = pygame.font.Font(None, 36)
+    surfaces = {
+        id(cache.render(font, "A", (255, 255, 255))),
+        id(cache.render(font, "B", (255, 255, 255))),
+        id(cache.render(font, "A", (255, 0, 0))),
+        id(cache.render(other_font, "A", (255, 255, 255))),
+    }
+    assert len(surfaces) == 4 and cache.misses == 4
+
+
+def test_least_recently_used_is_evicted(font):
+    cache = TextCache(max_size=2)
+    a = cache.render(font, "a", (0, 0, 0))
+    cache.render(font, "b", (0, 0, 0))
+    cache.render(font, "a", (0, 0, 0))
+    cache.render(font, "c", (0, 0, 0))
+    assert len(cache) == 2
+    assert cache.render(font, "a", (0, 0, 0)) is a
+    misses = cache.misses
+    cache.render(font, "b", (0, 0, 0))
+    assert cache.misses == misses + 1
+
+
+def test_engine_hud_renders_steady_state_from_cache():
+    from engine.game_engine import GameEngine, GameState
+    engine = GameEngine(200, 150)
+    engine.load_level({"spawn_points": [], "objectives": []})
+    # Far in the future, so the time left shown in the HUD does not change between frames
+    engine.start_time = 1e9
+    engine.state = GameState.PAUSED
+    overlay = engine.overlay
+    engine.draw()
+    misses = engine.text_cache.misses
+    for _ in range(5):
+        engine.draw()
+    assert engine.text_cache.misses == misses
+    assert engine.overlay is overlay
@@ -36,63 +36,66 @@ export function CreativeToolPage({ onGenerate }: CreativeToolPageProps = {}) {
   const [taskId, setTaskId] = useState<string | null>(null);
   const [loadingStatus, setLoadingStatus] = useState('Initiating sequence...');
 
-  // This effect will start polling when a task ID is received
+  // This effect subscribes to the progress event stream when a task ID is received
   useEffect(() => {
     if (!taskId) return;
 
-    const intervalId = setInterval(async () => {
-      try {
-        const response = await fetch(`http://localhost:8000/api/generate/status/${taskId}`);
-        if (!response.ok) {
-          throw new Error('Failed to fetch status');
-        }
-        const data = await response.json();
-
-        // Update loading status message based on backend status
-        switch (data.status) {
-          case 'IN_PROGRESS':
-            setLoadingStatus('Generating game world...<br/>AI is thinking...');
-            break;
-          case 'PACKAGING':
-            setLoadingStatus('Packaging your game...<br/>Creating executable...');
-            break;
-          case 'PENDING':
-            setLoadingStatus('Waiting in the queue...');
-            break;
-        }
+    const stageMessages: Record<string, string> = {
+      concept: 'Dreaming up a game concept...<br/>AI is thinking...',
+      template_plan: 'Choosing the building blocks...',
+      level_design: 'Designing the level...',
+      code: 'Writing the game code...<br/>AI is thinking...',
+      assets: 'Picking sprites and assets...',
+      save: 'Saving your game...',
+      package: 'Packaging your game...<br/>Creating executable...',
+    };
+
+    const eventSource = new EventSource(`http://localhost:8000/api/generate/events/${taskId}`);
+
+    eventSource.addEventListener('progress', (message) => {
+      const data = JSON.parse((message as MessageEvent).data);
+
+      // Update loading status message based on backend progress
+      if (data.stage === 'queued') {
+        setLoadingStatus(`Waiting in the queue...<br/>Position ${data.queue_position}`);
+      } else if (data.phase === 'started' && stageMessages[data.stage]) {
+        setLoadingStatus(stageMessages[data.stage]);
+      }
 
-        if (data.status === 'SUCCESS') {
-          clearInterval(intervalId);
-          console.log('Generation successful!', data.result);
-          
-          // 1. Pass the successful result up to the parent component (App.tsx)
-          if (onGenerate) {
-              onGenerate(data.result); 
-          }
-
-          // 2. CRITICAL FIX: Tell CreativeToolPage to stop showing the loading screen.
-          // This allows the parent component to render the EditPage with the new result prop.
-          setStage('sliders'); // Or 'input', whichever state naturally follows 'loading'
-          
-          // 3. Clear the task ID 
-          setTaskId(null);
-
-      } else if (data.status === 'FAILURE') {
-          clearInterval(intervalId);
-          console.error('Generation failed:', data.result.error);
-          setStage('sliders'); 
-          setTaskId(null);
+      if (data.status === 'SUCCESS') {
+        eventSource.close();
+        console.log('Generation successful!', data.result, data.stage_timings);
+        
+        // 1. Pass the successful result up to the parent component (App.tsx)
+        if (onGenerate) {
+            onGenerate(data.result); 
         }
 
-      } catch (error) {
-        console.error('Error polling for status:', error);
-        clearInterval(intervalId);
+        // 2. CRITICAL FIX: Tell CreativeToolPage to stop showing the loading screen.
+        // This allows the parent component to render the EditPage with the new result prop.
+        setStage('sliders'); // Or 'input', whichever state naturally follows 'loading'
+        
+        // 3. Clear the task ID 
+        setTaskId(null);
+
+      } else if (data.status === 'FAILURE' || data.status === 'CANCELLED') {
+        eventSource.close();
+        console.error('Generation failed:', data.result?.error);
+        setStage('sliders'); 
+        setTaskId(null);
+      }
+    });
+
+    eventSource.onerror = () => {
+      // EventSource reconnects on its own (resuming via Last-Event-ID); give up only once it is closed
+      if (eventSource.readyState === EventSource.CLOSED) {
+        console.error('Progress stream closed unexpectedly');
         setStage('sliders');
         setTaskId(null);
       }
-    }, 3000); // Poll every 3 seconds
+    };
 
-    return () => clearInterval(intervalId);
+    return () => eventSource.close();
 
   }, [taskId, onGenerate]);
 